@@ -1,35 +1,57 @@
+import hashlib
+import json
+import os
+
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
 
 # Importamos las funciones del cerebro V2
 from src.utils import cargar_json
-from src.generator import generar_predicciones_del_dia
+from src.almacen_historial import cargar_historial
 from src.evaluator import evaluar_dia_completo
+from src.cache_resultados import backtesting_con_cache
+from src.comparacion import comparar_estrategias
+from src.indice_metricas import IndiceMetricas
+from src.reporter import ETIQUETAS_RESULTADO, etiquetar_resultados
+from src.grupos import compilar_definiciones
+from src.tabla_predicciones import TablaPredicciones
+from src.intelligence_analyzer import nombre_modelo
+from src.modelos_puntuacion import MODELOS, parametros_modelo
+from src import instrumentacion
 
 # --- CONFIGURACIÓN DE LA PÁGINA ---
 st.set_page_config(page_title="Cash WinPredictor V2.4", page_icon="🔬", layout="wide")
 
 # --- CARGA DE DATOS ---
+RUTA_HISTORIAL = 'data/historical_draws.json'
+
 @st.cache_data
-def cargar_datos_y_preprocesar():
+def cargar_datos_y_preprocesar(version_historial):
+    # `version_historial` solo forma parte de la clave: si el JSON cambia, se vuelve a cargar
     config = cargar_json('data/strategy_configuration.json')
-    historial_sorteos = cargar_json('data/historical_draws.json')
-    
-    historial_list = []
-    for fecha_str, franjas in historial_sorteos.items():
-        try:
-            fila = {'fecha': datetime.strptime(fecha_str, "%Y-%m-%d").date()}
-            fila.update(franjas)
-            historial_list.append(fila)
-        except (ValueError, TypeError):
-            continue
-            
-    df = pd.DataFrame(historial_list)
-    df = df.sort_values(by='fecha', ascending=True).reset_index(drop=True)
+    # El JSON se importa una vez al almacén columnar; los arranques siguientes lo leen con memory-map
+    df = cargar_historial(RUTA_HISTORIAL).a_dataframe()
     return config, df
 
-config, historial_df = cargar_datos_y_preprocesar()
+def huella_config(config):
+    # Streamlit no hashea los argumentos con "_": la huella del contenido es la que cambia la clave
+    return hashlib.sha256(json.dumps(config, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+@st.cache_resource
+def compilar_estrategias(_config, huella):
+    # Compila y valida (solapamientos, rango) todas las definiciones una sola vez por configuración
+    return compilar_definiciones(_config)
+
+estado_historial = os.stat(RUTA_HISTORIAL)
+version_historial = (estado_historial.st_size, estado_historial.st_mtime_ns)
+config, historial_df = cargar_datos_y_preprocesar(version_historial)
+
+try:
+    definiciones_compiladas = compilar_estrategias(config, huella_config(config))
+except ValueError as error:
+    st.error(f"Error en `strategy_configuration.json`: {error}")
+    st.stop()
 
 # --- BARRA LATERAL ---
 st.sidebar.title("Panel de Control")
@@ -51,49 +73,65 @@ estrategia_seleccionada = st.sidebar.selectbox(
 )
 
 # Obtenemos la configuración de grupos activa
-grupos_activos = config['group_definitions'][estrategia_seleccionada]
+grupos_activos = definiciones_compiladas[estrategia_seleccionada]
 
 # --- FIN DE LA MODIFICACIÓN ---
 
+modelos_disponibles = list(MODELOS)
+modelo_seleccionado = st.sidebar.selectbox(
+    "Modelo de puntuación:",
+    options=modelos_disponibles,
+    index=modelos_disponibles.index(nombre_modelo(config)) if nombre_modelo(config) in MODELOS else 0,
+    format_func=lambda nombre: f"{nombre} — {MODELOS[nombre].descripcion}",
+    key="model_selector"
+)
+config = {**config, 'modelo_puntuacion': modelo_seleccionado}
+
+@st.cache_resource
+def tabla_de_predicciones(_config, _definiciones, huella):
+    # Una tabla por configuración (incluye el modelo de puntuación elegido)
+    return TablaPredicciones(_config, _definiciones)
+
+# Predicciones memoizadas: se recalculan solo cuando llegan sorteos nuevos o cambia la configuración
+tabla_predicciones = tabla_de_predicciones(config, definiciones_compiladas, huella_config(config))
+if tabla_predicciones.sincronizar(historial_df, version_historial):
+    for nombre_estrategia in definiciones_compiladas:
+        tabla_predicciones.precalcular(nombre_estrategia)
+
 st.sidebar.markdown("---")
-seccion = st.sidebar.radio("Elige una sección:", ("📈 Análisis de Backtesting", "🔮 Jugada Recomendada", "🔴 Módulo en Vivo"), key="nav_radio")
+seccion = st.sidebar.radio("Elige una sección:", ("📈 Análisis de Backtesting", "⚖️ Comparar Estrategias", "🔮 Jugada Recomendada", "🔴 Módulo en Vivo"), key="nav_radio")
 st.sidebar.markdown("---")
 st.sidebar.subheader("⚙️ Configuración Activa")
-st.sidebar.json({"grupos_seleccionados": grupos_activos}, expanded=False)
+st.sidebar.json({"grupos_seleccionados": grupos_activos.como_dict(), "modelo_puntuacion": parametros_modelo(config)}, expanded=False)
+
+# Panel de diagnóstico: solo con CWP_INSTRUMENTACION=1
+if instrumentacion.esta_activa():
+    with st.sidebar.expander("🩺 Diagnóstico de rendimiento"):
+        resumen_etapas = instrumentacion.resumen()
+        if resumen_etapas:
+            st.dataframe(pd.DataFrame.from_dict(resumen_etapas, orient='index'), use_container_width=True)
+        else:
+            st.caption("Aún no hay mediciones en esta sesión.")
+        st.download_button("Descargar JSON", instrumentacion.exportar_json(), file_name="etapas.json", key="diag_json")
+        st.download_button("Descargar Prometheus", instrumentacion.texto_prometheus(), file_name="etapas.prom", key="diag_prom")
+        if st.button("Reiniciar mediciones", key="diag_reset"):
+            instrumentacion.reiniciar()
 
 
 # --- FUNCIÓN DE BACKTESTING V2.4 (ahora depende de la estrategia) ---
-@st.cache_data(show_spinner="Ejecutando backtesting con la estrategia seleccionada...")
-def ejecutar_backtesting_dinamico(_config_dict, _historial_completo_df, _grupos_activos):
-    resultados_totales = []
-    fechas_para_predecir = _historial_completo_df['fecha'].unique()
+def ejecutar_backtesting_dinamico(config_dict, historial_completo_df, grupos_activos):
+    # Caché en disco por contenido (estrategia, parámetros, costos e historial): sobrevive a reinicios
+    with st.spinner("Ejecutando backtesting con la estrategia seleccionada..."):
+        return backtesting_con_cache(config_dict, historial_completo_df, grupos_activos)
 
-    if len(fechas_para_predecir) < 31:
-        return pd.DataFrame()
+@st.cache_data(show_spinner=False)
+def construir_indice_metricas(resultados_df):
+    return IndiceMetricas(resultados_df)
 
-    for i, fecha_actual in enumerate(fechas_para_predecir):
-        if i < 30: continue
-        
-        historial_para_analisis = _historial_completo_df[_historial_completo_df['fecha'] < fecha_actual]
-        predicciones = generar_predicciones_del_dia(historial_para_analisis, fecha_actual, _config_dict, _grupos_activos)
-        resultados_reales = _historial_completo_df[_historial_completo_df['fecha'] == fecha_actual].iloc[0].to_dict()
-        resultado_dia = evaluar_dia_completo(predicciones, resultados_reales, _config_dict, _grupos_activos)
-
-        for detalle_franja in resultado_dia['detalle_franjas']:
-            resultados_totales.append({
-                'fecha': fecha_actual,
-                'franja': detalle_franja['franja'],
-                'grupo_predicho': detalle_franja['grupo_predicho'],
-                'numeros_jugados': detalle_franja['numeros_jugados'],
-                'numero_real': detalle_franja['numero_real'],
-                'resultado': detalle_franja['resultado'],
-                'ganancia_franja': detalle_franja['ganancia_franja']
-            })
-        
-    df_final = pd.DataFrame(resultados_totales)
-    if not df_final.empty:
-        df_final['fecha'] = pd.to_datetime(df_final['fecha'])
-    return df_final
+@st.cache_data(show_spinner="Comparando todas las estrategias en una sola pasada...")
+def comparar_todas_las_estrategias(config_dict, historial_completo_df):
+    # Una sola pasada por el historial para todas las definiciones de grupos
+    return comparar_estrategias(config_dict, historial_completo_df)
 
 # --- TÍTULO PRINCIPAL ---
 st.title(f"🧠 Cash WinPredictor - {estrategia_seleccionada}")
@@ -108,68 +146,99 @@ if seccion == "📈 Análisis de Backtesting":
     if backtesting_results_df.empty:
         st.error("No se pudo ejecutar el backtesting.")
     else:
-        # ... el resto de la sección de backtesting con su filtro ... (código sin cambios)
+        # Sumas acumuladas por día: las métricas de cualquier rango salen de dos búsquedas
+        indice = construir_indice_metricas(backtesting_results_df)
         st.subheader("Análisis por Período")
 
-        min_fecha = backtesting_results_df['fecha'].min().date()
-        max_fecha = backtesting_results_df['fecha'].max().date()
+        min_fecha = backtesting_results_df['fecha'].iloc[0].date()
+        max_fecha = backtesting_results_df['fecha'].iloc[-1].date()
         
         date_range = st.date_input("Selecciona un rango de fechas para analizar:", value=(min_fecha, max_fecha), min_value=min_fecha, max_value=max_fecha, key="results_date_range")
         
         if isinstance(date_range, tuple) and len(date_range) == 2:
             fecha_inicio, fecha_fin = date_range
-            
-            df_filtrado = backtesting_results_df[(backtesting_results_df['fecha'].dt.date >= fecha_inicio) & (backtesting_results_df['fecha'].dt.date <= fecha_fin)]
+            metricas = indice.metricas(fecha_inicio, fecha_fin)
 
             st.subheader("Métricas para el Período Seleccionado")
-            
-            total_franjas = len(df_filtrado)
-            total_aciertos = len(df_filtrado[df_filtrado['resultado'] == "✅ ACIERTO"])
-            tasa_acierto = (total_aciertos / total_franjas) * 100 if total_franjas > 0 else 0
-            balance_total = df_filtrado['ganancia_franja'].sum()
 
             col1, col2, col3 = st.columns(3)
-            col1.metric("Tasa de Acierto", f"{tasa_acierto:.2f}%")
-            col2.metric("Balance Neto", f"${balance_total:,.2f}")
-            col3.metric("Aciertos / Jugadas", f"{total_aciertos} / {total_franjas}")
+            col1.metric("Tasa de Acierto", f"{metricas['tasa_acierto']:.2f}%")
+            col2.metric("Balance Neto", f"${metricas['balance_neto']:,.2f}")
+            col3.metric("Aciertos / Jugadas", f"{metricas['aciertos']} / {metricas['jugadas']}")
+
+            col_franja, col_grupo = st.columns(2)
+            col_franja.dataframe(indice.metricas_por(fecha_inicio, fecha_fin, 'franja').set_index('franja'), use_container_width=True)
+            col_grupo.dataframe(indice.metricas_por(fecha_inicio, fecha_fin, 'grupo_predicho').set_index('grupo_predicho'), use_container_width=True)
+
+            st.subheader("Evolución del Balance")
+            periodo = st.radio("Agrupar por:", ("Diario", "Semanal", "Mensual"), horizontal=True, key="results_period")
+            frecuencia = {"Diario": "D", "Semanal": "W", "Mensual": "M"}[periodo]
+            serie = indice.serie(frecuencia)
+            serie = serie[(serie.index >= pd.Timestamp(fecha_inicio)) & (serie.index <= pd.Timestamp(fecha_fin))]
+            st.line_chart(serie['balance_acumulado'])
+            st.bar_chart(serie['ganancia'])
 
             st.subheader("Detalle de Sorteos del Período")
-            df_display = df_filtrado.sort_values(by=['fecha'], ascending=False).reset_index(drop=True)
-            st.dataframe(df_display, use_container_width=True)
+            inicio_filas, fin_filas = indice.filas_en_rango(fecha_inicio, fecha_fin)
+            col_pagina, col_tamano = st.columns(2)
+            tamano_pagina = col_tamano.selectbox("Filas por página", (50, 100, 250, 500), index=1, key="results_page_size")
+            total_paginas = max(1, -(-(fin_filas - inicio_filas) // tamano_pagina))
+            numero_pagina = col_pagina.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, value=1, step=1, key="results_page")
+            # Solo se envía al navegador la página visible
+            df_display, _ = indice.pagina(backtesting_results_df, fecha_inicio, fecha_fin, int(numero_pagina), tamano_pagina)
+            st.dataframe(etiquetar_resultados(df_display, grupos_activos), use_container_width=True)
+
+elif seccion == "⚖️ Comparar Estrategias":
+    st.header("⚖️ Comparación de Estrategias")
+    resumen_estrategias, detalles_estrategias = comparar_todas_las_estrategias(config, historial_df)
+
+    if resumen_estrategias.empty:
+        st.error("No hay historial suficiente para comparar las estrategias.")
+    else:
+        df_resumen = resumen_estrategias.rename(columns={
+            'estrategia': 'Estrategia', 'balance_neto': 'Balance Neto', 'aciertos': 'Aciertos',
+            'jugadas': 'Jugadas', 'tasa_acierto': 'Tasa de Acierto (%)',
+        }).set_index('Estrategia')
+        st.dataframe(df_resumen.style.format({'Balance Neto': '${:,.2f}', 'Tasa de Acierto (%)': '{:.2f}%'}), use_container_width=True)
+
+        st.subheader("Detalle por Estrategia")
+        for nombre, pestana in zip(detalles_estrategias, st.tabs(list(detalles_estrategias))):
+            with pestana:
+                detalle = detalles_estrategias[nombre].iloc[::-1].reset_index(drop=True)
+                st.dataframe(etiquetar_resultados(detalle, definiciones_compiladas[nombre]), use_container_width=True)
 
 elif seccion == "🔮 Jugada Recomendada":
     st.header("🔮 Jugada Recomendada por Fecha")
     fecha_a_predecir = st.date_input("Selecciona una fecha para generar la predicción:", value=datetime.today().date() + timedelta(days=1), key="rec_date")
     
     if st.button("Generar Predicción", key="rec_button"):
-        # Llama al generador con los grupos activos
-        predicciones_hoy = generar_predicciones_del_dia(historial_df[historial_df['fecha'] < fecha_a_predecir], fecha_a_predecir, config, grupos_activos)
+        predicciones_hoy = tabla_predicciones.prediccion(fecha_a_predecir, estrategia_seleccionada)
         st.success(f"Predicciones generadas para el **{fecha_a_predecir.strftime('%Y-%m-%d')}**")
         
         df_predicciones = pd.DataFrame(list(predicciones_hoy.items()), columns=['Franja', 'Grupo Predicho'])
-        df_predicciones['Números a Jugar'] = df_predicciones['Grupo Predicho'].apply(lambda g: grupos_activos.get(g, []))
+        df_predicciones['Números a Jugar'] = df_predicciones['Grupo Predicho'].apply(lambda g: list(grupos_activos.get(g, ())))
         st.table(df_predicciones)
 
 elif seccion == "🔴 Módulo en Vivo":
     st.header("🔴 Módulo en Vivo: Evaluar Sorteo")
     fecha_evaluar = st.date_input("1. Selecciona la fecha del sorteo:", value=datetime.today().date(), key="live_date")
     
-    # Llama al generador con los grupos activos
-    predicciones_para_eval = generar_predicciones_del_dia(historial_df[historial_df['fecha'] < fecha_evaluar], fecha_evaluar, config, grupos_activos)
+    predicciones_para_eval = tabla_predicciones.prediccion(fecha_evaluar, estrategia_seleccionada)
     
     st.write("2. Jugada recomendada para ese día:")
     df_pred_eval = pd.DataFrame(list(predicciones_para_eval.items()), columns=['Franja', 'Grupo Predicho'])
-    df_pred_eval['Números Recomendados'] = df_pred_eval['Grupo Predicho'].apply(lambda g: grupos_activos.get(g, []))
+    df_pred_eval['Números Recomendados'] = df_pred_eval['Grupo Predicho'].apply(lambda g: list(grupos_activos.get(g, ())))
     st.table(df_pred_eval)
 
     st.write("3. Ingresa los resultados reales:")
     
     resultados_reales_live = {}
     franjas_nombres = config.get("franjas", [])
+    numero_minimo, numero_maximo = config.get("rango_numeros", [1, 15])
     
     cols = st.columns(len(franjas_nombres))
     for i, franja in enumerate(franjas_nombres):
-        resultados_reales_live[franja] = cols[i].number_input(franja, min_value=1, max_value=15, step=1, key=f"live_input_{franja}")
+        resultados_reales_live[franja] = cols[i].number_input(franja, min_value=numero_minimo, max_value=numero_maximo, step=1, key=f"live_input_{franja}")
 
     if st.button("Evaluar mi Jugada", key="live_button"):
         # Llama al evaluador con los grupos activos
@@ -182,4 +251,7 @@ elif seccion == "🔴 Módulo en Vivo":
         col2.metric("Ganancia Neta del Día", f"${resultado_live['ganancia_neta_dia']}", delta=f"{resultado_live['ganancia_neta_dia']}")
         
         st.write("Detalle por franja:")
-        st.table(pd.DataFrame(resultado_live['detalle_franjas']))
\ No newline at end of file
+        detalle_live = pd.DataFrame(resultado_live['detalle_franjas'])
+        detalle_live['numeros_jugados'] = detalle_live['grupo_predicho'].apply(lambda g: list(grupos_activos.get(g, ())))
+        detalle_live['resultado'] = detalle_live.pop('acierto').map(ETIQUETAS_RESULTADO)
+        st.table(detalle_live)
\ No newline at end of file
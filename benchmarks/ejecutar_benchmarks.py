@@ -0,0 +1,219 @@
+"""
+Benchmarks del pipeline de predicción con historiales sintéticos.
+
+Mide la carga de datos, `analyze_franja_and_predict`,
+`generar_predicciones_del_dia`, `evaluar_dia_completo`, la predicción rápida
+(en proceso y el arranque en frío de `python -m src.prediccion_rapida`) y el
+backtesting completo (ventana deslizante y vectorizado) para varios tamaños de
+historial, y guarda los tiempos en JSON. Con `--comparar` falla (código de salida 1) si
+algún tiempo empeora más que `--umbral` respecto a una ejecución anterior.
+
+Uso:
+    python -m benchmarks.ejecutar_benchmarks --anios 1,5,20 --salida outputs/benchmarks.json
+    python -m benchmarks.ejecutar_benchmarks --comparar outputs/benchmarks_base.json --umbral 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from src import instrumentacion
+from src.almacen_historial import cargar_historial, directorio_por_defecto, eliminar_almacen
+from src.backtesting import ejecutar_backtesting
+from src.backtesting_vectorizado import ejecutar_backtesting_vectorizado
+from src.evaluator import evaluar_dia_completo
+from src.generator import generar_predicciones_del_dia
+from src.grupos import compilar_definiciones
+from src.intelligence_analyzer import MODELO_POR_DEFECTO, analyze_franja_and_predict
+from src.modelos_puntuacion import MODELOS
+from src.prediccion_rapida import predecir_fecha
+from src.sintetico import generar_configuracion, generar_historial
+from src.utils import cargar_json, historial_a_dataframe
+
+# Diferencias por debajo de este valor se consideran ruido al comparar
+RUIDO_MINIMO_SEGUNDOS = 0.002
+# Objetivo del arranque en frío de una predicción (se avisa si se supera)
+OBJETIVO_ARRANQUE_SEGUNDOS = 0.100
+
+
+def medir(funcion, repeticiones, preparar=None):
+    """Ejecuta `funcion` `repeticiones` veces y devuelve los tiempos en segundos."""
+    tiempos = []
+    for _ in range(repeticiones):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def benchmarks_de_escala(anios, franjas, numero_maximo, definiciones, repeticiones, directorio):
+    """Devuelve la lista de mediciones para un historial sintético de `anios` años."""
+    historial_sorteos = generar_historial(anios, franjas, numero_maximo, semilla=int(anios * 1000))
+    config = generar_configuracion(franjas, numero_maximo, definiciones)
+    ruta_json = os.path.join(directorio, f"historial_{anios}.json")
+    with open(ruta_json, 'w', encoding='utf-8') as f:
+        json.dump(historial_sorteos, f)
+    ruta_config = os.path.join(directorio, f"config_{anios}.json")
+    with open(ruta_config, 'w', encoding='utf-8') as f:
+        json.dump(config, f)
+
+    historial_df = historial_a_dataframe(historial_sorteos)
+    estrategias = compilar_definiciones(config)
+    grupos_activos = next(iter(estrategias.values()))
+    franja = config['franjas'][0]
+    fecha_prediccion = historial_df['fecha'].iloc[-1] + timedelta(days=1)
+    predicciones = generar_predicciones_del_dia(historial_df, fecha_prediccion, config, grupos_activos)
+    resultados_reales = historial_df.iloc[-1].to_dict()
+    repeticiones_lentas = max(1, repeticiones // 2)
+    comando_arranque = [sys.executable, '-m', 'src.prediccion_rapida', '--config', ruta_config,
+                        '--historial', ruta_json, '--fecha', fecha_prediccion.isoformat()]
+
+    casos = [
+        ("carga_json", lambda: historial_a_dataframe(cargar_json(ruta_json)), repeticiones, None, 1),
+        ("carga_almacen_importacion", lambda: cargar_historial(ruta_json), repeticiones,
+         lambda: eliminar_almacen(directorio_por_defecto(ruta_json)), 1),
+        ("carga_almacen", lambda: cargar_historial(ruta_json).a_dataframe(), repeticiones, None, 1),
+        ("analyze_franja_and_predict",
+         lambda: analyze_franja_and_predict(historial_df, fecha_prediccion, franja, config, grupos_activos),
+         repeticiones, None, 1),
+        ("generar_predicciones_del_dia",
+         lambda: generar_predicciones_del_dia(historial_df, fecha_prediccion, config, grupos_activos),
+         repeticiones, None, 1),
+        ("prediccion_rapida", lambda: predecir_fecha(config, grupos_activos, fecha_prediccion, ruta_json),
+         repeticiones, None, 1),
+        ("arranque_prediccion_rapida", lambda: subprocess.run(comando_arranque, check=True, stdout=subprocess.DEVNULL),
+         repeticiones, None, 1),
+        ("evaluar_dia_completo",
+         lambda: [evaluar_dia_completo(predicciones, resultados_reales, config, grupos_activos) for _ in range(1000)],
+         repeticiones, None, 1000),
+        ("backtesting_ventana", lambda: ejecutar_backtesting(config, historial_df, grupos_activos),
+         repeticiones_lentas, None, 1),
+        ("backtesting_vectorizado", lambda: ejecutar_backtesting_vectorizado(config, historial_df, grupos_activos),
+         repeticiones, None, 1),
+    ]
+    # Un caso por modelo de puntuación adicional: ninguno debería ser más lento que la regla original
+    casos += [
+        (f"backtesting_vectorizado_{modelo}",
+         lambda modelo=modelo: ejecutar_backtesting_vectorizado({**config, 'modelo_puntuacion': modelo}, historial_df,
+                                                                grupos_activos),
+         repeticiones, None, 1)
+        for modelo in MODELOS if modelo != MODELO_POR_DEFECTO
+    ]
+
+    # Asegura que el almacén existe antes de medir su apertura
+    cargar_historial(ruta_json)
+
+    mediciones = []
+    for nombre, funcion, veces, preparar, llamadas in casos:
+        tiempos = [t / llamadas for t in medir(funcion, veces, preparar)]
+        mediciones.append({
+            'nombre': nombre,
+            'anios': anios,
+            'filas': len(historial_df),
+            'segundos': min(tiempos),
+            'mediana': statistics.median(tiempos),
+            'repeticiones': veces,
+        })
+        print(f"  {nombre:<32} {min(tiempos) * 1000:>10.3f} ms")
+        if nombre == "arranque_prediccion_rapida" and min(tiempos) > OBJETIVO_ARRANQUE_SEGUNDOS:
+            print(f"  (supera el objetivo de {OBJETIVO_ARRANQUE_SEGUNDOS * 1000:.0f} ms; incluye el arranque del intérprete)")
+    return mediciones
+
+
+def ejecutar(anios, franjas, numero_maximo, definiciones, repeticiones):
+    directorio = tempfile.mkdtemp(prefix='benchmarks_')
+    try:
+        mediciones = []
+        for escala in anios:
+            print(f"--- {escala} año(s) de historial, {franjas} franjas, números 1-{numero_maximo} ---")
+            mediciones.extend(benchmarks_de_escala(escala, franjas, numero_maximo, definiciones, repeticiones, directorio))
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    return {
+        'metadatos': {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'parametros': {
+                'anios': anios, 'franjas': franjas, 'numero_maximo': numero_maximo,
+                'definiciones': definiciones, 'repeticiones': repeticiones,
+            },
+        },
+        'resultados': mediciones,
+    }
+
+
+def comparar(actual, base, umbral):
+    """Devuelve las mediciones de `actual` que empeoran más que `umbral` (fracción) respecto a `base`."""
+    anteriores = {(m['nombre'], m['anios']): m for m in base['resultados']}
+    regresiones = []
+    print(f"--- Comparación (umbral {umbral:.0%}) ---")
+    for medicion in actual['resultados']:
+        anterior = anteriores.get((medicion['nombre'], medicion['anios']))
+        if anterior is None:
+            continue
+        cambio = medicion['segundos'] / anterior['segundos'] - 1 if anterior['segundos'] > 0 else 0.0
+        es_regresion = cambio > umbral and medicion['segundos'] - anterior['segundos'] > RUIDO_MINIMO_SEGUNDOS
+        marca = "REGRESIÓN" if es_regresion else "ok"
+        print(f"  {medicion['nombre']:<32} {medicion['anios']:>4} años  {cambio:>+8.1%}  {marca}")
+        if es_regresion:
+            regresiones.append({**medicion, 'base': anterior['segundos'], 'cambio': cambio})
+    return regresiones
+
+
+def _lista(tipo):
+    return lambda texto: [tipo(valor) for valor in texto.split(',') if valor.strip()]
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del pipeline de predicción.")
+    parser.add_argument('--anios', type=_lista(float), default=[1, 5, 20], help="Tamaños de historial en años.")
+    parser.add_argument('--franjas', type=int, default=5)
+    parser.add_argument('--numero-maximo', type=int, default=15)
+    parser.add_argument('--definiciones', type=int, default=2)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--salida', default='outputs/benchmarks.json')
+    parser.add_argument('--comparar', help="JSON de una ejecución anterior contra el que comparar.")
+    parser.add_argument('--umbral', type=float, default=0.25, help="Empeoramiento máximo permitido (0.25 = 25%%).")
+    parser.add_argument('--instrumentar', metavar='RUTA',
+                        help="Activa la instrumentación por etapas y guarda el resumen (.json o .prom).")
+    parser.add_argument('--perfil', metavar='RUTA', help="Perfila la ejecución y guarda el perfil en RUTA.")
+    parser.add_argument('--modo-perfil', choices=['cprofile', 'muestreo'], default='cprofile')
+    args = parser.parse_args(argumentos)
+
+    if args.instrumentar:
+        instrumentacion.activar()
+    with instrumentacion.perfilar(args.perfil, modo=args.modo_perfil):
+        actual = ejecutar(args.anios, args.franjas, args.numero_maximo, args.definiciones, args.repeticiones)
+    if args.instrumentar:
+        instrumentacion.exportar(args.instrumentar)
+        print(f"Resumen de etapas guardado en: {args.instrumentar}")
+
+    os.makedirs(os.path.dirname(args.salida) or '.', exist_ok=True)
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(actual, f, ensure_ascii=False, indent=2)
+    print(f"Resultados guardados en: {args.salida}")
+
+    if args.comparar:
+        base = cargar_json(args.comparar)
+        if base is None:
+            return 2
+        regresiones = comparar(actual, base, args.umbral)
+        if regresiones:
+            print(f"{len(regresiones)} medición(es) empeoraron más de {args.umbral:.0%}.")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
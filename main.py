@@ -1,46 +1,202 @@
 # main.py
+"""
+Backtesting por línea de comandos, sin Streamlit.
+
+Recorre el historial una sola vez por estrategia con la ventana deslizante y
+escribe los resultados por franja a medida que se generan, en bloques de
+tamaño fijo: la memoria usada no crece con el largo del historial. Pensado
+para ejecutarse desde cron. Los modelos de puntuación sin estado incremental
+(src/modelos_puntuacion.py) se puntúan por lotes y las filas se generan de a
+una desde los arrays de predicción.
+
+Sin rango de fechas, cada estrategia pasa por la misma caché en disco que la
+app (src/cache_resultados.py): si el historial no cambió se reutiliza el
+resultado, y si solo creció se evalúan únicamente las fechas nuevas. En ese
+caso el resultado compacto de la estrategia se guarda entero en memoria;
+`--sin-cache` vuelve al recorrido día a día.
+
+Uso:
+    python main.py --estrategia "Grupos de 5 (A, B, C)" --desde 2024-01-01 --hasta 2024-12-31
+    python main.py --formato parquet --salida outputs/backtesting_report.parquet
+    python main.py --sin-cache
+"""
+import argparse
+import sys
+from datetime import date
+from itertools import chain
+
+from src import instrumentacion
+from src.almacen_historial import cargar_historial
+from src.backtesting import iterar_resultados
+from src.cache_resultados import DIRECTORIO_POR_DEFECTO, CacheResultados, clave_backtesting, huella_almacen
+from src.grupos import compilar_definiciones
+from src.intelligence_analyzer import MODELOS_INCREMENTALES, crear_estado_incremental, nombre_modelo
+from src.modelos_puntuacion import parametros_modelo
+from src.reporter import COLUMNAS_RESULTADO, FORMATOS_SALIDA, escribir_resultados_por_bloques, etiquetar_fila
+from src.resultados_compactos import a_monto
 from src.utils import cargar_json
-from src.generator import generar_jugada_por_fecha
-from src.evaluator import evaluar_jugada
-from src.reporter import guardar_reporte_csv
 
-def ejecutar_backtesting():
+
+def _resultados_por_lotes(config, almacen, grupos_activos, fecha_desde, fecha_hasta):
     """
-    Flujo principal para ejecutar el análisis histórico (backtesting).
+    Resultados de un modelo que solo se calcula por lotes, filtrados al rango
+    pedido. Las filas salen de a una de los arrays de predicción del historial
+    codificado (días x franjas), sin construir el DataFrame de resultados.
     """
-    print("--- Iniciando Backtesting de Estrategia Rotativa ---")
-    
-    # 1. Cargar configuración e historial
-    config = cargar_json("data/strategy_config.json")
-    historial_sorteos = cargar_json("data/historical_draws.json")
-    
-    if not config or not historial_sorteos:
-        print("Error al cargar archivos de configuración o datos. Abortando.")
+    from src.backtesting import DIAS_MINIMOS_HISTORIAL
+    from src.backtesting_vectorizado import SIN_DATO, evaluar_codificado
+
+    franjas = config.get("franjas", ["Morning", "Matinee", "Afternoon", "Evening", "LateNight"])
+    franjas = [franja for franja in franjas if franja in almacen.franjas]
+    fechas, ordinales, matriz = almacen.codificado(franjas)
+    if len(fechas) < DIAS_MINIMOS_HISTORIAL + 1:
         return
+    _, predichos, acierto, ganancia = evaluar_codificado(
+        ordinales, matriz, grupos_activos, config.get('premio_por_acierto', 5), **parametros_modelo(config)
+    )
+    numeros = matriz[DIAS_MINIMOS_HISTORIAL:]
+    for i, fecha in enumerate(fechas[DIAS_MINIMOS_HISTORIAL:]):
+        if fecha_desde and fecha < fecha_desde:
+            continue
+        if fecha_hasta and fecha > fecha_hasta:
+            break
+        for j, franja in enumerate(franjas):
+            yield {
+                'fecha': fecha,
+                'franja': franja,
+                'grupo_predicho': grupos_activos.nombres[predichos[i, j]],
+                'numero_real': None if numeros[i, j] == SIN_DATO else int(numeros[i, j]),
+                'acierto': bool(acierto[i, j]),
+                'ganancia_franja': a_monto(ganancia[i, j]),
+            }
+
+
+def _filas_de_resultados(resultados_df, tamano_bloque=10000):
+    """Filas (dicts) de un DataFrame de resultados compacto, convertidas de a `tamano_bloque`."""
+    import pandas as pd
+
+    for inicio in range(0, len(resultados_df), tamano_bloque):
+        for resultado in resultados_df.iloc[inicio:inicio + tamano_bloque].to_dict('records'):
+            if pd.isna(resultado['numero_real']):
+                resultado['numero_real'] = None
+            yield resultado
+
+
+def _resultados_en_cache(config, almacen, grupos_activos, cache):
+    """
+    Filas de los resultados de todo el historial si ya están en la caché
+    compartida con la app, o None. La huella del historial se calcula leyendo
+    el almacén por bloques, sin materializarlo.
+    """
+    resultado = cache.obtener(clave_backtesting(config, grupos_activos, huella_almacen(almacen)))
+    return None if resultado is None else _filas_de_resultados(resultado)
 
-    resultados_finales = []
-    
-    # 2. Iterar sobre cada sorteo histórico
-    for sorteo_real in historial_sorteos:
-        fecha = sorteo_real["fecha"]
-        print(f"Procesando fecha: {fecha}...")
-        
-        # 3. Generar la jugada que se *hubiera* hecho ese día
-        jugada_generada = generar_jugada_por_fecha(fecha, config)
-        
-        # 4. Evaluar la jugada contra el resultado real
-        if jugada_generada:
-            resultado_dia = evaluar_jugada(jugada_generada, sorteo_real, config)
-            resultados_finales.append(resultado_dia)
-
-    # 5. Guardar el reporte final
-    if resultados_finales:
-        ruta_reporte = "outputs/backtesting_report.csv"
-        guardar_reporte_csv(resultados_finales, ruta_reporte)
+
+def resultados_de_estrategia(config, almacen, nombre_estrategia, grupos_activos, fecha_desde=None, fecha_hasta=None,
+                             cache=None):
+    """
+    Generador con los resultados por franja de una estrategia, con la columna
+    'estrategia'. Con `cache` (un CacheResultados) y sin rango de fechas, los
+    resultados ya calculados (p. ej. por la app) salen de la caché de
+    backtesting; si no están, se recorren igual que sin caché, con memoria
+    constante, y la caché no se escribe.
+    """
+    franjas = config.get("franjas", ["Morning", "Matinee", "Afternoon", "Evening", "LateNight"])
+    resultados = None
+    if cache is not None and fecha_desde is None and fecha_hasta is None:
+        resultados = _resultados_en_cache(config, almacen, grupos_activos, cache)
+    if resultados is None and nombre_modelo(config) in MODELOS_INCREMENTALES:
+        # Ventana deslizante o estado de Markov; las fechas anteriores a `fecha_desde` solo lo alimentan
+        ventana = crear_estado_incremental(config, franjas, grupos_activos)
+        resultados = iterar_resultados(almacen.iterar_filas(franjas), ventana, config, grupos_activos,
+                                       fecha_desde=fecha_desde, fecha_hasta=fecha_hasta)
+    elif resultados is None:
+        # Los demás modelos no tienen estado incremental: se puntúan por lotes (src/modelos_puntuacion.py)
+        resultados = _resultados_por_lotes(config, almacen, grupos_activos, fecha_desde, fecha_hasta)
+    for resultado in resultados:
+        resultado['estrategia'] = nombre_estrategia
+        yield etiquetar_fila(resultado, grupos_activos)
+
+
+def _fecha(texto):
+    try:
+        return date.fromisoformat(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Fecha inválida: {texto!r} (usa AAAA-MM-DD).")
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Backtesting de la estrategia rotativa sin interfaz gráfica.")
+    parser.add_argument('--config', default='data/strategy_configuration.json')
+    parser.add_argument('--historial', default='data/historical_draws.json')
+    parser.add_argument('--estrategia', action='append',
+                        help="Definición de grupos a evaluar (repetible; por defecto, todas).")
+    parser.add_argument('--desde', type=_fecha, help="Primera fecha a evaluar (AAAA-MM-DD).")
+    parser.add_argument('--hasta', type=_fecha, help="Última fecha a evaluar (AAAA-MM-DD).")
+    parser.add_argument('--modelo', help="Modelo de puntuación (por defecto, el de la configuración).")
+    parser.add_argument('--formato', choices=FORMATOS_SALIDA, default='csv')
+    parser.add_argument('--salida', help="Archivo de salida (por defecto outputs/backtesting_report.<formato>).")
+    parser.add_argument('--tamano-bloque', type=int, default=10000, help="Filas por bloque escrito.")
+    parser.add_argument('--cache', default=DIRECTORIO_POR_DEFECTO,
+                        help="Directorio de la caché de resultados que llena la app (solo se lee).")
+    parser.add_argument('--sin-cache', action='store_true',
+                        help="No consultar la caché de resultados.")
+    parser.add_argument('--instrumentar', metavar='RUTA',
+                        help="Activa la instrumentación por etapas y guarda el resumen (.json o .prom).")
+    parser.add_argument('--perfil', metavar='RUTA', help="Perfila la ejecución y guarda el perfil en RUTA.")
+    parser.add_argument('--modo-perfil', choices=['cprofile', 'muestreo'], default='cprofile')
+    args = parser.parse_args(argumentos)
+
+    config = cargar_json(args.config)
+    if not config:
+        print("Error al cargar la configuración. Abortando.")
+        return 2
+    if args.modelo:
+        config = {**config, 'modelo_puntuacion': args.modelo}
+    try:
+        parametros_modelo(config)
+        almacen = cargar_historial(args.historial)
+        definiciones = compilar_definiciones(config)
+    except (FileNotFoundError, ValueError) as error:
+        print(f"Error al cargar los datos: {error}")
+        return 2
+
+    estrategias = args.estrategia or list(definiciones)
+    desconocidas = [nombre for nombre in estrategias if nombre not in definiciones]
+    if desconocidas:
+        print(f"Estrategias desconocidas: {', '.join(desconocidas)}. Disponibles: {', '.join(definiciones)}")
+        return 2
+    if args.desde and args.hasta and args.desde > args.hasta:
+        print("--desde debe ser anterior o igual a --hasta.")
+        return 2
+
+    salida = args.salida or f"outputs/backtesting_report.{args.formato}"
+    print("--- Iniciando Backtesting de Estrategia Rotativa ---")
+    if args.instrumentar:
+        instrumentacion.activar()
+    with instrumentacion.perfilar(args.perfil, modo=args.modo_perfil):
+        cache = None if args.sin_cache else CacheResultados(args.cache)
+        resultados = chain.from_iterable(
+            resultados_de_estrategia(config, almacen, nombre, definiciones[nombre], args.desde, args.hasta, cache)
+            for nombre in estrategias
+        )
+        try:
+            total = escribir_resultados_por_bloques(resultados, salida, args.formato, args.tamano_bloque,
+                                                    columnas=['estrategia'] + COLUMNAS_RESULTADO)
+        except ImportError as error:
+            print(f"Error: {error}")
+            return 2
+    if args.instrumentar:
+        instrumentacion.exportar(args.instrumentar)
+        print(f"Resumen de etapas guardado en: {args.instrumentar}")
+
+    if total:
+        print(f"{total} resultados guardados en: {salida}")
     else:
         print("No se generaron resultados para analizar.")
-        
     print("--- Backtesting Finalizado ---")
+    return 0
+
 
 if __name__ == "__main__":
-    ejecutar_backtesting()
\ No newline at end of file
+    sys.exit(main())
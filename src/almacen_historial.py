@@ -0,0 +1,421 @@
+"""
+Almacén columnar del historial de sorteos.
+
+`historical_draws.json` sigue siendo el formato de importación, pero se
+convierte una sola vez a un directorio binario con una columna por campo:
+
+    meta.json        franjas, número de filas y huella del JSON de origen
+    fecha.i32        ordinal de cada fecha (int32, little-endian)
+    franja_<k>.i16   número sorteado en la franja k (int16, SIN_DATO si falta;
+                     un número fuera de rango se rechaza con ValueError)
+
+Las columnas se abren con memory-map, así que el arranque no depende del
+largo del historial. Los sorteos nuevos se añaden al final de cada columna
+sin reescribir los archivos; `meta.json` (que se reemplaza de forma atómica)
+indica cuántas filas son válidas.
+
+Una reconstrucción se escribe en un directorio nuevo con nombre único
+(`<almacén>.<sufijo>`) y `<almacén>` es un enlace simbólico a la versión
+vigente, que se cambia de una vez con `os.replace`: los procesos que leen (la
+app, `main.py`, el servicio en vivo) nunca ven el almacén a medio escribir ni
+ausente, y dos reconstrucciones simultáneas no comparten archivos.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import date
+
+import numpy as np
+
+SIN_DATO = -1
+VERSION_FORMATO = 1
+TIPO_FECHA = np.dtype('<i4')
+TIPO_NUMERO = np.dtype('<i2')
+RANGO_NUMERO = (int(np.iinfo(TIPO_NUMERO).min), int(np.iinfo(TIPO_NUMERO).max))
+
+
+def _ruta_columna(directorio, indice_franja=None):
+    nombre = 'fecha.i32' if indice_franja is None else f'franja_{indice_franja}.i16'
+    return os.path.join(directorio, nombre)
+
+
+def _escribir_json_atomico(ruta, contenido):
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(contenido, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+
+
+def _publicar_version(version, directorio):
+    """Hace que `directorio` apunte a `version` (un directorio hermano) y borra la versión anterior."""
+    anterior = os.path.realpath(directorio) if os.path.islink(directorio) else None
+    if os.path.isdir(directorio) and not os.path.islink(directorio):
+        # Almacén sin enlace (formato anterior): se aparta con un renombre y se borra al final
+        anterior = version + '.anterior'
+        os.rename(directorio, anterior)
+
+    enlace = version + '.enlace'
+    try:
+        os.symlink(os.path.basename(version), enlace, target_is_directory=True)
+        os.replace(enlace, directorio)
+    except (OSError, NotImplementedError):
+        # Sin enlaces simbólicos (p. ej. Windows sin permisos): renombre directo, con un instante sin almacén
+        if os.path.lexists(enlace):
+            os.remove(enlace)
+        if os.path.islink(directorio):
+            os.remove(directorio)
+        shutil.rmtree(directorio, ignore_errors=True)
+        os.rename(version, directorio)
+    if anterior and anterior != os.path.realpath(version):
+        shutil.rmtree(anterior, ignore_errors=True)
+
+
+def eliminar_almacen(directorio):
+    """Borra el almacén de `directorio` (el enlace y la versión a la que apunta)."""
+    if os.path.islink(directorio):
+        version = os.path.realpath(directorio)
+        os.remove(directorio)
+        shutil.rmtree(version, ignore_errors=True)
+    else:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def huella_archivo(ruta):
+    """sha256, tamaño y fecha de modificación de `ruta`."""
+    sha = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            sha.update(bloque)
+    estado = os.stat(ruta)
+    return {'sha256': sha.hexdigest(), 'tamano': estado.st_size, 'mtime_ns': estado.st_mtime_ns}
+
+
+def filas_desde_json(historial_sorteos):
+    """Convierte el dict del JSON en una lista ordenada de (ordinal, {franja: número}), ignorando fechas inválidas."""
+    filas = []
+    for fecha_str, franjas in (historial_sorteos or {}).items():
+        try:
+            filas.append((date.fromisoformat(fecha_str).toordinal(), dict(franjas)))
+        except (ValueError, TypeError):
+            continue
+    filas.sort(key=lambda fila: fila[0])
+    return filas
+
+
+def _numero_o_sin_dato(valor):
+    # Los valores no enteros (3.5) no pertenecen a ningún grupo: SIN_DATO, igual que en `codificar_historial`
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+        return SIN_DATO
+    if isinstance(valor, float) and not valor.is_integer():
+        return SIN_DATO
+    return int(valor)
+
+
+def _columna_de_numeros(filas, franja):
+    """Columna TIPO_NUMERO de `franja`; ValueError si algún número no cabe (en lugar de desbordarse)."""
+    minimo, maximo = RANGO_NUMERO
+    numeros = []
+    for ordinal, valores in filas:
+        numero = _numero_o_sin_dato(valores.get(franja))
+        if not minimo <= numero <= maximo:
+            raise ValueError(
+                f"El número {numero} de {franja} del {date.fromordinal(ordinal)} está fuera del rango "
+                f"que admite el almacén ({minimo} a {maximo})."
+            )
+        numeros.append(numero)
+    return np.array(numeros, dtype=TIPO_NUMERO)
+
+
+class AlmacenHistorial:
+    """Historial columnar abierto con memory-map. Usa `cargar_historial` para obtenerlo sincronizado con el JSON."""
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        self.meta = None
+        self.ordinales = np.zeros(0, dtype=TIPO_FECHA)
+        self.columnas = []
+
+    @property
+    def ruta_meta(self):
+        return os.path.join(self.directorio, 'meta.json')
+
+    @property
+    def franjas(self):
+        return list(self.meta['franjas']) if self.meta else []
+
+    def __len__(self):
+        return len(self.ordinales)
+
+    def existe(self):
+        return os.path.exists(self.ruta_meta)
+
+    # --- Lectura ---
+    def abrir(self):
+        # Meta y columnas se leen de la misma versión aunque otro proceso publique una nueva mientras tanto
+        version = os.path.realpath(self.directorio)
+        with open(os.path.join(version, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != VERSION_FORMATO:
+            raise ValueError(f"Formato de almacén no soportado en {self.directorio}")
+
+        filas = self.meta['filas']
+        self.ordinales = self._mapear(_ruta_columna(version), TIPO_FECHA, filas)
+        self.columnas = [
+            self._mapear(_ruta_columna(version, k), TIPO_NUMERO, filas)
+            for k in range(len(self.meta['franjas']))
+        ]
+        return self
+
+    @staticmethod
+    def _mapear(ruta, tipo, filas):
+        if filas == 0:
+            return np.zeros(0, dtype=tipo)
+        return np.memmap(ruta, dtype=tipo, mode='r', shape=(filas,))
+
+    def matriz(self, franjas=None):
+        """Matriz int64 (días x franjas) con SIN_DATO donde falta el valor o la franja."""
+        franjas = self.franjas if franjas is None else franjas
+        matriz = np.full((len(self), len(franjas)), SIN_DATO, dtype=np.int64)
+        for j, franja in enumerate(franjas):
+            if franja in self.meta['franjas']:
+                matriz[:, j] = self.columnas[self.meta['franjas'].index(franja)]
+        return matriz
+
+    def codificado(self, franjas=None):
+        """(fechas, ordinales, matriz) con el mismo formato que `codificar_historial`."""
+        ordinales = np.asarray(self.ordinales, dtype=np.int64)
+        fechas = [date.fromordinal(int(o)) for o in ordinales]
+        return fechas, ordinales, self.matriz(franjas)
+
+    def iterar_filas(self, franjas=None, tamano_bloque=4096, inicio=0):
+        """
+        Genera (fecha, {franja: número}) en orden desde la fila `inicio`,
+        leyendo las columnas por bloques para no materializar el historial.
+        Los valores faltantes se devuelven como NaN, igual que en `a_dataframe`.
+        """
+        franjas = self.franjas if franjas is None else franjas
+        presentes = [(franja, self.columnas[self.meta['franjas'].index(franja)])
+                     for franja in franjas if franja in self.meta['franjas']]
+        for bloque in range(inicio, len(self), tamano_bloque):
+            fin = min(bloque + tamano_bloque, len(self))
+            ordinales = np.asarray(self.ordinales[bloque:fin]).tolist()
+            valores = [(franja, np.asarray(columna[bloque:fin]).tolist()) for franja, columna in presentes]
+            for i, ordinal in enumerate(ordinales):
+                yield date.fromordinal(ordinal), {
+                    franja: (float('nan') if columna[i] == SIN_DATO else columna[i]) for franja, columna in valores
+                }
+
+    def fila_desde_fecha(self, fecha):
+        """Índice de la primera fila con fecha >= `fecha`."""
+        return int(np.searchsorted(np.asarray(self.ordinales), fecha.toordinal(), side='left'))
+
+    def a_dataframe(self):
+        """DataFrame con el mismo formato que `historial_a_dataframe`."""
+        import pandas as pd
+
+        if len(self) == 0:
+            return pd.DataFrame(columns=['fecha'])
+        return self._dataframe(0, len(self), [(columna == SIN_DATO).any() for columna in self.columnas])
+
+    def bloques_dataframe(self, tamano_bloque=65536):
+        """
+        Genera `a_dataframe()` en trozos consecutivos de `tamano_bloque` filas,
+        con los mismos tipos por columna (float solo si a la columna le falta
+        algún valor en todo el historial).
+        """
+        con_faltantes = [
+            any((columna[inicio:inicio + tamano_bloque] == SIN_DATO).any() for inicio in range(0, len(self), tamano_bloque))
+            for columna in self.columnas
+        ]
+        for inicio in range(0, len(self), tamano_bloque):
+            yield self._dataframe(inicio, min(inicio + tamano_bloque, len(self)), con_faltantes)
+
+    def _dataframe(self, inicio, fin, con_faltantes):
+        import pandas as pd
+
+        fechas = (pd.Timestamp('1970-01-01') + pd.to_timedelta(
+            np.asarray(self.ordinales[inicio:fin], dtype=np.int64) - date(1970, 1, 1).toordinal(), unit='D'
+        ))
+        datos = {'fecha': np.array(fechas.date, dtype=object)}
+        for franja, columna, faltan in zip(self.meta['franjas'], self.columnas, con_faltantes):
+            valores = np.asarray(columna[inicio:fin], dtype=np.int64)
+            datos[franja] = np.where(valores == SIN_DATO, np.nan, valores) if faltan else valores
+        return pd.DataFrame(datos)
+
+    # --- Escritura ---
+    def construir(self, filas, franjas, origen=None):
+        """Escribe el almacén desde cero con `filas` [(ordinal, {franja: número})] ordenadas."""
+        padre = os.path.dirname(os.path.abspath(self.directorio))
+        os.makedirs(padre, exist_ok=True)
+        temporal = tempfile.mkdtemp(prefix=os.path.basename(self.directorio) + '.', dir=padre)
+
+        ordinales = np.array([ordinal for ordinal, _ in filas], dtype=TIPO_FECHA)
+        ordinales.tofile(_ruta_columna(temporal))
+        try:
+            for k, franja in enumerate(franjas):
+                _columna_de_numeros(filas, franja).tofile(_ruta_columna(temporal, k))
+        except ValueError:
+            shutil.rmtree(temporal, ignore_errors=True)
+            raise
+        _escribir_json_atomico(os.path.join(temporal, 'meta.json'), {
+            'version': VERSION_FORMATO, 'franjas': list(franjas), 'filas': len(filas), 'origen': origen,
+        })
+
+        try:
+            _publicar_version(temporal, self.directorio)
+        except BaseException:
+            shutil.rmtree(temporal, ignore_errors=True)
+            raise
+        return self.abrir()
+
+    def agregar(self, filas, origen=None):
+        """Añade `filas` [(ordinal, {franja: número})] al final de cada columna sin reescribirlas."""
+        if not filas:
+            return self
+        ultimo = int(self.ordinales[-1]) if len(self) else None
+        for ordinal, _ in filas:
+            if ultimo is not None and ordinal <= ultimo:
+                raise ValueError(f"Solo se pueden añadir fechas posteriores a {date.fromordinal(ultimo)}")
+            ultimo = ordinal
+
+        # Se validan todas las columnas antes de escribir ninguna
+        columnas = [_columna_de_numeros(filas, franja) for franja in self.meta['franjas']]
+        filas_validas = self.meta['filas']
+        self._agregar_a_columna(_ruta_columna(self.directorio), TIPO_FECHA, filas_validas,
+                                [ordinal for ordinal, _ in filas])
+        for k, columna in enumerate(columnas):
+            self._agregar_a_columna(_ruta_columna(self.directorio, k), TIPO_NUMERO, filas_validas, columna)
+
+        self.meta['filas'] = filas_validas + len(filas)
+        if origen is not None:
+            self.meta['origen'] = origen
+        _escribir_json_atomico(self.ruta_meta, self.meta)
+        return self.abrir()
+
+    @staticmethod
+    def _agregar_a_columna(ruta, tipo, filas_validas, valores):
+        with open(ruta, 'r+b' if os.path.exists(ruta) else 'w+b') as f:
+            # Descarta bytes de una escritura interrumpida que meta.json no llegó a registrar
+            f.truncate(filas_validas * tipo.itemsize)
+            f.seek(0, os.SEEK_END)
+            f.write(np.array(valores, dtype=tipo).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def registrar_origen(self, origen):
+        self.meta['origen'] = origen
+        _escribir_json_atomico(self.ruta_meta, self.meta)
+
+
+def _es_prefijo(almacen, filas, franjas):
+    if almacen.franjas != list(franjas) or len(filas) < len(almacen):
+        return False
+    n = len(almacen)
+    if not np.array_equal(np.asarray(almacen.ordinales), np.array([o for o, _ in filas[:n]], dtype=np.int64)):
+        return False
+    for k, franja in enumerate(franjas):
+        esperado = np.array([_numero_o_sin_dato(v.get(franja)) for _, v in filas[:n]], dtype=np.int64)
+        if not np.array_equal(np.asarray(almacen.columnas[k], dtype=np.int64), esperado):
+            return False
+    return True
+
+
+def directorio_por_defecto(ruta_json):
+    base, _ = os.path.splitext(ruta_json)
+    return base + '.columnar'
+
+
+def cargar_historial(ruta_json='data/historical_draws.json', directorio=None, franjas=None):
+    """
+    Devuelve el AlmacenHistorial sincronizado con `ruta_json`.
+
+    - Si el JSON no cambió (mismo tamaño y fecha de modificación, o mismo
+      sha256), se abre el almacén directamente sin leer el JSON.
+    - Si el JSON solo creció al final, se añaden las fechas nuevas.
+    - En cualquier otro caso (ediciones, franjas distintas) se reconstruye.
+    """
+    from .utils import cargar_json
+
+    directorio = directorio or directorio_por_defecto(ruta_json)
+    almacen = AlmacenHistorial(directorio)
+    if almacen.existe():
+        try:
+            almacen.abrir()
+        except (ValueError, KeyError, OSError, json.JSONDecodeError):
+            almacen.meta = None
+
+    origen_actual = almacen.meta.get('origen') if almacen.meta else None
+    if not os.path.exists(ruta_json):
+        if almacen.meta is not None:
+            return almacen
+        raise FileNotFoundError(ruta_json)
+
+    estado = os.stat(ruta_json)
+    if origen_actual and (origen_actual.get('tamano'), origen_actual.get('mtime_ns')) == (estado.st_size, estado.st_mtime_ns):
+        return almacen
+
+    origen = huella_archivo(ruta_json)
+    if origen_actual and origen_actual.get('sha256') == origen['sha256']:
+        almacen.registrar_origen(origen)
+        return almacen
+
+    filas = filas_desde_json(cargar_json(ruta_json))
+    if franjas is None:
+        franjas = []
+        for _, valores in filas:
+            for franja in valores:
+                if franja not in franjas:
+                    franjas.append(franja)
+
+    if almacen.meta is not None and _es_prefijo(almacen, filas, franjas):
+        return almacen.agregar(filas[len(almacen):], origen=origen)
+    return almacen.construir(filas, franjas, origen=origen)
+
+
+def _sincronizado(almacen, ruta_json):
+    """True si la huella de origen del almacén corresponde al contenido actual de `ruta_json`."""
+    origen = (almacen.meta or {}).get('origen')
+    if not os.path.exists(ruta_json):
+        return origen is None
+    if not origen:
+        return False
+    estado = os.stat(ruta_json)
+    if (origen.get('tamano'), origen.get('mtime_ns')) == (estado.st_size, estado.st_mtime_ns):
+        return True
+    return origen.get('sha256') == huella_archivo(ruta_json)['sha256']
+
+
+def agregar_sorteos(ruta_json, filas, almacen=None):
+    """
+    Añade `filas` [(ordinal, {franja: número})] posteriores a la última fecha
+    tanto a `ruta_json` (reescrito de forma atómica) como al almacén, que queda
+    sincronizado con el JSON sin reimportarlo. Si el JSON cambió desde que se
+    cargó `almacen`, primero se lo reconcilia con `cargar_historial`.
+    Devuelve el almacén.
+    """
+    from .utils import cargar_json
+
+    if almacen is None or not _sincronizado(almacen, ruta_json):
+        almacen = cargar_historial(ruta_json, almacen.directorio if almacen else None,
+                                   almacen.franjas if almacen and almacen.meta else None)
+    if not filas:
+        return almacen
+
+    historial_sorteos = (cargar_json(ruta_json) if os.path.exists(ruta_json) else None) or {}
+    ultimo = int(almacen.ordinales[-1]) if len(almacen) else None
+    if ultimo is not None and filas[0][0] <= ultimo:
+        if all(historial_sorteos.get(date.fromordinal(ordinal).isoformat()) == dict(valores)
+               for ordinal, valores in filas):
+            return almacen  # Reintento de un guardado que ya llegó al JSON
+        raise ValueError(f"Solo se pueden añadir fechas posteriores a {date.fromordinal(ultimo)}")
+    for franja in almacen.franjas:
+        _columna_de_numeros(filas, franja)  # Un número fuera de rango no llega ni al JSON
+
+    for ordinal, valores in filas:
+        historial_sorteos[date.fromordinal(ordinal).isoformat()] = dict(valores)
+    _escribir_json_atomico(ruta_json, historial_sorteos)
+    return almacen.agregar(filas, origen=huella_archivo(ruta_json))
@@ -0,0 +1,141 @@
+import copy
+from datetime import timedelta
+
+import pandas as pd
+
+from .intelligence_analyzer import (
+    MODELO_POR_DEFECTO, VentanaDeslizante, construir_ventana, nombre_modelo, parametros_puntuacion,
+)
+from .evaluator import evaluar_dia_completo
+from .grupos import compilar_grupos
+from .resultados_compactos import desde_filas
+from . import instrumentacion
+from .instrumentacion import instrumentar
+
+DIAS_MINIMOS_HISTORIAL = 30
+
+def preparar_historial(historial_completo_df):
+    """Historial ordenado por fecha, sin fechas repetidas y con índice 0..n-1."""
+    return historial_completo_df.sort_values(by='fecha').drop_duplicates(subset='fecha').reset_index(drop=True)
+
+
+def iterar_resultados(filas, ventana, config, grupos_activos, desde=0, fecha_desde=None, fecha_hasta=None):
+    """
+    Generador del backtesting: recibe `filas` (fecha, {franja: número}) en
+    orden cronológico, cuya primera fila es la número `desde` del historial, y
+    produce un dict de resultado por franja evaluada.
+
+    Las fechas anteriores a `fecha_desde` alimentan la ventana pero no se
+    emiten; el recorrido se detiene después de `fecha_hasta`. Solo guarda el
+    estado de la ventana, así que la memoria no crece con el historial.
+    """
+    for i, (fecha_actual, resultados_reales) in enumerate(filas, start=desde):
+        if fecha_hasta is not None and fecha_actual > fecha_hasta:
+            break
+
+        if i >= DIAS_MINIMOS_HISTORIAL and (fecha_desde is None or fecha_actual >= fecha_desde):
+            predicciones = ventana.predecir(fecha_actual)
+            resultado_dia = evaluar_dia_completo(predicciones, resultados_reales, config, grupos_activos)
+
+            for detalle_franja in resultado_dia['detalle_franjas']:
+                yield {'fecha': fecha_actual, **detalle_franja}
+
+        ventana.agregar_dia(fecha_actual, resultados_reales)
+
+
+@instrumentar('backtesting.recorrer')
+def _recorrer(historial, desde, ventana, config, grupos_activos):
+    """Evalúa las filas `desde`.. del historial preparado, avanzando `ventana`; devuelve las filas de resultado."""
+    instrumentacion.registrar_filas('backtesting.recorrer', len(historial) - desde)
+    filas = ((fila.pop('fecha'), fila) for fila in historial.iloc[desde:].to_dict('records'))
+    resultados_totales = list(iterar_resultados(filas, ventana, config, grupos_activos, desde=desde))
+
+    franjas = [franja for franja in ventana.franjas if franja in historial.columns]
+    with instrumentacion.medir('backtesting.construir_dataframe', filas=len(resultados_totales)):
+        return desde_filas(resultados_totales, franjas, grupos_activos, config.get('premio_por_acierto', 5))
+
+
+def ejecutar_backtesting(config, historial_completo_df, grupos_activos):
+    """
+    Backtesting día a día con una ventana deslizante.
+
+    Para cada fecha (a partir de la número 31) se predice con la ventana de los
+    días anteriores, se evalúa contra el resultado real y luego se incorpora ese
+    día a la ventana. Cada fecha se recorre una sola vez.
+    """
+    franjas = config.get("franjas", ["Morning", "Matinee", "Afternoon", "Evening", "LateNight"])
+    grupos_activos = compilar_grupos(grupos_activos, config)
+    historial = preparar_historial(historial_completo_df)
+
+    if len(historial) < DIAS_MINIMOS_HISTORIAL + 1:
+        return pd.DataFrame()
+    if nombre_modelo(config) != MODELO_POR_DEFECTO:
+        # La ventana incremental implementa solo la regla original; los demás modelos puntúan por lotes
+        from .backtesting_vectorizado import ejecutar_backtesting_vectorizado
+        return ejecutar_backtesting_vectorizado(config, historial, grupos_activos)
+
+    ventana = VentanaDeslizante(franjas, grupos_activos, **parametros_puntuacion(config))
+    return _recorrer(historial, 0, ventana, config, grupos_activos)
+
+
+def huella_prefijo(historial, filas):
+    """Huella de las primeras `filas` del historial preparado."""
+    from .cache_resultados import huella_dataframe
+    return huella_dataframe(historial.iloc[:filas])
+
+
+def crear_punto_control(historial, ventana, resultados):
+    """Estado necesario para continuar el backtesting cuando el historial crezca al final."""
+    return {
+        'filas': len(historial),
+        'huella': huella_prefijo(historial, len(historial)),
+        'ventana': ventana,
+        'resultados': resultados,
+    }
+
+
+def ventana_al_final(config, historial, grupos_activos):
+    """VentanaDeslizante en el mismo estado en que la deja un backtesting completo de `historial`."""
+    franjas = config.get("franjas", ["Morning", "Matinee", "Afternoon", "Evening", "LateNight"])
+    if historial.empty:
+        return VentanaDeslizante(franjas, grupos_activos, **parametros_puntuacion(config))
+    # Solo los últimos días pueden entrar en la ventana de una fecha posterior
+    siguiente_fecha = historial['fecha'].iloc[-1] + timedelta(days=1)
+    return construir_ventana(historial, siguiente_fecha, franjas, grupos_activos, **parametros_puntuacion(config))
+
+
+def es_reanudable(historial, punto_control):
+    """True si `punto_control` cubre un prefijo intacto del historial preparado."""
+    return (
+        punto_control is not None
+        and punto_control['filas'] <= len(historial)
+        and huella_prefijo(historial, punto_control['filas']) == punto_control['huella']
+    )
+
+
+def ejecutar_backtesting_incremental(config, historial_completo_df, grupos_activos, punto_control=None):
+    """
+    Backtesting que continúa desde `punto_control` si el historial solo creció al final.
+
+    Devuelve (resultados, nuevo_punto_control). Si no hay punto de control, o
+    las filas que cubre ya no coinciden con el historial (se editó el pasado),
+    se recalcula todo desde el principio.
+    """
+    franjas = config.get("franjas", ["Morning", "Matinee", "Afternoon", "Evening", "LateNight"])
+    grupos_activos = compilar_grupos(grupos_activos, config)
+    historial = preparar_historial(historial_completo_df)
+
+    if es_reanudable(historial, punto_control):
+        desde = punto_control['filas']
+        ventana = copy.deepcopy(punto_control['ventana'])
+        previos = punto_control['resultados']
+    else:
+        desde = 0
+        ventana = VentanaDeslizante(franjas, grupos_activos, **parametros_puntuacion(config))
+        previos = pd.DataFrame()
+
+    nuevos = _recorrer(historial, desde, ventana, config, grupos_activos)
+    partes = [parte for parte in (previos, nuevos) if not parte.empty]
+    resultados = pd.concat(partes, ignore_index=True) if len(partes) > 1 else (partes[0] if partes else pd.DataFrame())
+
+    return resultados, crear_punto_control(historial, ventana, resultados)
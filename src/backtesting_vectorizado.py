@@ -0,0 +1,204 @@
+import numpy as np
+import pandas as pd
+
+from .intelligence_analyzer import DIAS_VENTANA, MODELO_POR_DEFECTO, PESO_FRECUENCIA, PESO_RECENCIA
+from .backtesting import DIAS_MINIMOS_HISTORIAL
+from .grupos import SIN_GRUPO, compilar_grupos
+from .modelos_puntuacion import parametros_modelo
+from .resultados_compactos import a_monto, construir_resultados
+from . import instrumentacion
+from .instrumentacion import instrumentar
+
+SIN_DATO = SIN_GRUPO
+
+@instrumentar('backtesting_vectorizado.codificar')
+def codificar_historial(historial_completo_df, franjas):
+    """
+    Convierte el historial a arrays de NumPy.
+
+    Devuelve (fechas, ordinales, matriz): las fechas ordenadas y sin duplicados,
+    su ordinal (días) y una matriz int (días x franjas) con el número sorteado,
+    o SIN_DATO cuando falta el valor o no es un entero.
+    """
+    historial = historial_completo_df.sort_values(by='fecha').drop_duplicates(subset='fecha')
+    fechas = list(historial['fecha'])
+    ordinales = np.fromiter((fecha.toordinal() for fecha in fechas), dtype=np.int64, count=len(fechas))
+
+    matriz = np.full((len(fechas), len(franjas)), SIN_DATO, dtype=np.int64)
+    for j, franja in enumerate(franjas):
+        columna = pd.to_numeric(historial[franja], errors='coerce').to_numpy(dtype=float)
+        # Los valores no enteros (3.5) no pertenecen a ningún grupo: SIN_DATO, igual que en `grupo_de_numero`
+        validos = np.isfinite(columna) & (columna == np.floor(columna))
+        matriz[validos, j] = columna[validos].astype(np.int64)
+    instrumentacion.registrar_filas('backtesting_vectorizado.codificar', len(fechas))
+    return fechas, ordinales, matriz
+
+
+def indices_de_grupo(definicion, matriz):
+    """Traduce la matriz de números a índices de grupo con una sola indexación (SIN_DATO si no pertenece)."""
+    tabla = np.asarray(definicion.indice_por_numero, dtype=np.int64)
+    validos = (matriz >= 0) & (matriz < len(tabla))
+    return np.where(validos, tabla[np.where(validos, matriz, 0)], SIN_DATO)
+
+
+def estadisticas_de_ventana(ordinales, categorias_por_dia, n_categorias, dias_ventana=DIAS_VENTANA):
+    """
+    Recuento de la ventana de cada fecha, por franja y categoría (grupo o número).
+
+    `categorias_por_dia` es (días x franjas) con el índice de categoría sorteado
+    o SIN_DATO. Devuelve (frecuencia, ultima_posicion, posiciones): la
+    frecuencia de cada categoría en la ventana [t - dias_ventana, t - 1] de
+    cada fecha, la última posición del calendario <= t - 1 en que salió (o -1)
+    y la posición de cada fecha en el calendario denso.
+    """
+    n_dias, n_franjas = categorias_por_dia.shape
+
+    # Calendario denso: posición t = ordinal - primer ordinal
+    posiciones = ordinales - ordinales[0]
+    largo = int(posiciones[-1]) + 1
+
+    aciertos = np.zeros((largo, n_franjas, n_categorias), dtype=np.int64)
+    dias, franjas = np.nonzero(categorias_por_dia != SIN_DATO)
+    aciertos[posiciones[dias], franjas, categorias_por_dia[dias, franjas]] = 1
+
+    # acumulado[k] = aciertos en el calendario antes de la posición k
+    acumulado = np.zeros((largo + 1, n_franjas, n_categorias), dtype=np.int64)
+    np.cumsum(aciertos, axis=0, out=acumulado[1:])
+
+    # ultimo[k] = última posición <= k con acierto, o -1
+    marcas = np.where(aciertos > 0, np.arange(largo)[:, None, None], -1)
+    ultimo = np.maximum.accumulate(marcas, axis=0)
+
+    inicio = np.maximum(posiciones - dias_ventana, 0)
+    frecuencia = acumulado[posiciones] - acumulado[inicio]
+    ultima_posicion = ultimo[np.maximum(posiciones - 1, 0)]
+    return frecuencia, ultima_posicion, posiciones
+
+
+def puntuacion_ventana(frecuencia, ultima_posicion, posiciones, dias_ventana=DIAS_VENTANA,
+                       peso_frecuencia=PESO_FRECUENCIA, peso_recencia=PESO_RECENCIA):
+    """Puntuación frecuencia/recencia de cada grupo por fecha y franja."""
+    recencia = np.where(frecuencia > 0, dias_ventana - ((posiciones - 1)[:, None, None] - ultima_posicion), 0)
+    return (frecuencia * peso_frecuencia) + (recencia * peso_recencia)
+
+
+def puntuar_ventana(frecuencia, ultima_posicion, posiciones, dias_ventana=DIAS_VENTANA,
+                    peso_frecuencia=PESO_FRECUENCIA, peso_recencia=PESO_RECENCIA):
+    """Índice del grupo con mayor puntuación (el primero en caso de empate) por fecha y franja."""
+    puntuacion = puntuacion_ventana(frecuencia, ultima_posicion, posiciones, dias_ventana, peso_frecuencia, peso_recencia)
+    return np.argmax(puntuacion, axis=2)
+
+
+@instrumentar('backtesting_vectorizado.predecir')
+def calcular_predicciones(ordinales, grupos_por_dia, n_grupos, modelo=MODELO_POR_DEFECTO, **parametros):
+    """
+    Predice el índice de grupo de cada día y franja con el modelo de
+    puntuación `modelo` (por defecto, la misma regla que VentanaDeslizante),
+    puntuando todas las fechas en un solo lote.
+
+    `grupos_por_dia` es (días x franjas) con el índice de grupo acertado o SIN_DATO.
+    Devuelve una matriz (días x franjas) con el índice de grupo predicho para
+    cada fecha usando solo los días anteriores.
+    """
+    from .modelos_puntuacion import puntuar_lote
+
+    n_dias, n_franjas = grupos_por_dia.shape
+    if n_dias == 0:
+        return np.zeros((0, n_franjas), dtype=np.int64)
+    return np.argmax(puntuar_lote(ordinales, grupos_por_dia, n_grupos, modelo, **parametros), axis=2)
+
+
+def evaluar_codificado(ordinales, matriz, definicion, premio_por_acierto, **parametros):
+    """
+    Predice y evalúa el historial codificado a partir de la fecha número 31.
+
+    Devuelve (grupos_por_dia, predichos, acierto, ganancia); salvo
+    `grupos_por_dia`, las matrices cubren solo las fechas evaluadas.
+    """
+    grupos_por_dia = indices_de_grupo(definicion, matriz)
+    predichos = calcular_predicciones(ordinales, grupos_por_dia, len(definicion), **parametros)
+
+    # Como los grupos no se solapan, acertar equivale a que el número real sea del grupo predicho
+    predichos = predichos[DIAS_MINIMOS_HISTORIAL:]
+    acierto = grupos_por_dia[DIAS_MINIMOS_HISTORIAL:] == predichos
+    ganancia = acierto * premio_por_acierto - np.asarray(definicion.costos)[predichos]
+    return grupos_por_dia, predichos, acierto, ganancia
+
+
+def resumir_codificado(ordinales, matriz, definicion, premio_por_acierto, **parametros):
+    """Balance neto, aciertos y jugadas del backtesting sin construir el DataFrame de detalle."""
+    if len(ordinales) < DIAS_MINIMOS_HISTORIAL + 1:
+        return {'balance_neto': 0, 'aciertos': 0, 'jugadas': 0, 'tasa_acierto': 0.0}
+    _, _, acierto, ganancia = evaluar_codificado(ordinales, matriz, definicion, premio_por_acierto, **parametros)
+    jugadas = int(acierto.size)
+    aciertos = int(acierto.sum())
+    return {
+        'balance_neto': a_monto(ganancia.sum()),
+        'aciertos': aciertos,
+        'jugadas': jugadas,
+        'tasa_acierto': aciertos / jugadas * 100 if jugadas else 0.0,
+    }
+
+
+def ejecutar_backtesting_vectorizado(config, historial_completo_df, grupos_activos):
+    """
+    Backtesting completo con operaciones de arrays sobre fechas x franjas x grupos.
+
+    Devuelve el mismo DataFrame que `ejecutar_backtesting`.
+    """
+    franjas = config.get("franjas", ["Morning", "Matinee", "Afternoon", "Evening", "LateNight"])
+    franjas = [franja for franja in franjas if franja in historial_completo_df.columns]
+    premio_por_acierto = config.get('premio_por_acierto', 5)
+
+    fechas, ordinales, matriz = codificar_historial(historial_completo_df, franjas)
+    if len(fechas) < DIAS_MINIMOS_HISTORIAL + 1:
+        return pd.DataFrame()
+
+    definicion = compilar_grupos(grupos_activos, config)
+    _, predichos, acierto, ganancia = evaluar_codificado(
+        ordinales, matriz, definicion, premio_por_acierto, **parametros_modelo(config)
+    )
+    instrumentacion.registrar_filas('backtesting_vectorizado.predecir', len(fechas))
+    return detalle_codificado(fechas, franjas, matriz, definicion, predichos, acierto, ganancia, premio_por_acierto)
+
+
+def detalle_codificado(fechas, franjas, matriz, definicion, predichos, acierto, ganancia, premio_por_acierto=5):
+    """DataFrame de detalle (una fila por fecha evaluada y franja) en el formato compacto de `ejecutar_backtesting`."""
+    n_dias, n_franjas = predichos.shape
+    numero_real = matriz[DIAS_MINIMOS_HISTORIAL:].ravel()
+
+    with instrumentacion.medir('backtesting_vectorizado.construir_dataframe', filas=numero_real.size):
+        return construir_resultados(
+            np.repeat(np.array(fechas[DIAS_MINIMOS_HISTORIAL:], dtype=object), n_franjas), franjas, definicion,
+            np.tile(np.arange(n_franjas), n_dias), predichos.ravel(), numero_real,
+            acierto.ravel(), ganancia.ravel(), premio_por_acierto,
+        )
+
+
+def predecir_fechas(config, historial_completo_df, grupos_activos, fechas_prediccion):
+    """
+    {fecha: {franja: grupo}} para cada fecha de `fechas_prediccion` con el
+    modelo de `config`, puntuando todas en un solo lote. Cada fecha usa solo
+    los días anteriores del historial.
+    """
+    franjas = config.get("franjas", ["Morning", "Matinee", "Afternoon", "Evening", "LateNight"])
+    presentes = [franja for franja in franjas if franja in historial_completo_df.columns]
+    definicion = compilar_grupos(grupos_activos, config)
+    fechas, ordinales, matriz = codificar_historial(historial_completo_df, presentes)
+
+    # Las fechas sin sorteo se agregan como días vacíos: no cambian la puntuación de ninguna otra
+    conocidas = set(fechas)
+    nuevas = sorted({fecha for fecha in fechas_prediccion if fecha not in conocidas})
+    fechas = fechas + nuevas
+    ordinales = np.concatenate([ordinales, np.array([fecha.toordinal() for fecha in nuevas], dtype=np.int64)])
+    matriz = np.vstack([matriz, np.full((len(nuevas), len(presentes)), SIN_DATO, dtype=np.int64)])
+    orden = np.argsort(ordinales, kind='stable')
+
+    predichos = calcular_predicciones(ordinales[orden], indices_de_grupo(definicion, matriz[orden]), len(definicion),
+                                      **parametros_modelo(config))
+    fila_de = {fechas[indice]: fila for fila, indice in enumerate(orden)}
+    return {
+        fecha: {franja: definicion.nombres[predichos[fila_de[fecha], presentes.index(franja)]]
+                if franja in presentes else definicion.nombres[0] for franja in franjas}
+        for fecha in fechas_prediccion
+    }
@@ -0,0 +1,256 @@
+"""
+Barrido de parámetros de la estrategia.
+
+Evalúa combinaciones de longitud de ventana, pesos de frecuencia/recencia y
+definición de grupos con el motor vectorizado, repartidas en un pool de
+procesos. El historial codificado se publica una sola vez en memoria
+compartida y cada proceso lo lee sin copiarlo. Cada combinación terminada se
+añade a un archivo de checkpoint (JSON Lines) para poder reanudar el barrido.
+
+Uso:
+    python -m src.barrido --procesos 8 --checkpoint outputs/barrido.jsonl
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .backtesting_vectorizado import codificar_historial, resumir_codificado
+from .grupos import compilar_definiciones
+from .intelligence_analyzer import DIAS_VENTANA, PESO_FRECUENCIA, PESO_RECENCIA
+from .almacen_historial import cargar_historial
+from .utils import cargar_json
+
+ESPACIO_POR_DEFECTO = {
+    'dias_ventana': [15, 20, 25, DIAS_VENTANA, 45, 60],
+    'peso_frecuencia': [0.5, 0.6, PESO_FRECUENCIA, 0.8, 0.9],
+    'peso_recencia': [0.1, 0.2, PESO_RECENCIA, 0.4, 0.5],
+}
+
+COLUMNAS_TABLA = [
+    'estrategia', 'dias_ventana', 'peso_frecuencia', 'peso_recencia',
+    'balance_neto', 'tasa_acierto', 'aciertos', 'jugadas',
+]
+
+# Estado de cada proceso trabajador (se rellena en _inicializar_trabajador)
+_TRABAJADOR = {}
+
+
+def generar_combinaciones(estrategias, espacio=None, modo='grid', muestras=None, semilla=0):
+    """
+    Devuelve la lista de combinaciones a evaluar.
+
+    `modo='grid'` recorre el producto completo de `espacio` x `estrategias`;
+    `modo='aleatorio'` toma `muestras` combinaciones distintas de ese producto
+    con la `semilla` dada (mismo resultado en cada ejecución).
+    """
+    espacio = espacio or ESPACIO_POR_DEFECTO
+    combinaciones = [
+        {'estrategia': estrategia, 'dias_ventana': dias, 'peso_frecuencia': frecuencia, 'peso_recencia': recencia}
+        for estrategia, dias, frecuencia, recencia in itertools.product(
+            estrategias, espacio['dias_ventana'], espacio['peso_frecuencia'], espacio['peso_recencia']
+        )
+    ]
+    if modo == 'aleatorio':
+        muestras = min(muestras or len(combinaciones), len(combinaciones))
+        combinaciones = random.Random(semilla).sample(combinaciones, muestras)
+    elif modo != 'grid':
+        raise ValueError(f"Modo de barrido desconocido: {modo!r} (usa 'grid' o 'aleatorio').")
+    return combinaciones
+
+
+def clave_combinacion(combinacion):
+    return json.dumps(combinacion, sort_keys=True, ensure_ascii=False)
+
+
+def huella_historial(ordinales, matriz, config=None):
+    """
+    Hash del historial codificado y de la parte de `config` que cambia los
+    resultados fuera de cada combinación (números y costos de los grupos,
+    premio y franjas), como en `cache_resultados.clave_backtesting`. Un
+    checkpoint solo se reutiliza si coinciden ambos.
+    """
+    huella = hashlib.sha256()
+    huella.update(np.ascontiguousarray(ordinales, dtype=np.int64).tobytes())
+    huella.update(np.ascontiguousarray(matriz, dtype=np.int64).tobytes())
+    if config is not None:
+        contenido = {
+            'grupos': {
+                nombre: [[grupo, list(numeros), costo] for grupo, numeros, costo in
+                         zip(definicion.nombres, definicion.numeros, definicion.costos)]
+                for nombre, definicion in compilar_definiciones(config).items()
+            },
+            'costo_por_numero': config.get('costo_por_numero', 1),
+            'premio_por_acierto': config.get('premio_por_acierto', 5),
+            'franjas': config.get('franjas'),
+        }
+        huella.update(json.dumps(contenido, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    return huella.hexdigest()
+
+
+def _publicar(array):
+    memoria = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=memoria.buf)[...] = array
+    return memoria, (memoria.name, array.shape, array.dtype.str)
+
+
+def _adjuntar(descriptor):
+    nombre, forma, tipo = descriptor
+    # track=False: el proceso principal es el único dueño del bloque (Python >= 3.13)
+    try:
+        memoria = shared_memory.SharedMemory(name=nombre, track=False)
+    except TypeError:
+        memoria = shared_memory.SharedMemory(name=nombre)
+    return memoria, np.ndarray(forma, dtype=np.dtype(tipo), buffer=memoria.buf)
+
+
+def _inicializar_trabajador(descriptor_ordinales, descriptor_matriz, config):
+    memoria_ordinales, ordinales = _adjuntar(descriptor_ordinales)
+    memoria_matriz, matriz = _adjuntar(descriptor_matriz)
+    _TRABAJADOR.update(
+        memorias=(memoria_ordinales, memoria_matriz),
+        ordinales=ordinales,
+        matriz=matriz,
+        definiciones=compilar_definiciones(config),
+        premio_por_acierto=config.get('premio_por_acierto', 5),
+    )
+
+
+def _evaluar_lote(combinaciones):
+    resultados = []
+    for combinacion in combinaciones:
+        parametros = {clave: valor for clave, valor in combinacion.items() if clave != 'estrategia'}
+        resumen = resumir_codificado(
+            _TRABAJADOR['ordinales'], _TRABAJADOR['matriz'],
+            _TRABAJADOR['definiciones'][combinacion['estrategia']],
+            _TRABAJADOR['premio_por_acierto'], **parametros
+        )
+        resultados.append({**combinacion, **resumen})
+    return resultados
+
+
+def _leer_checkpoint(ruta_checkpoint, huella):
+    completados = {}
+    if not ruta_checkpoint or not os.path.exists(ruta_checkpoint):
+        return completados
+    with open(ruta_checkpoint, 'r', encoding='utf-8') as f:
+        for linea in f:
+            try:
+                registro = json.loads(linea)
+            except json.JSONDecodeError:
+                continue  # Línea incompleta de una ejecución interrumpida
+            if registro.get('huella') != huella:
+                continue
+            resultado = registro['resultado']
+            completados[clave_combinacion({k: resultado[k] for k in COLUMNAS_TABLA[:4]})] = resultado
+    return completados
+
+
+def ejecutar_barrido(config, historial_completo_df, combinaciones, procesos=None,
+                     ruta_checkpoint=None, tamano_lote=16):
+    """
+    Evalúa `combinaciones` en paralelo y devuelve la tabla de posiciones
+    (DataFrame ordenado por balance neto y tasa de acierto).
+
+    Las combinaciones ya presentes en `ruta_checkpoint` para el mismo historial
+    no se recalculan.
+    """
+    import pandas as pd
+
+    franjas = [franja for franja in config.get("franjas", []) if franja in historial_completo_df.columns]
+    _, ordinales, matriz = codificar_historial(historial_completo_df, franjas)
+    huella = huella_historial(ordinales, matriz, config)
+
+    completados = _leer_checkpoint(ruta_checkpoint, huella)
+    pendientes = [c for c in combinaciones if clave_combinacion(c) not in completados]
+    resultados = [completados[clave_combinacion(c)] for c in combinaciones if clave_combinacion(c) in completados]
+
+    if pendientes:
+        if ruta_checkpoint:
+            os.makedirs(os.path.dirname(ruta_checkpoint) or '.', exist_ok=True)
+        archivo = open(ruta_checkpoint, 'a', encoding='utf-8') if ruta_checkpoint else None
+
+        memoria_ordinales, descriptor_ordinales = _publicar(ordinales)
+        memoria_matriz, descriptor_matriz = _publicar(matriz)
+        try:
+            lotes = [pendientes[i:i + tamano_lote] for i in range(0, len(pendientes), tamano_lote)]
+            with ProcessPoolExecutor(
+                max_workers=procesos or os.cpu_count(),
+                initializer=_inicializar_trabajador,
+                initargs=(descriptor_ordinales, descriptor_matriz, config),
+            ) as pool:
+                futuros = [pool.submit(_evaluar_lote, lote) for lote in lotes]
+                for futuro in as_completed(futuros):
+                    for resultado in futuro.result():
+                        resultados.append(resultado)
+                        if archivo:
+                            archivo.write(json.dumps({'huella': huella, 'resultado': resultado}, ensure_ascii=False) + "\n")
+                    if archivo:
+                        archivo.flush()
+        finally:
+            if archivo:
+                archivo.close()
+            for memoria in (memoria_ordinales, memoria_matriz):
+                memoria.close()
+                memoria.unlink()
+
+    tabla = pd.DataFrame(resultados, columns=COLUMNAS_TABLA)
+    tabla = tabla.sort_values(by=['balance_neto', 'tasa_acierto'], ascending=False, kind='stable')
+    return tabla.reset_index(drop=True)
+
+
+def _lista(tipo):
+    return lambda texto: [tipo(valor) for valor in texto.split(',') if valor.strip()]
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Barrido de parámetros de la estrategia rotativa.")
+    parser.add_argument('--config', default='data/strategy_configuration.json')
+    parser.add_argument('--historial', default='data/historical_draws.json')
+    parser.add_argument('--modo', choices=['grid', 'aleatorio'], default='grid')
+    parser.add_argument('--muestras', type=int, default=None, help="Combinaciones a probar en modo aleatorio.")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--estrategias', type=lambda t: [v for v in t.split('|') if v],
+                        help="Nombres de group_definitions separados por '|' (por defecto, todas).")
+    parser.add_argument('--dias-ventana', type=_lista(int), default=ESPACIO_POR_DEFECTO['dias_ventana'])
+    parser.add_argument('--peso-frecuencia', type=_lista(float), default=ESPACIO_POR_DEFECTO['peso_frecuencia'])
+    parser.add_argument('--peso-recencia', type=_lista(float), default=ESPACIO_POR_DEFECTO['peso_recencia'])
+    parser.add_argument('--procesos', type=int, default=None)
+    parser.add_argument('--checkpoint', default='outputs/barrido_checkpoint.jsonl')
+    parser.add_argument('--salida', default='outputs/barrido_tabla.csv')
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args(argumentos)
+
+    config = cargar_json(args.config)
+    if not config or not os.path.exists(args.historial):
+        print("Error al cargar archivos de configuración o datos. Abortando.")
+        return 1
+
+    estrategias = args.estrategias or list(config.get('group_definitions', {}).keys())
+    espacio = {
+        'dias_ventana': args.dias_ventana,
+        'peso_frecuencia': args.peso_frecuencia,
+        'peso_recencia': args.peso_recencia,
+    }
+    combinaciones = generar_combinaciones(estrategias, espacio, args.modo, args.muestras, args.semilla)
+    print(f"--- Barrido de {len(combinaciones)} combinaciones ---")
+
+    tabla = ejecutar_barrido(
+        config, cargar_historial(args.historial).a_dataframe(), combinaciones,
+        procesos=args.procesos, ruta_checkpoint=args.checkpoint,
+    )
+    os.makedirs(os.path.dirname(args.salida) or '.', exist_ok=True)
+    tabla.to_csv(args.salida, index=False, encoding='utf-8')
+    print(tabla.head(args.top).to_string(index=False))
+    print(f"Tabla de posiciones guardada en: {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,188 @@
+"""
+Caché persistente de resultados de backtesting.
+
+Cada resultado se guarda en disco bajo el hash de todo lo que lo determina:
+la definición de grupos activa, el modelo y los parámetros de puntuación, costo/premio,
+las franjas y el contenido del historial. Así, volver a una estrategia ya
+calculada o reiniciar el servidor devuelve el resultado sin recalcularlo, y
+cualquier cambio en los datos o en la configuración produce otra clave (nunca
+se sirve un resultado obsoleto).
+
+El tamaño total está acotado: al superarlo se eliminan las entradas usadas
+hace más tiempo (LRU según la fecha de último acceso de cada archivo).
+"""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+from .grupos import compilar_grupos
+from .intelligence_analyzer import MODELO_POR_DEFECTO, nombre_modelo
+
+# Cambiar cuando cambie la lógica del backtesting para invalidar las entradas antiguas
+VERSION_RESULTADOS = 2
+DIRECTORIO_POR_DEFECTO = 'outputs/.cache_backtesting'
+TAMANO_MAXIMO_MB = 256
+EXTENSION = '.pkl'
+
+
+def huella_dataframe(historial_completo_df):
+    """Hash del contenido del historial (columnas y valores, en orden)."""
+    import pandas as pd
+
+    huella = hashlib.sha256()
+    huella.update(json.dumps([str(columna) for columna in historial_completo_df.columns]).encode('utf-8'))
+    huella.update(pd.util.hash_pandas_object(historial_completo_df, index=False).to_numpy().tobytes())
+    return huella.hexdigest()
+
+
+def huella_almacen(almacen, tamano_bloque=65536):
+    """Igual que `huella_dataframe(almacen.a_dataframe())`, leyendo el almacén por bloques."""
+    import pandas as pd
+
+    huella = hashlib.sha256()
+    columnas = ['fecha', *almacen.franjas] if len(almacen) else ['fecha']
+    huella.update(json.dumps(columnas).encode('utf-8'))
+    for bloque in almacen.bloques_dataframe(tamano_bloque):
+        huella.update(pd.util.hash_pandas_object(bloque, index=False).to_numpy().tobytes())
+    return huella.hexdigest()
+
+
+def clave_backtesting(config, grupos_activos, huella_historial):
+    """
+    Clave de caché para el backtesting de `grupos_activos` con `config` sobre un
+    historial. Con `huella_historial=None` identifica el punto de control de la
+    estrategia, que vale para cualquier historial que extienda al ya procesado.
+    """
+    from .modelos_puntuacion import parametros_modelo
+
+    definicion = compilar_grupos(grupos_activos, config)
+    contenido = {
+        'version': VERSION_RESULTADOS,
+        'grupos': [[nombre, list(numeros)] for nombre, numeros in zip(definicion.nombres, definicion.numeros)],
+        'parametros_puntuacion': parametros_modelo(config),
+        'costo_por_numero': config.get('costo_por_numero', 1),
+        'premio_por_acierto': config.get('premio_por_acierto', 5),
+        'franjas': config.get('franjas'),
+        'historial': huella_historial,
+        'tipo': 'resultado' if huella_historial is not None else 'punto_control',
+    }
+    return hashlib.sha256(json.dumps(contenido, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class CacheResultados:
+    """Caché en disco, direccionada por contenido y con desalojo LRU por tamaño."""
+
+    def __init__(self, directorio=DIRECTORIO_POR_DEFECTO, tamano_maximo_mb=TAMANO_MAXIMO_MB):
+        self.directorio = directorio
+        self.tamano_maximo = int(tamano_maximo_mb * 1024 * 1024)
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, clave + EXTENSION)
+
+    def obtener(self, clave):
+        """Devuelve el objeto guardado bajo `clave`, o None si no existe."""
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, 'rb') as f:
+                valor = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Entrada corrupta o de una versión incompatible: se descarta
+            self._eliminar(ruta)
+            return None
+        try:
+            os.utime(ruta)  # Marca de último acceso para el LRU
+        except OSError:
+            pass
+        return valor
+
+    def guardar(self, clave, valor):
+        os.makedirs(self.directorio, exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as f:
+                pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporal, self._ruta(clave))
+        except BaseException:
+            self._eliminar(temporal)
+            raise
+        self.desalojar()
+
+    def desalojar(self):
+        """Elimina las entradas menos usadas hasta quedar por debajo del tamaño máximo."""
+        entradas = []
+        for nombre in os.listdir(self.directorio):
+            if not nombre.endswith(EXTENSION):
+                continue
+            ruta = os.path.join(self.directorio, nombre)
+            try:
+                estado = os.stat(ruta)
+            except FileNotFoundError:
+                continue
+            entradas.append((estado.st_mtime_ns, estado.st_size, ruta))
+
+        total = sum(tamano for _, tamano, _ in entradas)
+        for _, tamano, ruta in sorted(entradas):
+            if total <= self.tamano_maximo:
+                break
+            self._eliminar(ruta)
+            total -= tamano
+
+    def limpiar(self):
+        if os.path.isdir(self.directorio):
+            for nombre in os.listdir(self.directorio):
+                self._eliminar(os.path.join(self.directorio, nombre))
+
+    @staticmethod
+    def _eliminar(ruta):
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+
+
+def backtesting_con_cache(config, historial_completo_df, grupos_activos, cache=None, motor=None):
+    """
+    Ejecuta el backtesting de `grupos_activos` pasando por la caché en disco.
+
+    - Si el mismo historial ya se procesó, devuelve el resultado guardado.
+    - Si el historial solo creció al final desde el último punto de control,
+      evalúa únicamente las fechas nuevas y las une a los resultados previos.
+    - En otro caso recalcula todo con `motor` (por defecto el vectorizado, que
+      da el mismo resultado que `ejecutar_backtesting`).
+    """
+    from .backtesting import (
+        crear_punto_control, es_reanudable, ejecutar_backtesting_incremental,
+        preparar_historial, ventana_al_final,
+    )
+    if motor is None:
+        from .backtesting_vectorizado import ejecutar_backtesting_vectorizado as motor
+
+    cache = cache or CacheResultados()
+    historial = preparar_historial(historial_completo_df)
+    clave = clave_backtesting(config, grupos_activos, huella_dataframe(historial))
+    resultado = cache.obtener(clave)
+    if resultado is not None:
+        return resultado
+
+    grupos_activos = compilar_grupos(grupos_activos, config)
+    if nombre_modelo(config) != MODELO_POR_DEFECTO:
+        # Los puntos de control guardan la ventana incremental, que solo existe para la regla original
+        resultado = motor(config, historial, grupos_activos)
+        cache.guardar(clave, resultado)
+        return resultado
+
+    clave_control = clave_backtesting(config, grupos_activos, None)
+    punto_control = cache.obtener(clave_control)
+    if es_reanudable(historial, punto_control):
+        resultado, punto_control = ejecutar_backtesting_incremental(config, historial, grupos_activos, punto_control)
+    else:
+        resultado = motor(config, historial, grupos_activos)
+        punto_control = crear_punto_control(historial, ventana_al_final(config, historial, grupos_activos), resultado)
+
+    cache.guardar(clave, resultado)
+    cache.guardar(clave_control, punto_control)
+    return resultado
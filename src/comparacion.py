@@ -0,0 +1,108 @@
+"""
+Comparación de todas las definiciones de grupos en una sola pasada.
+
+La ventana de cada fecha se cuenta una vez por franja y por número sorteado
+(frecuencia y última aparición). Para cada estrategia solo cambia el paso
+final: la frecuencia de un grupo es la suma de la de sus números y su última
+aparición es la más reciente de ellas, y con eso se puntúa igual que
+`VentanaDeslizante`. Comparar N estrategias cuesta casi lo mismo que un
+backtesting. Con otro modelo de puntuación (src/modelos_puntuacion.py) cada
+estrategia se puntúa por lotes sobre el mismo historial codificado.
+"""
+import numpy as np
+import pandas as pd
+
+from . import instrumentacion
+from .backtesting import DIAS_MINIMOS_HISTORIAL
+from .backtesting_vectorizado import (
+    SIN_DATO, codificar_historial, detalle_codificado, estadisticas_de_ventana, evaluar_codificado, indices_de_grupo,
+    puntuar_ventana,
+)
+from .grupos import compilar_definiciones, compilar_grupos
+from .instrumentacion import instrumentar
+from .intelligence_analyzer import MODELO_POR_DEFECTO
+from .modelos_puntuacion import parametros_modelo
+from .resultados_compactos import a_monto
+
+COLUMNAS_RESUMEN = ['estrategia', 'balance_neto', 'aciertos', 'jugadas', 'tasa_acierto']
+
+
+def _predecir_estrategia(definicion, frecuencia_numeros, ultima_numeros, posiciones, **parametros):
+    """Agrega las estadísticas por número a los grupos de `definicion` y predice."""
+    n_numeros = frecuencia_numeros.shape[2]
+    pertenencia = np.zeros((n_numeros, len(definicion)), dtype=np.int64)
+    for indice, numeros in enumerate(definicion.numeros):
+        pertenencia[list(numeros), indice] = 1
+
+    frecuencia = frecuencia_numeros @ pertenencia
+    ultima_posicion = np.stack(
+        [ultima_numeros[:, :, list(numeros)].max(axis=2) for numeros in definicion.numeros], axis=2
+    )
+    return puntuar_ventana(frecuencia, ultima_posicion, posiciones, **parametros)
+
+
+@instrumentar('comparacion.comparar')
+def comparar_estrategias(config, historial_completo_df, definiciones=None, incluir_detalle=True):
+    """
+    Backtesting de todas las `definiciones` (por defecto, las de `config`) en una pasada.
+
+    Devuelve (resumen, detalles): un DataFrame con una fila por estrategia
+    (balance neto, aciertos, jugadas y tasa de acierto) y un dict
+    {estrategia: DataFrame} con el mismo formato que `ejecutar_backtesting`
+    (vacío si `incluir_detalle` es False).
+    """
+    franjas = config.get("franjas", ["Morning", "Matinee", "Afternoon", "Evening", "LateNight"])
+    franjas = [franja for franja in franjas if franja in historial_completo_df.columns]
+    premio_por_acierto = config.get('premio_por_acierto', 5)
+    parametros = parametros_modelo(config)
+    modelo = parametros.pop('modelo')
+
+    if definiciones is None:
+        definiciones = compilar_definiciones(config)
+    else:
+        definiciones = {nombre: compilar_grupos(grupos, config, nombre) for nombre, grupos in definiciones.items()}
+
+    fechas, ordinales, matriz = codificar_historial(historial_completo_df, franjas)
+    if len(fechas) < DIAS_MINIMOS_HISTORIAL + 1 or not definiciones:
+        return pd.DataFrame(columns=COLUMNAS_RESUMEN), {}
+
+    if modelo == MODELO_POR_DEFECTO:
+        # Ventana compartida: recuento por número, solo para las fechas evaluadas
+        n_numeros = max(len(definicion.indice_por_numero) for definicion in definiciones.values())
+        numeros_por_dia = np.where((matriz >= 0) & (matriz < n_numeros), matriz, SIN_DATO)
+        with instrumentacion.medir('comparacion.ventana_compartida', filas=len(fechas)):
+            frecuencia, ultima, posiciones = estadisticas_de_ventana(
+                ordinales, numeros_por_dia, n_numeros, parametros['dias_ventana']
+            )
+        frecuencia = frecuencia[DIAS_MINIMOS_HISTORIAL:]
+        ultima = ultima[DIAS_MINIMOS_HISTORIAL:]
+        posiciones = posiciones[DIAS_MINIMOS_HISTORIAL:]
+
+    filas_resumen = []
+    detalles = {}
+    for nombre, definicion in definiciones.items():
+        with instrumentacion.medir('comparacion.estrategia'):
+            if modelo == MODELO_POR_DEFECTO:
+                predichos = _predecir_estrategia(definicion, frecuencia, ultima, posiciones, **parametros)
+                acierto = indices_de_grupo(definicion, matriz)[DIAS_MINIMOS_HISTORIAL:] == predichos
+                ganancia = acierto * premio_por_acierto - np.asarray(definicion.costos)[predichos]
+            else:
+                # Los demás modelos no se descomponen por número: se puntúa cada definición por lotes
+                _, predichos, acierto, ganancia = evaluar_codificado(
+                    ordinales, matriz, definicion, premio_por_acierto, modelo=modelo, **parametros
+                )
+
+        jugadas = int(acierto.size)
+        aciertos = int(acierto.sum())
+        filas_resumen.append({
+            'estrategia': nombre,
+            'balance_neto': a_monto(ganancia.sum()),
+            'aciertos': aciertos,
+            'jugadas': jugadas,
+            'tasa_acierto': aciertos / jugadas * 100 if jugadas else 0.0,
+        })
+        if incluir_detalle:
+            detalles[nombre] = detalle_codificado(fechas, franjas, matriz, definicion, predichos, acierto, ganancia,
+                                                  premio_por_acierto)
+
+    return pd.DataFrame(filas_resumen, columns=COLUMNAS_RESUMEN), detalles
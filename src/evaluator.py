@@ -1,6 +1,10 @@
+from .grupos import SIN_GRUPO, compilar_grupos
+from .instrumentacion import instrumentar
+
+@instrumentar('evaluador.evaluar_dia')
 def evaluar_dia_completo(predicciones_dia, resultados_reales_dia, config, grupos_activos):
-    # NOTA: Ahora recibe 'grupos_activos'
-    costo_por_numero = config.get('costo_por_numero', 1)
+    # NOTA: Ahora recibe 'grupos_activos' (dict o DefinicionGrupos ya compilada)
+    grupos_activos = compilar_grupos(grupos_activos, config)
     premio_por_acierto = config.get('premio_por_acierto', 5)
     
     resultados_franjas = []
@@ -13,12 +17,12 @@ def evaluar_dia_completo(predicciones_dia, resultados_reales_dia, config, grupos
             continue
 
         numero_real = resultados_reales_dia[franja]
-        numeros_jugados = grupos_activos.get(grupo_predicho, [])
+        indice_grupo = grupos_activos.posicion(grupo_predicho)
         
-        acerto = numero_real in numeros_jugados
+        acerto = grupos_activos.contiene(indice_grupo, numero_real)
         cantidad_aciertos = 1 if acerto else 0
         
-        costo_franja = len(numeros_jugados) * costo_por_numero
+        costo_franja = grupos_activos.costos[indice_grupo] if indice_grupo != SIN_GRUPO else 0
         premio_franja = cantidad_aciertos * premio_por_acierto
         ganancia_franja = premio_franja - costo_franja
         
@@ -26,12 +30,12 @@ def evaluar_dia_completo(predicciones_dia, resultados_reales_dia, config, grupos
         total_premio_dia += premio_franja
         total_costo_dia += costo_franja
 
+        # Los números jugados y la etiqueta del resultado se derivan al mostrar (src/reporter.py)
         resultados_franjas.append({
             "franja": franja,
             "grupo_predicho": grupo_predicho,
-            "numeros_jugados": numeros_jugados,
             "numero_real": numero_real,
-            "resultado": "✅ ACIERTO" if acerto else "❌ FALLO",
+            "acierto": acerto,
             "ganancia_franja": ganancia_franja
         })
 
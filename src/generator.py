@@ -1,18 +1,19 @@
-from .intelligence_analyzer import analyze_franja_and_predict
+from .intelligence_analyzer import MODELO_POR_DEFECTO, construir_ventana, nombre_modelo, parametros_puntuacion
+from .grupos import compilar_grupos
+from .instrumentacion import instrumentar
 
+@instrumentar('generador.predicciones_del_dia')
 def generar_predicciones_del_dia(historial_completo_df, fecha_prediccion, config, grupos_activos):
     # NOTA: Ahora recibe 'grupos_activos'
     franjas = config.get("franjas", ["Morning", "Matinee", "Afternoon", "Evening", "LateNight"])
-    predicciones = {}
+    grupos_activos = compilar_grupos(grupos_activos, config)
+    if nombre_modelo(config) != MODELO_POR_DEFECTO:
+        # Los demás modelos puntúan por lotes (src/modelos_puntuacion.py)
+        from .backtesting_vectorizado import predecir_fechas
+        historial = historial_completo_df[historial_completo_df['fecha'] < fecha_prediccion]
+        return predecir_fechas(config, historial, grupos_activos, [fecha_prediccion])[fecha_prediccion]
 
-    for franja in franjas:
-        grupo_predicho = analyze_franja_and_predict(
-            historial_completo_df,
-            fecha_prediccion,
-            franja,
-            config,
-            grupos_activos # Y se la pasa al cerebro
-        )
-        predicciones[franja] = grupo_predicho
-        
-    return predicciones
\ No newline at end of file
+    # Una sola ventana para todas las franjas: el historial se filtra una vez por fecha
+    ventana = construir_ventana(historial_completo_df, fecha_prediccion, franjas, grupos_activos,
+                                **parametros_puntuacion(config))
+    return ventana.predecir(fecha_prediccion)
\ No newline at end of file
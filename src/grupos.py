@@ -0,0 +1,115 @@
+from array import array
+from collections.abc import Mapping
+
+SIN_GRUPO = -1
+
+class DefinicionGrupos(Mapping):
+    """
+    Definición de grupos compilada e inmutable.
+
+    Se construye una vez por cada entrada de `group_definitions` y guarda una
+    tabla número -> índice de grupo, el tamaño y el costo de cada grupo. Se
+    comporta como el dict original (nombre -> números) para el código que solo
+    necesita leerlo, pero las búsquedas por número son O(1).
+    """
+
+    __slots__ = ('nombre', 'nombres', 'numeros', 'tamanos', 'costos', 'indice_por_numero', '_posiciones')
+
+    def __init__(self, grupos, costo_por_numero=1, rango_numeros=None, nombre=None):
+        self.nombre = nombre
+        self.nombres = tuple(grupos.keys())
+        self.numeros = tuple(tuple(numeros) for numeros in grupos.values())
+        self._validar(rango_numeros)
+
+        self.tamanos = tuple(len(numeros) for numeros in self.numeros)
+        self.costos = tuple(tamano * costo_por_numero for tamano in self.tamanos)
+        self._posiciones = {nombre_grupo: indice for indice, nombre_grupo in enumerate(self.nombres)}
+
+        numero_maximo = max(max(numeros) for numeros in self.numeros)
+        self.indice_por_numero = array('h', [SIN_GRUPO] * (numero_maximo + 1))
+        for indice, numeros in enumerate(self.numeros):
+            for numero in numeros:
+                self.indice_por_numero[numero] = indice
+
+    def _validar(self, rango_numeros):
+        prefijo = f"Definición de grupos '{self.nombre}': " if self.nombre else "Definición de grupos: "
+        if not self.nombres:
+            raise ValueError(prefijo + "no contiene grupos.")
+
+        vistos = {}
+        for nombre_grupo, numeros in zip(self.nombres, self.numeros):
+            if not numeros:
+                raise ValueError(prefijo + f"el grupo '{nombre_grupo}' está vacío.")
+            for numero in numeros:
+                if isinstance(numero, bool) or not isinstance(numero, int) or numero < 0:
+                    raise ValueError(prefijo + f"el grupo '{nombre_grupo}' contiene un valor no válido: {numero!r}.")
+                if rango_numeros is not None and not rango_numeros[0] <= numero <= rango_numeros[1]:
+                    raise ValueError(
+                        prefijo + f"el número {numero} del grupo '{nombre_grupo}' está fuera del rango "
+                        f"{rango_numeros[0]}-{rango_numeros[1]}."
+                    )
+                if numero in vistos:
+                    raise ValueError(
+                        prefijo + f"el número {numero} aparece en los grupos '{vistos[numero]}' y '{nombre_grupo}'."
+                    )
+                vistos[numero] = nombre_grupo
+
+    # --- Interfaz de dict (nombre -> números) ---
+    def __getitem__(self, nombre_grupo):
+        return self.numeros[self._posiciones[nombre_grupo]]
+
+    def __iter__(self):
+        return iter(self.nombres)
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def __repr__(self):
+        return f"DefinicionGrupos({self.como_dict()!r})"
+
+    def como_dict(self):
+        return {nombre_grupo: list(numeros) for nombre_grupo, numeros in zip(self.nombres, self.numeros)}
+
+    # --- Búsquedas O(1) ---
+    def posicion(self, nombre_grupo):
+        """Índice del grupo `nombre_grupo`, o SIN_GRUPO si no existe."""
+        return self._posiciones.get(nombre_grupo, SIN_GRUPO)
+
+    def grupo_de_numero(self, numero):
+        """Índice del grupo que contiene `numero`, o SIN_GRUPO."""
+        if isinstance(numero, float):
+            if not numero.is_integer():
+                return SIN_GRUPO
+            numero = int(numero)
+        try:
+            return self.indice_por_numero[numero] if numero >= 0 else SIN_GRUPO
+        except (IndexError, TypeError):
+            return SIN_GRUPO
+
+    def nombre_de_numero(self, numero):
+        indice = self.grupo_de_numero(numero)
+        return None if indice == SIN_GRUPO else self.nombres[indice]
+
+    def contiene(self, indice_grupo, numero):
+        return indice_grupo != SIN_GRUPO and self.grupo_de_numero(numero) == indice_grupo
+
+
+def compilar_grupos(grupos_activos, config=None, nombre=None):
+    """Compila `grupos_activos` (dict nombre -> números); si ya está compilado lo devuelve tal cual."""
+    if isinstance(grupos_activos, DefinicionGrupos):
+        return grupos_activos
+    config = config or {}
+    return DefinicionGrupos(
+        grupos_activos,
+        costo_por_numero=config.get('costo_por_numero', 1),
+        rango_numeros=config.get('rango_numeros'),
+        nombre=nombre,
+    )
+
+
+def compilar_definiciones(config):
+    """Compila y valida todas las entradas de `group_definitions` de la configuración."""
+    return {
+        nombre: compilar_grupos(grupos, config, nombre=nombre)
+        for nombre, grupos in config.get('group_definitions', {}).items()
+    }
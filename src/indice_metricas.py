@@ -0,0 +1,156 @@
+"""
+Índice de sumas acumuladas sobre los resultados del backtesting.
+
+Se construye una vez por resultado y guarda, por día, el acumulado de
+jugadas, aciertos y ganancia neta: en total, por franja y por grupo predicho.
+Las métricas de cualquier rango de fechas salen de dos búsquedas binarias y
+una resta, sin volver a filtrar el DataFrame. También prepara los resúmenes
+diarios, semanales y mensuales para los gráficos y las posiciones de fila de
+un rango para paginar la tabla de detalle.
+"""
+import numpy as np
+import pandas as pd
+
+from .resultados_compactos import a_monto
+
+DIMENSIONES = ('franja', 'grupo_predicho')
+FRECUENCIAS = {'D': 'D', 'W': 'W-MON', 'M': 'MS'}
+
+
+def _acumular(dias, n_dias, codigos, n_claves, valores):
+    """
+    Matriz (n_dias + 1, n_claves): fila k = suma de `valores` de los días
+    anteriores a k. Enteros si `valores` es entero; float64 si no.
+    """
+    tipo = np.int64 if valores.dtype.kind in 'biu' else np.float64
+    diario = np.bincount(dias * n_claves + codigos, weights=valores, minlength=n_dias * n_claves)
+    acumulado = np.zeros((n_dias + 1, n_claves), dtype=tipo)
+    np.cumsum(diario.reshape(n_dias, n_claves).astype(tipo), axis=0, out=acumulado[1:])
+    return acumulado
+
+
+def _ganancias(columna):
+    # Montos enteros en int64; los fraccionarios conservan sus decimales
+    return columna.to_numpy(dtype=np.int64 if pd.api.types.is_integer_dtype(columna) else np.float64)
+
+
+def _metricas(jugadas, aciertos, ganancia):
+    return {
+        'jugadas': int(jugadas),
+        'aciertos': int(aciertos),
+        'tasa_acierto': float(aciertos / jugadas * 100) if jugadas else 0.0,
+        'balance_neto': a_monto(ganancia),
+    }
+
+
+class IndiceMetricas:
+    """Sumas acumuladas por día de un DataFrame de resultados (total, por franja y por grupo)."""
+
+    def __init__(self, resultados_df):
+        if resultados_df.empty:
+            resultados_df = pd.DataFrame({
+                'fecha': pd.to_datetime([]), 'franja': [], 'grupo_predicho': [], 'acierto': [],
+                'ganancia_franja': np.array([], dtype=np.int64),
+            })
+        self.dias_fila = pd.to_datetime(resultados_df['fecha']).to_numpy().astype('datetime64[D]')
+        if (np.diff(self.dias_fila.view(np.int64)) < 0).any():
+            raise ValueError("Los resultados deben estar ordenados por fecha.")
+
+        self.fechas, dias = np.unique(self.dias_fila, return_inverse=True)
+        valores = (
+            np.ones(len(self.dias_fila), dtype=np.int64),
+            resultados_df['acierto'].to_numpy(dtype=np.int64),
+            _ganancias(resultados_df['ganancia_franja']),
+        )
+
+        # Por dimensión: (jugadas, aciertos, ganancia) acumulados, de forma (días + 1, claves)
+        self.claves = {None: [None]}
+        self._acumulados = {None: tuple(
+            _acumular(dias, len(self.fechas), np.zeros(len(dias), dtype=np.int64), 1, v) for v in valores
+        )}
+        for dimension in DIMENSIONES:
+            codigos, claves = pd.factorize(resultados_df[dimension].astype(object))
+            self.claves[dimension] = list(claves)
+            self._acumulados[dimension] = tuple(
+                _acumular(dias, len(self.fechas), codigos.astype(np.int64), max(len(claves), 1), v) for v in valores
+            )
+        self._series = {}
+
+    def _limites(self, desde, hasta):
+        inicio = int(np.searchsorted(self.fechas, np.datetime64(desde, 'D'), side='left'))
+        fin = int(np.searchsorted(self.fechas, np.datetime64(hasta, 'D'), side='right'))
+        return inicio, max(inicio, fin)
+
+    def metricas(self, desde, hasta, por=None, clave=None):
+        """
+        Jugadas, aciertos, tasa de acierto y balance neto entre `desde` y
+        `hasta` (inclusive). Con `por` ('franja' o 'grupo_predicho') y `clave`
+        se limita a esa franja o grupo.
+        """
+        if clave not in self.claves[por]:
+            return _metricas(0, 0, 0)
+        columna = self.claves[por].index(clave)
+        inicio, fin = self._limites(desde, hasta)
+        jugadas, aciertos, ganancia = (acumulado[fin, columna] - acumulado[inicio, columna]
+                                       for acumulado in self._acumulados[por])
+        return _metricas(jugadas, aciertos, ganancia)
+
+    def metricas_por(self, desde, hasta, por='franja'):
+        """DataFrame con las métricas del rango para cada franja o grupo."""
+        inicio, fin = self._limites(desde, hasta)
+        jugadas, aciertos, ganancia = (acumulado[fin] - acumulado[inicio] for acumulado in self._acumulados[por])
+        filas = [
+            {por: clave, **_metricas(jugadas[k], aciertos[k], ganancia[k])}
+            for k, clave in enumerate(self.claves[por])
+        ]
+        return pd.DataFrame(filas, columns=[por, 'jugadas', 'aciertos', 'tasa_acierto', 'balance_neto'])
+
+    def serie(self, frecuencia='D', por=None):
+        """
+        Resumen por día ('D'), semana ('W', desde el lunes) o mes ('M'):
+        jugadas, aciertos, ganancia del período, tasa de acierto y balance
+        acumulado. Con `por`, una columna de balance acumulado por franja o grupo.
+        """
+        clave_cache = (frecuencia, por)
+        if clave_cache not in self._series:
+            self._series[clave_cache] = self._calcular_serie(frecuencia, por)
+        return self._series[clave_cache]
+
+    def _calcular_serie(self, frecuencia, por):
+        if frecuencia not in FRECUENCIAS:
+            raise ValueError(f"Frecuencia desconocida: {frecuencia!r} (usa 'D', 'W' o 'M').")
+        indice = pd.DatetimeIndex(self.fechas, name='fecha')
+        jugadas, aciertos, ganancia = (np.diff(acumulado, axis=0) for acumulado in self._acumulados[por])
+
+        if por is not None:
+            balance = pd.DataFrame(np.cumsum(ganancia, axis=0), index=indice, columns=self.claves[por])
+            return balance.resample(FRECUENCIAS[frecuencia], label='left', closed='left').last().ffill()
+
+        diario = pd.DataFrame({'jugadas': jugadas[:, 0], 'aciertos': aciertos[:, 0], 'ganancia': ganancia[:, 0]},
+                              index=indice)
+        serie = diario.resample(FRECUENCIAS[frecuencia], label='left', closed='left').sum()
+        serie['tasa_acierto'] = (serie['aciertos'] / serie['jugadas'].where(serie['jugadas'] > 0) * 100).fillna(0.0)
+        serie['balance_acumulado'] = serie['ganancia'].cumsum()
+        return serie
+
+    def filas_en_rango(self, desde, hasta):
+        """(inicio, fin) de las filas del DataFrame de resultados entre `desde` y `hasta`."""
+        inicio = int(np.searchsorted(self.dias_fila, np.datetime64(desde, 'D'), side='left'))
+        fin = int(np.searchsorted(self.dias_fila, np.datetime64(hasta, 'D'), side='right'))
+        return inicio, max(inicio, fin)
+
+    def pagina(self, resultados_df, desde, hasta, numero=1, tamano=100, recientes_primero=True):
+        """
+        Solo las filas de la página `numero` (desde 1) del rango, sin copiar el
+        resto. Devuelve (página, total_de_páginas).
+        """
+        inicio, fin = self.filas_en_rango(desde, hasta)
+        total_paginas = max(1, -(-(fin - inicio) // tamano))
+        numero = min(max(1, numero), total_paginas)
+        if recientes_primero:
+            hasta_fila = fin - (numero - 1) * tamano
+            filas = resultados_df.iloc[max(inicio, hasta_fila - tamano):hasta_fila].iloc[::-1]
+        else:
+            desde_fila = inicio + (numero - 1) * tamano
+            filas = resultados_df.iloc[desde_fila:min(fin, desde_fila + tamano)]
+        return filas.reset_index(drop=True), total_paginas
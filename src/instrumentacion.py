@@ -0,0 +1,265 @@
+"""
+Instrumentación de las etapas calientes del pipeline.
+
+Desactivada por defecto: se activa con la variable de entorno
+`CWP_INSTRUMENTACION=1` o llamando a `activar()` (p. ej. desde un flag de la
+línea de comandos). Mientras está desactivada, `medir` devuelve un contexto
+vacío compartido y `instrumentar` llama directamente a la función, así que el
+costo es una comprobación de un booleano.
+
+Por etapa se guardan llamadas, tiempo acumulado, filas procesadas y una
+muestra acotada de duraciones para los percentiles p50/p99. El resumen se
+exporta como JSON o como texto en formato Prometheus. `perfilar` envuelve una
+ejecución con cProfile o con un perfilador por muestreo y escribe el perfil.
+"""
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+MAX_MUESTRAS = 10000
+
+ACTIVA = os.environ.get('CWP_INSTRUMENTACION', '').strip().lower() not in ('', '0', 'false', 'no')
+
+_etapas = {}
+_candado = threading.Lock()
+
+
+class _Etapa:
+    __slots__ = ('llamadas', 'total', 'filas', 'muestras')
+
+    def __init__(self):
+        self.llamadas = 0
+        self.total = 0.0
+        self.filas = 0
+        self.muestras = deque(maxlen=MAX_MUESTRAS)
+
+
+def activar(valor=True):
+    global ACTIVA
+    ACTIVA = bool(valor)
+
+
+def esta_activa():
+    return ACTIVA
+
+
+def reiniciar():
+    with _candado:
+        _etapas.clear()
+
+
+def registrar(nombre, segundos, filas=0):
+    with _candado:
+        etapa = _etapas.get(nombre)
+        if etapa is None:
+            etapa = _etapas[nombre] = _Etapa()
+        etapa.llamadas += 1
+        etapa.total += segundos
+        etapa.filas += filas
+        etapa.muestras.append(segundos)
+
+
+def registrar_filas(nombre, filas):
+    """Suma `filas` procesadas a la etapa `nombre` sin contar una llamada."""
+    if not ACTIVA:
+        return
+    with _candado:
+        etapa = _etapas.get(nombre)
+        if etapa is None:
+            etapa = _etapas[nombre] = _Etapa()
+        etapa.filas += filas
+
+
+class _Medicion:
+    __slots__ = ('nombre', 'filas', 'inicio')
+
+    def __init__(self, nombre, filas):
+        self.nombre = nombre
+        self.filas = filas
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+        registrar(self.nombre, time.perf_counter() - self.inicio, self.filas)
+        return False
+
+
+class _SinMedicion:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        return False
+
+
+_SIN_MEDICION = _SinMedicion()
+
+
+def medir(nombre, filas=0):
+    """Contexto que mide la etapa `nombre` (no hace nada si la instrumentación está desactivada)."""
+    if not ACTIVA:
+        return _SIN_MEDICION
+    return _Medicion(nombre, filas)
+
+
+def instrumentar(nombre):
+    """Decorador que mide cada llamada a la función como la etapa `nombre`."""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not ACTIVA:
+                return funcion(*args, **kwargs)
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                registrar(nombre, time.perf_counter() - inicio)
+        return envoltura
+    return decorador
+
+
+def _percentil(valores_ordenados, fraccion):
+    if not valores_ordenados:
+        return 0.0
+    posicion = min(len(valores_ordenados) - 1, int(round(fraccion * (len(valores_ordenados) - 1))))
+    return valores_ordenados[posicion]
+
+
+def resumen():
+    """{etapa: {llamadas, total_s, p50_ms, p99_ms, filas}} ordenado por tiempo acumulado."""
+    with _candado:
+        copia = {nombre: (e.llamadas, e.total, e.filas, sorted(e.muestras)) for nombre, e in _etapas.items()}
+    datos = {}
+    for nombre, (llamadas, total, filas, muestras) in sorted(copia.items(), key=lambda item: -item[1][1]):
+        datos[nombre] = {
+            'llamadas': llamadas,
+            'total_s': total,
+            'p50_ms': _percentil(muestras, 0.50) * 1000,
+            'p99_ms': _percentil(muestras, 0.99) * 1000,
+            'filas': filas,
+        }
+    return datos
+
+
+def exportar_json(ruta=None):
+    texto = json.dumps(resumen(), ensure_ascii=False, indent=2)
+    if ruta:
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(texto)
+    return texto
+
+
+def texto_prometheus(prefijo='cwp_etapa'):
+    """Resumen en el formato de exposición de texto de Prometheus (una familia de métricas por bloque)."""
+    datos = resumen()
+
+    def etiqueta(nombre, extra=''):
+        return '{etapa="%s"%s}' % (nombre.replace('\\', '\\\\').replace('"', '\\"'), extra)
+
+    familias = [
+        ('llamadas_total', 'counter', "Llamadas por etapa.",
+         lambda nombre, d: [(etiqueta(nombre), d['llamadas'])]),
+        ('segundos_total', 'counter', "Tiempo acumulado por etapa.",
+         lambda nombre, d: [(etiqueta(nombre), f"{d['total_s']:.9f}")]),
+        ('filas_total', 'counter', "Filas procesadas por etapa.",
+         lambda nombre, d: [(etiqueta(nombre), d['filas'])]),
+        ('segundos', 'summary', "Duración por llamada (muestra acotada).",
+         lambda nombre, d: [(etiqueta(nombre, ',quantile="0.5"'), f"{d['p50_ms'] / 1000:.9f}"),
+                            (etiqueta(nombre, ',quantile="0.99"'), f"{d['p99_ms'] / 1000:.9f}")]),
+    ]
+    lineas = []
+    for sufijo, tipo, ayuda, muestras in familias:
+        metrica = f"{prefijo}_{sufijo}"
+        lineas += [f"# HELP {metrica} {ayuda}", f"# TYPE {metrica} {tipo}"]
+        for nombre, valores in datos.items():
+            lineas += [f"{metrica}{etiquetas} {valor}" for etiquetas, valor in muestras(nombre, valores)]
+    return "\n".join(lineas) + "\n"
+
+
+def exportar(ruta):
+    """Escribe el resumen en `ruta`: formato Prometheus si termina en .prom/.txt, JSON en otro caso."""
+    if ruta.endswith(('.prom', '.txt')):
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(texto_prometheus())
+    else:
+        exportar_json(ruta)
+
+
+class _PerfiladorMuestreo:
+    """Toma la pila del hilo principal cada `intervalo` segundos y cuenta las pilas (formato 'collapsed')."""
+
+    def __init__(self, intervalo=0.005):
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self._detener = threading.Event()
+        self._hilo_objetivo = threading.main_thread().ident
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+
+    def _muestrear(self):
+        while not self._detener.wait(self.intervalo):
+            marco = sys._current_frames().get(self._hilo_objetivo)
+            pila = []
+            while marco is not None:
+                codigo = marco.f_code
+                pila.append(f"{os.path.basename(codigo.co_filename)}:{codigo.co_name}")
+                marco = marco.f_back
+            if pila:
+                self.pilas[';'.join(reversed(pila))] += 1
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def detener(self, ruta):
+        self._detener.set()
+        self._hilo.join()
+        with open(ruta, 'w', encoding='utf-8') as f:
+            for pila, cantidad in self.pilas.most_common():
+                f.write(f"{pila} {cantidad}\n")
+
+
+class perfilar:
+    """
+    Contexto que perfila el bloque y escribe el resultado en `ruta`.
+
+    `modo='cprofile'` guarda estadísticas de cProfile (abrir con `pstats` o
+    snakeviz); `modo='muestreo'` guarda pilas en formato 'collapsed',
+    compatible con flamegraph.pl y speedscope. Con `ruta=None` no hace nada.
+    """
+
+    def __init__(self, ruta, modo='cprofile', intervalo=0.005):
+        if modo not in ('cprofile', 'muestreo'):
+            raise ValueError(f"Modo de perfilado desconocido: {modo!r} (usa 'cprofile' o 'muestreo').")
+        self.ruta = ruta
+        self.modo = modo
+        self.intervalo = intervalo
+        self._perfilador = None
+
+    def __enter__(self):
+        if self.ruta:
+            os.makedirs(os.path.dirname(self.ruta) or '.', exist_ok=True)
+            if self.modo == 'cprofile':
+                self._perfilador = cProfile.Profile()
+                self._perfilador.enable()
+            else:
+                self._perfilador = _PerfiladorMuestreo(self.intervalo)
+                self._perfilador.iniciar()
+        return self
+
+    def __exit__(self, *excepcion):
+        if self._perfilador is None:
+            return False
+        if self.modo == 'cprofile':
+            self._perfilador.disable()
+            self._perfilador.dump_stats(self.ruta)
+        else:
+            self._perfilador.detener(self.ruta)
+        return False
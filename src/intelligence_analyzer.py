@@ -1,47 +1,228 @@
-from datetime import datetime, timedelta
-import pandas as pd
+from collections import deque
+from datetime import timedelta
+
+from .grupos import DefinicionGrupos, SIN_GRUPO, compilar_grupos
+from . import instrumentacion
+from .instrumentacion import instrumentar
+
+DIAS_VENTANA = 30
+PESO_FRECUENCIA = 0.70
+PESO_RECENCIA = 0.30
+# Regla de esta ventana; los demás modelos están en src/modelos_puntuacion.py
+MODELO_POR_DEFECTO = 'frecuencia_recencia'
+# Modelos que se pueden actualizar sorteo a sorteo (`crear_estado_incremental`)
+MODELOS_INCREMENTALES = (MODELO_POR_DEFECTO, 'markov')
+
+def parametros_puntuacion(config):
+    """Parámetros de la regla de puntuación (`parametros_puntuacion` en la configuración) con sus valores por defecto."""
+    parametros = (config or {}).get('parametros_puntuacion', {})
+    return {
+        'dias_ventana': parametros.get('dias_ventana', DIAS_VENTANA),
+        'peso_frecuencia': parametros.get('peso_frecuencia', PESO_FRECUENCIA),
+        'peso_recencia': parametros.get('peso_recencia', PESO_RECENCIA),
+    }
+
+def nombre_modelo(config):
+    """Modelo de puntuación elegido en la configuración (`modelo_puntuacion`)."""
+    return (config or {}).get('modelo_puntuacion') or MODELO_POR_DEFECTO
 
 def get_group_for_number(number, groups_config):
+    if isinstance(groups_config, DefinicionGrupos):
+        return groups_config.nombre_de_numero(number)
     for group_name, numbers in groups_config.items():
         if number in numbers:
             return group_name
     return None
 
-def analyze_franja_and_predict(historial_completo_df, fecha_prediccion, franja_a_predecir, config, grupos_activos):
-    # NOTA: Ahora recibe 'grupos_activos'
-    ventana_fin = fecha_prediccion - timedelta(days=1)
-    ventana_inicio = ventana_fin - timedelta(days=29)
-
-    historial_franja = historial_completo_df[
-        (historial_completo_df['fecha'] >= ventana_inicio) &
-        (historial_completo_df['fecha'] <= ventana_fin)
-    ].copy()
-    
-    if historial_franja.empty:
-        return list(grupos_activos.keys())[0] # Devuelve el primer nombre de grupo (ej. 'A')
-
-    historial_franja['grupo_acertado'] = historial_franja[franja_a_predecir].apply(
-        lambda x: get_group_for_number(x, grupos_activos)
+
+class VentanaDeslizante:
+    """
+    Estado incremental de la ventana de análisis para todas las franjas.
+
+    Se alimenta día a día (en orden cronológico) con `agregar_dia` y mantiene,
+    por franja, la frecuencia de cada grupo dentro de la ventana y la última
+    fecha en la que salió. Los días que quedan fuera de la ventana se descartan
+    al predecir, de modo que cada día entra y sale una sola vez.
+    """
+
+    def __init__(self, franjas, grupos_activos, dias_ventana=DIAS_VENTANA,
+                 peso_frecuencia=PESO_FRECUENCIA, peso_recencia=PESO_RECENCIA):
+        self.franjas = list(franjas)
+        self.grupos_activos = compilar_grupos(grupos_activos)
+        self.nombres_de_grupos = list(self.grupos_activos.nombres)
+        self.dias_ventana = dias_ventana
+        self.peso_frecuencia = peso_frecuencia
+        self.peso_recencia = peso_recencia
+
+        # Cada entrada: (fecha, {franja: indice_de_grupo})
+        self._dias = deque()
+        self._frecuencia = {franja: [0] * len(self.nombres_de_grupos) for franja in self.franjas}
+        self._ultima_fecha = {franja: [None] * len(self.nombres_de_grupos) for franja in self.franjas}
+        self.ultima_fecha_agregada = None
+
+    @instrumentar('analizador.mapear_grupos')
+    def agregar_dia(self, fecha, resultados_dia):
+        """Incorpora los resultados de `fecha` (dict franja -> número) a la ventana."""
+        if self.ultima_fecha_agregada is not None and fecha <= self.ultima_fecha_agregada:
+            raise ValueError(
+                f"Las fechas deben agregarse en orden: {fecha} después de {self.ultima_fecha_agregada}"
+            )
+
+        grupos_del_dia = {}
+        for franja in self.franjas:
+            indice = self.grupos_activos.grupo_de_numero(resultados_dia.get(franja))
+            if indice == SIN_GRUPO:
+                continue
+            grupos_del_dia[franja] = indice
+            self._frecuencia[franja][indice] += 1
+            self._ultima_fecha[franja][indice] = fecha
+
+        self._dias.append((fecha, grupos_del_dia))
+        self.ultima_fecha_agregada = fecha
+
+    def _descartar_antes_de(self, ventana_inicio):
+        while self._dias and self._dias[0][0] < ventana_inicio:
+            _, grupos_del_dia = self._dias.popleft()
+            for franja, indice in grupos_del_dia.items():
+                self._frecuencia[franja][indice] -= 1
+
+    def _ventana_para(self, fecha_prediccion):
+        if self.ultima_fecha_agregada is not None and self.ultima_fecha_agregada >= fecha_prediccion:
+            raise ValueError(
+                f"La ventana ya contiene datos de {self.ultima_fecha_agregada}; no puede predecir {fecha_prediccion}"
+            )
+        ventana_fin = fecha_prediccion - timedelta(days=1)
+        ventana_inicio = ventana_fin - timedelta(days=self.dias_ventana - 1)
+        self._descartar_antes_de(ventana_inicio)
+        return ventana_fin
+
+    def _puntuar_franja(self, franja, ventana_fin):
+        if not self._dias:
+            return self.nombres_de_grupos[0]
+
+        frecuencia = self._frecuencia[franja]
+        ultima_fecha = self._ultima_fecha[franja]
+        puntuacion = {}
+        for indice, grupo in enumerate(self.nombres_de_grupos):
+            # Si el grupo tiene apariciones en la ventana, su última fecha está dentro de ella
+            if frecuencia[indice] > 0:
+                recencia = self.dias_ventana - (ventana_fin - ultima_fecha[indice]).days
+            else:
+                recencia = 0
+            puntuacion[grupo] = (frecuencia[indice] * self.peso_frecuencia) + (recencia * self.peso_recencia)
+
+        return max(puntuacion, key=puntuacion.get)
+
+    @instrumentar('analizador.puntuar')
+    def predecir_franja(self, fecha_prediccion, franja):
+        ventana_fin = self._ventana_para(fecha_prediccion)
+        return self._puntuar_franja(franja, ventana_fin)
+
+    @instrumentar('analizador.puntuar')
+    def predecir(self, fecha_prediccion):
+        """Devuelve {franja: grupo_predicho} para `fecha_prediccion`."""
+        ventana_fin = self._ventana_para(fecha_prediccion)
+        return {franja: self._puntuar_franja(franja, ventana_fin) for franja in self.franjas}
+
+
+class EstadoMarkov:
+    """
+    Cadena de Markov de primer orden por franja, actualizable sorteo a sorteo.
+
+    Guarda, por franja, cuántas veces se pasó de cada grupo a cada otro
+    (grupo de un sorteo -> grupo del siguiente) y el último grupo sorteado.
+    Predice lo mismo que el modelo 'markov' por lotes (src/modelos_puntuacion.py):
+    el grupo con más transiciones desde el último, el primero en caso de empate.
+    No tiene ventana: necesita todo el historial anterior.
+    """
+
+    dias_ventana = None
+
+    def __init__(self, franjas, grupos_activos):
+        self.franjas = list(franjas)
+        self.grupos_activos = compilar_grupos(grupos_activos)
+        self.nombres_de_grupos = list(self.grupos_activos.nombres)
+        n_grupos = len(self.nombres_de_grupos)
+        self._transiciones = {franja: [[0] * n_grupos for _ in range(n_grupos)] for franja in self.franjas}
+        self._ultimo_grupo = {franja: None for franja in self.franjas}
+        self.ultima_fecha_agregada = None
+
+    def agregar_sorteo(self, franja, numero):
+        """Incorpora un sorteo de `franja`; los números fuera de los grupos no cambian el estado."""
+        indice = self.grupos_activos.grupo_de_numero(numero)
+        if indice == SIN_GRUPO:
+            return
+        anterior = self._ultimo_grupo[franja]
+        if anterior is not None:
+            self._transiciones[franja][anterior][indice] += 1
+        self._ultimo_grupo[franja] = indice
+
+    def agregar_dia(self, fecha, resultados_dia):
+        """Incorpora los resultados de `fecha` (dict franja -> número), en orden cronológico."""
+        if self.ultima_fecha_agregada is not None and fecha <= self.ultima_fecha_agregada:
+            raise ValueError(
+                f"Las fechas deben agregarse en orden: {fecha} después de {self.ultima_fecha_agregada}"
+            )
+        for franja in self.franjas:
+            self.agregar_sorteo(franja, resultados_dia.get(franja))
+        self.ultima_fecha_agregada = fecha
+
+    def puntuacion(self, franja):
+        """Transiciones observadas desde el último grupo de `franja` hacia cada grupo (todas 0 sin estado)."""
+        anterior = self._ultimo_grupo[franja]
+        return list(self._transiciones[franja][anterior]) if anterior is not None else [0] * len(self.nombres_de_grupos)
+
+    def predecir_franja(self, fecha_prediccion, franja):
+        if self.ultima_fecha_agregada is not None and self.ultima_fecha_agregada >= fecha_prediccion:
+            raise ValueError(
+                f"El estado ya contiene datos de {self.ultima_fecha_agregada}; no puede predecir {fecha_prediccion}"
+            )
+        puntuacion = self.puntuacion(franja)
+        return self.nombres_de_grupos[puntuacion.index(max(puntuacion))]
+
+    def predecir(self, fecha_prediccion):
+        """Devuelve {franja: grupo_predicho} para `fecha_prediccion`."""
+        return {franja: self.predecir_franja(fecha_prediccion, franja) for franja in self.franjas}
+
+
+def crear_estado_incremental(config, franjas, grupos_activos):
+    """
+    Estado que se actualiza día a día para el modelo de `config`:
+    `VentanaDeslizante` para la regla original, `EstadoMarkov` para 'markov'.
+    Los demás modelos solo se calculan por lotes (ValueError).
+    """
+    modelo = nombre_modelo(config)
+    if modelo == MODELO_POR_DEFECTO:
+        return VentanaDeslizante(franjas, grupos_activos, **parametros_puntuacion(config))
+    if modelo == 'markov':
+        return EstadoMarkov(franjas, grupos_activos)
+    raise ValueError(
+        f"El modelo {modelo!r} solo se calcula por lotes; con estado incremental: "
+        f"{', '.join(MODELOS_INCREMENTALES)}."
     )
 
-    nombres_de_grupos = list(grupos_activos.keys())
-    frecuencia = historial_franja['grupo_acertado'].value_counts().reindex(nombres_de_grupos, fill_value=0)
 
-    recencia = {}
-    for grupo in nombres_de_grupos:
-        ultimas_apariciones = historial_franja[historial_franja['grupo_acertado'] == grupo]
-        if not ultimas_apariciones.empty:
-            ultimo_dia = ultimas_apariciones['fecha'].max()
-            dias_pasados = (ventana_fin - ultimo_dia).days
-            recencia[grupo] = 30 - dias_pasados
-        else:
-            recencia[grupo] = 0
+def construir_ventana(historial_completo_df, fecha_prediccion, franjas, grupos_activos, **parametros):
+    """Crea una VentanaDeslizante con los días del historial que caen en la ventana de `fecha_prediccion`."""
+    ventana = VentanaDeslizante(franjas, grupos_activos, **parametros)
+    ventana_fin = fecha_prediccion - timedelta(days=1)
+    ventana_inicio = ventana_fin - timedelta(days=ventana.dias_ventana - 1)
+
+    with instrumentacion.medir('analizador.filtrar_ventana', filas=len(historial_completo_df)):
+        historial_ventana = historial_completo_df[
+            (historial_completo_df['fecha'] >= ventana_inicio) &
+            (historial_completo_df['fecha'] <= ventana_fin)
+        ].sort_values(by='fecha')
 
-    puntuacion = {}
-    peso_frecuencia = 0.70
-    peso_recencia = 0.30
+    columnas = [franja for franja in ventana.franjas if franja in historial_ventana.columns]
+    for fila in historial_ventana[['fecha'] + columnas].to_dict('records'):
+        ventana.agregar_dia(fila.pop('fecha'), fila)
+    return ventana
 
-    for grupo in nombres_de_grupos:
-        puntuacion[grupo] = (frecuencia.get(grupo, 0) * peso_frecuencia) + (recencia.get(grupo, 0) * peso_recencia)
 
-    return max(puntuacion, key=puntuacion.get)
\ No newline at end of file
+def analyze_franja_and_predict(historial_completo_df, fecha_prediccion, franja_a_predecir, config, grupos_activos):
+    # NOTA: Ahora recibe 'grupos_activos'
+    grupos_activos = compilar_grupos(grupos_activos, config)
+    ventana = construir_ventana(historial_completo_df, fecha_prediccion, [franja_a_predecir], grupos_activos,
+                                **parametros_puntuacion(config))
+    return ventana.predecir_franja(fecha_prediccion, franja_a_predecir)
@@ -1,14 +1,470 @@
-import datetime
-from src.generator import generate_play_for_day
-from src.evaluator import evaluate_jugada
+"""
+Servicio en vivo: recibe los sorteos franja por franja y responde al instante.
 
-def jugar_en_vivo(config, resultado_actual):
-    dia_index = datetime.date.today().day - 1  # Ajuste mensual
-    jugada = generate_play_for_day(dia_index, config)
-    evaluacion = evaluate_jugada(jugada, resultado_actual, config)
+`EstadoEnVivo` mantiene en memoria la ventana deslizante de la estrategia
+activa (o el estado de Markov, con ese modelo) y la predicción del día abierto. Cada resultado recibido se evalúa en
+O(1) contra esa predicción y se anota en un diario (`<historial>.en_vivo.jsonl`,
+junto al JSON de origen, fuera del almacén que se reemplaza al reconstruirse)
+para sobrevivir a un reinicio; cuando el día se completa (o llega
+un sorteo de un día posterior) se guarda en el historial, entra en la ventana y
+se calcula la predicción siguiente (O(franjas x grupos)). Las lecturas
+devuelven instantáneas ya calculadas, sin tocar pandas ni el disco.
 
-    print("🟢 Evaluación Real:")
-    for k, v in evaluacion.items():
-        print(f"{k}: {v}")
+`ServicioEnVivo` lo expone por HTTP local con asyncio:
 
-    return evaluacion
+    POST /sorteo      {"fecha": "2025-07-21", "franja": "Morning", "numero": 7}
+    GET  /prediccion  jugada del día abierto (o del siguiente)
+    GET  /dia         aciertos y ganancia acumulada del día abierto
+    GET  /estado      última fecha guardada y franjas pendientes
+
+Uso:
+    python -m src.live_module --estrategia "Grupos de 5 (A, B, C)" --puerto 8765
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+from datetime import date, timedelta
+
+from .almacen_historial import RANGO_NUMERO, agregar_sorteos, cargar_historial
+from .grupos import SIN_GRUPO, compilar_definiciones
+from .intelligence_analyzer import crear_estado_incremental
+
+ARCHIVO_DIARIO = 'en_vivo.jsonl'
+TAMANO_MAXIMO_CUERPO = 64 * 1024
+
+
+def ruta_diario(ruta_json):
+    """Diario del día abierto, junto a `ruta_json` (p. ej. data/historical_draws.en_vivo.jsonl)."""
+    return os.path.splitext(ruta_json)[0] + '.' + ARCHIVO_DIARIO
+
+
+class SorteoRechazado(ValueError):
+    """El sorteo es válido pero contradice el estado (día ya cerrado o franja ya registrada)."""
+
+
+class EstadoEnVivo:
+    """Ventana, predicción y balance del día abierto de una estrategia. Seguro entre hilos."""
+
+    def __init__(self, config, grupos_activos, ruta_json='data/historical_draws.json', directorio=None):
+        self.config = config
+        self.grupos_activos = grupos_activos
+        self.ruta_json = ruta_json
+        self.franjas = config.get("franjas", ["Morning", "Matinee", "Afternoon", "Evening", "LateNight"])
+        self.premio_por_acierto = config.get('premio_por_acierto', 5)
+        self.rango_numeros = config.get('rango_numeros')
+        self._candado = threading.Lock()
+        self._reproduciendo_diario = False
+
+        self.almacen = cargar_historial(ruta_json, directorio)
+        self.ruta_diario = ruta_diario(ruta_json)
+        diario_anterior = os.path.join(self.almacen.directorio, ARCHIVO_DIARIO)
+        if os.path.exists(diario_anterior) and not os.path.exists(self.ruta_diario):
+            os.replace(diario_anterior, self.ruta_diario)  # Diario de versiones anteriores, dentro del almacén
+        # Ventana deslizante o estado de Markov (ValueError si el modelo solo se calcula por lotes)
+        self.ventana = crear_estado_incremental(config, self.franjas, grupos_activos)
+        self.ultima_fecha = None
+        if len(self.almacen):
+            self.ultima_fecha = date.fromordinal(int(self.almacen.ordinales[-1]))
+            # Con ventana, solo los últimos días pueden entrar en la de una fecha posterior
+            inicio = 0
+            if self.ventana.dias_ventana:
+                inicio = self.almacen.fila_desde_fecha(self.ultima_fecha - timedelta(days=self.ventana.dias_ventana))
+            for fecha, valores in self.almacen.iterar_filas(self.franjas, inicio=inicio):
+                self.ventana.agregar_dia(fecha, valores)
+
+        self._abrir_dia(self._siguiente_fecha())
+        self._recuperar_diario()
+
+    # --- Lecturas (instantáneas ya calculadas) ---
+    def prediccion(self):
+        return self._prediccion
+
+    def dia(self):
+        return self._dia
+
+    def estado(self):
+        return {
+            'ultima_fecha_guardada': self.ultima_fecha.isoformat() if self.ultima_fecha else None,
+            'fecha_abierta': self.fecha_abierta.isoformat(),
+            'franjas_pendientes': [franja for franja in self.franjas if franja not in self._resultados],
+        }
+
+    # --- Escritura ---
+    def registrar(self, fecha, franja, numero):
+        """
+        Registra el `numero` sorteado en `franja` el día `fecha` y devuelve el
+        detalle de esa franja. Un sorteo de un día posterior cierra el día
+        abierto (las franjas que falten quedan sin dato).
+        """
+        fecha = _como_fecha(fecha)
+        numero = self._validar(franja, numero)
+        with self._candado:
+            if self.ultima_fecha is not None and fecha <= self.ultima_fecha:
+                raise SorteoRechazado(f"El día {fecha} ya está cerrado (último guardado: {self.ultima_fecha}).")
+            if fecha < self.fecha_abierta:
+                raise SorteoRechazado(f"El día abierto es {self.fecha_abierta}; no se aceptan fechas anteriores.")
+            if fecha > self.fecha_abierta:
+                if self._resultados:
+                    self._cerrar_dia()
+                self._abrir_dia(fecha)
+
+            anterior = self._resultados.get(franja)
+            if anterior is None:
+                if not self._reproduciendo_diario:
+                    self._anotar_en_diario(fecha, franja, numero)
+                detalle = self._aplicar(franja, numero)
+            elif anterior == numero:
+                detalle = self._detalles[franja]
+            else:
+                raise SorteoRechazado(f"La franja {franja} del {fecha} ya se registró con el número {anterior}.")
+
+            # También en un reenvío idéntico: si el cierre anterior falló (p. ej. OSError), se reintenta
+            if len(self._resultados) == len(self.franjas):
+                self._cerrar_dia()
+                self._abrir_dia(self._siguiente_fecha())
+            return detalle
+
+    def _validar(self, franja, numero):
+        if franja not in self.franjas:
+            raise ValueError(f"Franja desconocida: {franja!r}. Franjas: {', '.join(self.franjas)}")
+        if isinstance(numero, bool) or not isinstance(numero, int):
+            raise ValueError(f"El número debe ser un entero, no {numero!r}.")
+        if self.rango_numeros and not self.rango_numeros[0] <= numero <= self.rango_numeros[1]:
+            raise ValueError(f"El número {numero} está fuera del rango {self.rango_numeros}.")
+        if not RANGO_NUMERO[0] <= numero <= RANGO_NUMERO[1]:
+            # Se rechaza al recibirlo: de otro modo el día no podría guardarse al cerrarse
+            raise ValueError(f"El número {numero} está fuera del rango que admite el historial {RANGO_NUMERO}.")
+        return numero
+
+    def _siguiente_fecha(self):
+        return self.ultima_fecha + timedelta(days=1) if self.ultima_fecha else date.today()
+
+    def _abrir_dia(self, fecha):
+        self.fecha_abierta = fecha
+        self._predicciones = self.ventana.predecir(fecha)
+        self._resultados = {}
+        self._detalles = {}
+        self._prediccion = {
+            'fecha': fecha.isoformat(),
+            'predicciones': {
+                franja: {'grupo': grupo, 'numeros': list(self.grupos_activos.get(grupo, ()))}
+                for franja, grupo in self._predicciones.items()
+            },
+        }
+        self._publicar_dia()
+
+    def _aplicar(self, franja, numero):
+        grupo = self._predicciones.get(franja)
+        indice = self.grupos_activos.posicion(grupo)
+        acerto = self.grupos_activos.contiene(indice, numero)
+        costo = self.grupos_activos.costos[indice] if indice != SIN_GRUPO else 0
+        self._resultados[franja] = numero
+        self._detalles[franja] = {
+            'franja': franja,
+            'grupo_predicho': grupo,
+            'numero_real': numero,
+            'acierto': acerto,
+            'ganancia_franja': (self.premio_por_acierto if acerto else 0) - costo,
+        }
+        self._publicar_dia()
+        return self._detalles[franja]
+
+    def _publicar_dia(self):
+        detalles = [self._detalles[franja] for franja in self.franjas if franja in self._detalles]
+        self._dia = {
+            'fecha': self.fecha_abierta.isoformat(),
+            'detalle_franjas': detalles,
+            'total_aciertos_dia': sum(d['acierto'] for d in detalles),
+            'ganancia_neta_dia': sum(d['ganancia_franja'] for d in detalles),
+            'franjas_pendientes': [franja for franja in self.franjas if franja not in self._resultados],
+        }
+
+    def _cerrar_dia(self):
+        """Guarda el día abierto en el historial y lo incorpora a la ventana."""
+        fecha = self.fecha_abierta
+        valores = {franja: self._resultados[franja] for franja in self.franjas if franja in self._resultados}
+        self.almacen = agregar_sorteos(self.ruta_json, [(fecha.toordinal(), valores)], self.almacen)
+        self.ventana.agregar_dia(fecha, valores)
+        self.ultima_fecha = fecha
+        if self._reproduciendo_diario:
+            return  # _recuperar_diario reescribe el diario al terminar
+        try:
+            os.remove(self.ruta_diario)
+        except FileNotFoundError:
+            pass
+
+    def _anotar_en_diario(self, fecha, franja, numero):
+        with open(self.ruta_diario, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'fecha': fecha.isoformat(), 'franja': franja, 'numero': numero}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _recuperar_diario(self):
+        """
+        Vuelve a aplicar los sorteos del día abierto anotados antes de un
+        reinicio. El diario se reescribe recién después, con los sorteos que
+        siguen abiertos: si la recuperación falla, queda intacto.
+        """
+        if not os.path.exists(self.ruta_diario):
+            return
+        with open(self.ruta_diario, 'r', encoding='utf-8') as f:
+            anotados = []
+            for linea in f:
+                try:
+                    anotados.append(json.loads(linea))
+                except json.JSONDecodeError:
+                    break  # Última línea de una escritura interrumpida
+        self._reproduciendo_diario = True
+        try:
+            for sorteo in anotados:
+                try:
+                    self.registrar(sorteo['fecha'], sorteo['franja'], sorteo['numero'])
+                except (ValueError, KeyError):
+                    continue
+        finally:
+            self._reproduciendo_diario = False
+        self._reescribir_diario()
+
+    def _reescribir_diario(self):
+        """Deja en el diario solo los sorteos del día abierto (temporal + os.replace)."""
+        if not self._resultados:
+            try:
+                os.remove(self.ruta_diario)
+            except FileNotFoundError:
+                pass
+            return
+        temporal = f"{self.ruta_diario}.{os.getpid()}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            for franja in self.franjas:
+                if franja in self._resultados:
+                    sorteo = {'fecha': self.fecha_abierta.isoformat(), 'franja': franja,
+                              'numero': self._resultados[franja]}
+                    f.write(json.dumps(sorteo) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, self.ruta_diario)
+
+
+def _como_fecha(valor):
+    if isinstance(valor, date):
+        return valor
+    try:
+        return date.fromisoformat(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"Fecha inválida: {valor!r} (usa AAAA-MM-DD).")
+
+
+# --- Servidor HTTP local ---
+_MOTIVOS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            409: 'Conflict', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class ServicioEnVivo:
+    """Servidor HTTP/1.1 mínimo (keep-alive) sobre asyncio para un EstadoEnVivo."""
+
+    def __init__(self, estado, host='127.0.0.1', puerto=8765):
+        self.estado = estado
+        self.host = host
+        self.puerto = puerto
+        self._servidor = None
+
+    async def iniciar(self):
+        self._servidor = await asyncio.start_server(self._atender, self.host, self.puerto)
+        self.host, self.puerto = self._servidor.sockets[0].getsockname()[:2]
+        return self
+
+    async def detener(self):
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+            self._servidor = None
+
+    async def servir_para_siempre(self):
+        await self.iniciar()
+        async with self._servidor:
+            await self._servidor.serve_forever()
+
+    async def _atender(self, lector, escritor):
+        try:
+            while True:
+                solicitud = await _leer_solicitud(lector)
+                if solicitud is None:
+                    break
+                metodo, ruta, cuerpo, mantener = solicitud
+                codigo, respuesta = await self._despachar(metodo, ruta, cuerpo)
+                _escribir_respuesta(escritor, codigo, respuesta, mantener)
+                await escritor.drain()
+                if not mantener:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def _despachar(self, metodo, ruta, cuerpo):
+        if cuerpo is _LARGO_INVALIDO:
+            return 400, {'error': "Content-Length inválido."}
+        consultas = {'/prediccion': self.estado.prediccion, '/dia': self.estado.dia, '/estado': self.estado.estado}
+        if ruta in consultas:
+            if metodo != 'GET':
+                return 405, {'error': f"Usa GET en {ruta}."}
+            return 200, consultas[ruta]()
+        if ruta != '/sorteo':
+            return 404, {'error': f"Ruta desconocida: {ruta}"}
+        if metodo != 'POST':
+            return 405, {'error': "Usa POST en /sorteo."}
+        if cuerpo is _CUERPO_EXCESIVO:
+            return 413, {'error': "Cuerpo demasiado grande."}
+
+        try:
+            datos = json.loads(cuerpo or b'{}')
+            fecha, franja, numero = datos['fecha'], datos['franja'], datos['numero']
+        except (ValueError, KeyError, TypeError):
+            return 400, {'error': "Se espera JSON con 'fecha', 'franja' y 'numero'."}
+        try:
+            # El guardado en disco del cierre de día no bloquea el bucle; EstadoEnVivo serializa los envíos
+            detalle = await asyncio.to_thread(self.estado.registrar, fecha, franja, numero)
+        except SorteoRechazado as error:
+            return 409, {'error': str(error)}
+        except ValueError as error:
+            return 400, {'error': str(error)}
+        except OSError as error:
+            # Diario o historial sin escribir: el cliente puede reintentar el envío
+            return 500, {'error': f"No se pudo guardar el sorteo: {error}"}
+        return 200, {'detalle': detalle, 'dia': self.estado.dia(), 'prediccion': self.estado.prediccion()}
+
+
+_CUERPO_EXCESIVO = object()
+_LARGO_INVALIDO = object()
+
+
+async def _leer_solicitud(lector):
+    """(método, ruta, cuerpo, mantener_conexión), o None si el cliente cerró la conexión."""
+    linea = await lector.readline()
+    if not linea:
+        return None
+    try:
+        metodo, ruta, version = linea.decode('latin-1').split()
+    except ValueError:
+        return None
+
+    cabeceras = {}
+    while True:
+        linea = await lector.readline()
+        if linea in (b'\r\n', b'\n', b''):
+            break
+        nombre, _, valor = linea.decode('latin-1').partition(':')
+        cabeceras[nombre.strip().lower()] = valor.strip()
+
+    try:
+        largo = int(cabeceras.get('content-length') or 0)
+    except ValueError:
+        largo = -1
+    if largo < 0:
+        # Sin un largo válido no se sabe dónde termina el cuerpo: se responde y se cierra la conexión
+        return metodo.upper(), ruta.split('?', 1)[0], _LARGO_INVALIDO, False
+    if largo > TAMANO_MAXIMO_CUERPO:
+        cuerpo = _CUERPO_EXCESIVO
+        mantener = False
+    else:
+        cuerpo = await lector.readexactly(largo) if largo else b''
+        conexion = cabeceras.get('connection', '').lower()
+        mantener = conexion == 'keep-alive' if version == 'HTTP/1.0' else conexion != 'close'
+    return metodo.upper(), ruta.split('?', 1)[0], cuerpo, mantener
+
+
+def _escribir_respuesta(escritor, codigo, contenido, mantener):
+    cuerpo = json.dumps(contenido, ensure_ascii=False).encode('utf-8')
+    escritor.write(
+        f"HTTP/1.1 {codigo} {_MOTIVOS.get(codigo, '')}\r\n"
+        f"Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(cuerpo)}\r\n"
+        f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n".encode('latin-1') + cuerpo
+    )
+
+
+class ClienteEnVivo:
+    """Cliente asyncio con una conexión persistente al servicio en vivo."""
+
+    def __init__(self, host='127.0.0.1', puerto=8765):
+        self.host = host
+        self.puerto = puerto
+        self._lector = None
+        self._escritor = None
+
+    async def __aenter__(self):
+        self._lector, self._escritor = await asyncio.open_connection(self.host, self.puerto)
+        return self
+
+    async def __aexit__(self, *excepcion):
+        self._escritor.close()
+        await self._escritor.wait_closed()
+
+    async def solicitar(self, metodo, ruta, datos=None):
+        """Devuelve (código, JSON de respuesta)."""
+        cuerpo = json.dumps(datos).encode('utf-8') if datos is not None else b''
+        self._escritor.write(
+            f"{metodo} {ruta} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(cuerpo)}\r\n\r\n".encode('latin-1') + cuerpo
+        )
+        await self._escritor.drain()
+
+        codigo = int((await self._lector.readline()).split()[1])
+        largo = 0
+        while True:
+            linea = await self._lector.readline()
+            if linea in (b'\r\n', b''):
+                break
+            nombre, _, valor = linea.decode('latin-1').partition(':')
+            if nombre.strip().lower() == 'content-length':
+                largo = int(valor)
+        return codigo, json.loads(await self._lector.readexactly(largo))
+
+    async def enviar_sorteo(self, fecha, franja, numero):
+        return await self.solicitar('POST', '/sorteo', {'fecha': str(fecha), 'franja': franja, 'numero': numero})
+
+    async def prediccion(self):
+        return await self.solicitar('GET', '/prediccion')
+
+    async def dia(self):
+        return await self.solicitar('GET', '/dia')
+
+
+def main(argumentos=None):
+    from .utils import cargar_json
+
+    parser = argparse.ArgumentParser(description="Servicio local de ingesta de sorteos en vivo.")
+    parser.add_argument('--config', default='data/strategy_configuration.json')
+    parser.add_argument('--historial', default='data/historical_draws.json')
+    parser.add_argument('--estrategia', help="Definición de grupos a usar (por defecto, la primera).")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8765)
+    args = parser.parse_args(argumentos)
+
+    config = cargar_json(args.config)
+    if not config:
+        return 2
+    definiciones = compilar_definiciones(config)
+    nombre = args.estrategia or next(iter(definiciones))
+    if nombre not in definiciones:
+        print(f"Estrategia desconocida: {nombre}. Disponibles: {', '.join(definiciones)}")
+        return 2
+
+    try:
+        estado = EstadoEnVivo(config, definiciones[nombre], args.historial)
+    except ValueError as error:
+        print(error)
+        return 2
+    servicio = ServicioEnVivo(estado, args.host, args.puerto)
+    print(f"Servicio en vivo ({nombre}) en http://{args.host}:{args.puerto} — día abierto: {estado.fecha_abierta}")
+    try:
+        asyncio.run(servicio.servir_para_siempre())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,156 @@
+"""
+Modelos de puntuación por lotes.
+
+Un modelo recibe el historial codificado (`ordinales` y la matriz días x
+franjas con el índice de grupo sorteado o SIN_GRUPO) y devuelve de una vez la
+puntuación de cada grupo para todas las fechas y franjas, un array
+(días x franjas x grupos) en el que la fila de cada fecha usa solo los días
+anteriores. La predicción es el grupo de mayor puntuación (el primero en caso
+de empate).
+
+Modelos incluidos (se eligen con "modelo_puntuacion" en
+`strategy_configuration.json` y sus parámetros van en "parametros_puntuacion"):
+
+- frecuencia_recencia: la regla original, frecuencia en los últimos 30 días
+  x 0.70 más recencia lineal x 0.30.
+- decaimiento_exponencial: cada aparición pesa 0.5 ** (antigüedad / vida_media);
+  no hay ventana fija.
+- markov: cadena de Markov de primer orden por franja; puntúa cada grupo
+  con las transiciones observadas desde el último grupo sorteado en esa franja.
+  `EstadoMarkov` (src/intelligence_analyzer.py) lleva los mismos conteos
+  sorteo a sorteo para el servicio en vivo y la predicción rápida.
+
+`registrar_modelo` agrega otros modelos con la misma firma.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from .grupos import SIN_GRUPO
+from .intelligence_analyzer import (
+    DIAS_VENTANA, MODELO_POR_DEFECTO, PESO_FRECUENCIA, PESO_RECENCIA, nombre_modelo,
+)
+
+VIDA_MEDIA_DIAS = 7
+
+Modelo = namedtuple('Modelo', ['puntuar', 'parametros', 'descripcion'])
+
+
+def _calendario(ordinales, grupos_por_dia, n_grupos):
+    """Apariciones (posiciones del calendario denso x franjas x grupos) y la posición de cada fecha."""
+    posiciones = ordinales - ordinales[0]
+    apariciones = np.zeros((int(posiciones[-1]) + 1, grupos_por_dia.shape[1], n_grupos), dtype=np.int64)
+    dias, franjas = np.nonzero(grupos_por_dia != SIN_GRUPO)
+    apariciones[posiciones[dias], franjas, grupos_por_dia[dias, franjas]] = 1
+    return apariciones, posiciones
+
+
+def puntuar_frecuencia_recencia(ordinales, grupos_por_dia, n_grupos, dias_ventana=DIAS_VENTANA,
+                                peso_frecuencia=PESO_FRECUENCIA, peso_recencia=PESO_RECENCIA):
+    """Regla original (la misma que `VentanaDeslizante`)."""
+    from .backtesting_vectorizado import estadisticas_de_ventana, puntuacion_ventana
+
+    frecuencia, ultima_posicion, posiciones = estadisticas_de_ventana(ordinales, grupos_por_dia, n_grupos, dias_ventana)
+    return puntuacion_ventana(frecuencia, ultima_posicion, posiciones, dias_ventana, peso_frecuencia, peso_recencia)
+
+
+def puntuar_decaimiento_exponencial(ordinales, grupos_por_dia, n_grupos, vida_media=VIDA_MEDIA_DIAS):
+    """Suma de las apariciones anteriores, cada una multiplicada por 0.5 ** (días transcurridos / vida_media)."""
+    apariciones, posiciones = _calendario(ordinales, grupos_por_dia, n_grupos)
+    factor = 0.5 ** (1.0 / vida_media)
+
+    # acumulado[k] = puntuación con los días anteriores a la posición k. Por bloques de calendario:
+    # dentro de cada uno es una suma acumulada reescalada, y los factores quedan acotados (<= 2 ** 20)
+    acumulado = np.zeros((len(apariciones) + 1,) + apariciones.shape[1:])
+    largo_bloque = max(1, int(20 * vida_media))
+    for inicio in range(0, len(apariciones), largo_bloque):
+        fin = min(inicio + largo_bloque, len(apariciones))
+        pasos = np.arange(fin - inicio)[:, None, None]
+        parcial = np.cumsum(apariciones[inicio:fin] * factor ** -pasos, axis=0)
+        acumulado[inicio + 1:fin + 1] = factor ** (pasos + 1) * acumulado[inicio] + parcial * factor ** pasos
+    return acumulado[posiciones]
+
+
+def _conteos_markov(grupos, n_grupos):
+    """
+    Para cada sorteo j de una franja (`grupos`, en orden), cuántas veces se
+    pasó del grupo grupos[j] a cada grupo en las transiciones hasta la j.
+    """
+    puntuacion = np.zeros((len(grupos), n_grupos), dtype=np.int64)
+    if len(grupos) < 2:
+        return puntuacion
+    desde, hacia = grupos[:-1], grupos[1:]
+    # Transiciones ordenadas por (grupo de origen, posición): conteo acumulado dentro de cada origen
+    orden = np.argsort(desde, kind='stable')
+    claves = desde[orden] * len(grupos) + orden + 1
+    acumulado = np.zeros((len(orden), n_grupos), dtype=np.int64)
+    acumulado[np.arange(len(orden)), hacia[orden]] = 1
+    np.cumsum(acumulado, axis=0, out=acumulado)
+    inicio_origen = np.searchsorted(desde[orden], desde[orden], side='left')
+    acumulado -= np.where((inicio_origen > 0)[:, None], acumulado[np.maximum(inicio_origen - 1, 0)], 0)
+
+    # Última transición desde grupos[j] con posición <= j
+    ultima = np.searchsorted(claves, grupos * len(grupos) + np.arange(len(grupos)), side='right') - 1
+    validas = (ultima >= 0) & (desde[orden][np.maximum(ultima, 0)] == grupos)
+    puntuacion[validas] = acumulado[ultima[validas]]
+    return puntuacion
+
+
+def puntuar_markov(ordinales, grupos_por_dia, n_grupos):
+    """
+    Transiciones contadas por franja (grupo de un sorteo -> grupo del
+    siguiente) hasta el día anterior, leídas desde el último grupo sorteado.
+    Sin estado previo o sin transiciones desde él, todas puntúan 0.
+    """
+    n_dias, n_franjas = grupos_por_dia.shape
+    puntuacion = np.zeros((n_dias, n_franjas, n_grupos), dtype=np.int64)
+    for franja in range(n_franjas):
+        dias = np.flatnonzero(grupos_por_dia[:, franja] != SIN_GRUPO)
+        if not len(dias):
+            continue
+        conteos = _conteos_markov(grupos_por_dia[dias, franja], n_grupos)
+        # Estado de cada día: el último sorteo anterior de la franja
+        anteriores = np.searchsorted(dias, np.arange(n_dias)) - 1
+        con_estado = anteriores >= 0
+        puntuacion[con_estado, franja] = conteos[anteriores[con_estado]]
+    return puntuacion
+
+
+MODELOS = {
+    'frecuencia_recencia': Modelo(
+        puntuar_frecuencia_recencia,
+        {'dias_ventana': DIAS_VENTANA, 'peso_frecuencia': PESO_FRECUENCIA, 'peso_recencia': PESO_RECENCIA},
+        "Frecuencia x 0.70 + recencia x 0.30 en los últimos 30 días (regla original)",
+    ),
+    'decaimiento_exponencial': Modelo(
+        puntuar_decaimiento_exponencial, {'vida_media': VIDA_MEDIA_DIAS},
+        "Frecuencia con decaimiento exponencial (vida media en días)",
+    ),
+    'markov': Modelo(puntuar_markov, {}, "Cadena de Markov de primer orden por franja"),
+}
+
+
+def registrar_modelo(nombre, puntuar, parametros=None, descripcion=""):
+    """Agrega un modelo: `puntuar(ordinales, grupos_por_dia, n_grupos, **parametros)` -> días x franjas x grupos."""
+    MODELOS[nombre] = Modelo(puntuar, dict(parametros or {}), descripcion)
+
+
+def parametros_modelo(config):
+    """{'modelo': nombre, **parámetros} del modelo elegido en `config`, con sus valores por defecto."""
+    nombre = nombre_modelo(config)
+    if nombre not in MODELOS:
+        raise ValueError(f"Modelo de puntuación desconocido: {nombre!r} (disponibles: {', '.join(MODELOS)}).")
+    configurados = (config or {}).get('parametros_puntuacion', {})
+    parametros = {clave: configurados.get(clave, valor) for clave, valor in MODELOS[nombre].parametros.items()}
+    vida_media = parametros.get('vida_media')
+    if vida_media is not None and (isinstance(vida_media, bool) or not isinstance(vida_media, (int, float))
+                                   or not vida_media > 0):
+        raise ValueError(f"vida_media debe ser un número de días mayor que 0, no {vida_media!r}.")
+    return {'modelo': nombre, **parametros}
+
+
+def puntuar_lote(ordinales, grupos_por_dia, n_grupos, modelo=MODELO_POR_DEFECTO, **parametros):
+    """Puntuaciones (días x franjas x grupos) de `modelo` para todas las fechas."""
+    if modelo not in MODELOS:
+        raise ValueError(f"Modelo de puntuación desconocido: {modelo!r} (disponibles: {', '.join(MODELOS)}).")
+    return MODELOS[modelo].puntuar(ordinales, grupos_por_dia, n_grupos, **parametros)
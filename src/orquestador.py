@@ -0,0 +1,400 @@
+"""
+Backtesting por lotes de varios historiales (loterías, regiones).
+
+Un manifiesto JSON enumera los trabajos, cada uno con su archivo de sorteos y
+su configuración de estrategia. `encolar` los escribe en un directorio de cola
+con una carpeta por estado:
+
+    cola/pendientes/   trabajos por hacer (<id>.json)
+    cola/en_proceso/   reclamados por un trabajador
+    cola/terminados/   trabajo + resumen por estrategia
+    cola/fallidos/     trabajos que agotaron sus intentos
+    cola/reemplazados/ resultados de versiones anteriores de un trabajo
+
+El id de cada trabajo es su nombre más una huella del contenido de su
+historial y de su configuración (no depende de su posición en el manifiesto):
+si alguno cambia (llegaron sorteos nuevos), el trabajo se vuelve a encolar y su
+resultado anterior pasa a reemplazados/, fuera del reporte.
+
+Un trabajador reclama un trabajo moviéndolo de pendientes/ a en_proceso/ con
+`os.rename`, que es atómico: si dos trabajadores compiten por el mismo archivo
+solo uno lo consigue. Mientras lo ejecuta renueva la fecha del archivo (latido);
+un reclamo sin latido por más de `abandono_segundos` es de un trabajador caído y
+vuelve a pendientes/. Si falla, vuelve a pendientes/ hasta `max_intentos`. Así
+varios procesos, en una o varias máquinas con la cola en un disco compartido,
+pueden consumir la misma cola sin otra coordinación. `consolidar` junta los
+resúmenes en un solo reporte.
+
+Uso:
+    python -m src.orquestador manifiesto.json --cola outputs/cola --procesos 8
+    python -m src.orquestador --cola outputs/cola --solo-trabajar   # otro nodo
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import socket
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from .almacen_historial import huella_archivo
+from .comparacion import comparar_estrategias
+from .modelos_puntuacion import parametros_modelo
+from .utils import cargar_json, historial_a_dataframe
+
+ESTADOS = ('pendientes', 'en_proceso', 'terminados', 'fallidos')
+MAX_INTENTOS = 3
+ABANDONO_SEGUNDOS = 3600
+ESPERA_SEGUNDOS = 1.0  # Entre consultas cuando solo quedan trabajos en proceso ajenos
+
+COLUMNAS_REPORTE = [
+    'trabajo', 'historial', 'modelo', 'estrategia', 'balance_neto', 'aciertos', 'jugadas', 'tasa_acierto',
+    'estado', 'intentos', 'trabajador', 'segundos', 'error',
+]
+
+
+def _ruta(cola, estado, id_trabajo):
+    return os.path.join(cola, estado, id_trabajo + '.json')
+
+
+def _escribir_atomico(ruta, contenido, cola):
+    # El temporal queda fuera de las carpetas de estado: nadie lo ve a medio escribir
+    temporal = os.path.join(cola, f'.{uuid.uuid4().hex}.tmp')
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(contenido, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+
+
+def _leer(ruta):
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def preparar_cola(cola):
+    for estado in ESTADOS:
+        os.makedirs(os.path.join(cola, estado), exist_ok=True)
+
+
+def huella_trabajo(trabajo):
+    """sha256 del contenido del historial y de la configuración, y de las opciones del trabajo."""
+    huella = hashlib.sha256()
+    for ruta in (trabajo['historial'], trabajo['config']):
+        try:
+            huella.update(huella_archivo(ruta)['sha256'].encode('ascii'))
+        except OSError:
+            huella.update(b'sin archivo')  # El trabajo fallará al ejecutarse y quedará en fallidos/
+    opciones = {clave: trabajo.get(clave) for clave in ('estrategias', 'config_extra')}
+    huella.update(json.dumps(opciones, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    return huella.hexdigest()
+
+
+def _clave_trabajo(trabajo):
+    nombre = trabajo.get('nombre') or os.path.splitext(os.path.basename(trabajo['historial']))[0]
+    return re.sub(r'[^0-9A-Za-z_-]+', '_', nombre).strip('_')
+
+
+def _clave_de_archivo(archivo):
+    # <clave>_<huella>.json
+    return archivo[:-len('.json')].rsplit('_', 1)[0]
+
+
+def _reemplazar_anteriores(cola, clave, id_trabajo):
+    """Mueve a reemplazados/ las versiones anteriores del trabajo `clave` (pendientes o ya terminadas)."""
+    destino = os.path.join(cola, 'reemplazados')
+    os.makedirs(destino, exist_ok=True)
+    for estado in ('pendientes', 'terminados', 'fallidos'):
+        directorio = os.path.join(cola, estado)
+        for archivo in os.listdir(directorio):
+            if archivo.endswith('.json') and archivo != id_trabajo + '.json' and _clave_de_archivo(archivo) == clave:
+                try:
+                    os.replace(os.path.join(directorio, archivo), os.path.join(destino, archivo))
+                except FileNotFoundError:
+                    continue  # Lo reclamó un trabajador
+
+
+def leer_manifiesto(ruta_manifiesto):
+    """
+    Lista de trabajos del manifiesto: {"trabajos": [...]} o directamente la
+    lista. Cada trabajo tiene "historial" y "config" (rutas relativas al
+    manifiesto) y, opcionales, "nombre", "estrategias" y "config_extra" (claves
+    que reemplazan a las de la configuración, p. ej. "modelo_puntuacion").
+    """
+    manifiesto = cargar_json(ruta_manifiesto)
+    if manifiesto is None:
+        raise ValueError(f"No se pudo leer el manifiesto {ruta_manifiesto}.")
+    trabajos = manifiesto.get('trabajos', []) if isinstance(manifiesto, dict) else manifiesto
+    base = os.path.dirname(os.path.abspath(ruta_manifiesto))
+    resultado = []
+    for trabajo in trabajos:
+        if 'historial' not in trabajo or 'config' not in trabajo:
+            raise ValueError(f"Cada trabajo necesita 'historial' y 'config': {trabajo!r}")
+        resultado.append({
+            **trabajo,
+            'historial': os.path.join(base, trabajo['historial']),
+            'config': os.path.join(base, trabajo['config']),
+        })
+    return resultado
+
+
+def encolar(cola, trabajos):
+    """
+    Escribe en pendientes/ los `trabajos` que todavía no están en la cola con
+    el mismo contenido (en ningún estado); las versiones anteriores de cada uno
+    pasan a reemplazados/. La posición en `trabajos` se guarda como 'orden'
+    (solo para ordenar el reporte). Devuelve los ids encolados.
+    """
+    claves = [_clave_trabajo(trabajo) for trabajo in trabajos]
+    repetidas = sorted({clave for clave in claves if claves.count(clave) > 1})
+    if repetidas:
+        raise ValueError(f"Trabajos con el mismo nombre: {', '.join(repetidas)} (usa 'nombre' para distinguirlos).")
+
+    preparar_cola(cola)
+    encolados = []
+    for orden, (clave, trabajo) in enumerate(zip(claves, trabajos)):
+        id_trabajo = f"{clave}_{huella_trabajo(trabajo)[:12]}"
+        if any(os.path.exists(_ruta(cola, estado, id_trabajo)) for estado in ESTADOS):
+            continue
+        _reemplazar_anteriores(cola, clave, id_trabajo)
+        _escribir_atomico(_ruta(cola, 'pendientes', id_trabajo),
+                          {**trabajo, 'id': id_trabajo, 'orden': orden, 'intentos': 0}, cola)
+        encolados.append(id_trabajo)
+    return encolados
+
+
+def reclamar(cola, nombre=None):
+    """
+    Mueve el primer trabajo pendiente a en_proceso/ y lo devuelve, o None si no
+    quedan. El reclamo ya cuenta como intento y queda a nombre de `nombre`.
+    """
+    pendientes = os.path.join(cola, 'pendientes')
+    for archivo in sorted(os.listdir(pendientes)):
+        if not archivo.endswith('.json'):
+            continue
+        origen = os.path.join(pendientes, archivo)
+        destino = os.path.join(cola, 'en_proceso', archivo)
+        try:
+            # Se sella antes de moverlo: en en_proceso/ nunca aparece con la fecha
+            # de cuando se encoló, que recuperar_abandonados tomaría por abandono
+            os.utime(origen)
+            os.rename(origen, destino)
+        except FileNotFoundError:
+            continue  # Lo reclamó otro trabajador
+        trabajo = _leer(destino)
+        trabajo['intentos'] += 1  # Si el trabajador muere, el intento cuenta igual
+        trabajo['trabajador'] = nombre
+        trabajo['reclamado'] = time.time()
+        _escribir_atomico(destino, trabajo, cola)
+        return trabajo
+    return None
+
+
+def recuperar_abandonados(cola, segundos=ABANDONO_SEGUNDOS, max_intentos=MAX_INTENTOS):
+    """
+    Devuelve a pendientes/ los trabajos sin latido hace más de `segundos` (su
+    trabajador murió sin terminarlos), o los deja en fallidos/ si ya agotaron
+    sus intentos. Devuelve cuántos se recuperaron.
+    """
+    en_proceso = os.path.join(cola, 'en_proceso')
+    limite = time.time() - segundos
+    recuperados = 0
+    for archivo in os.listdir(en_proceso):
+        ruta = os.path.join(en_proceso, archivo)
+        try:
+            if not archivo.endswith('.json') or os.path.getmtime(ruta) >= limite:
+                continue
+            trabajo = _leer(ruta)
+            if trabajo['intentos'] < max_intentos:
+                os.rename(ruta, os.path.join(cola, 'pendientes', archivo))
+            else:
+                fallido = os.path.join(cola, 'fallidos', archivo)
+                os.rename(ruta, fallido)
+                trabajo['error'] = f"El trabajador {trabajo.get('trabajador')} dejó de responder sin terminarlo."
+                _escribir_atomico(fallido, trabajo, cola)
+            recuperados += 1
+        except FileNotFoundError:
+            continue  # Lo terminó o recuperó otro trabajador
+    return recuperados
+
+
+def _latir(ruta, intervalo, detener):
+    # Renueva la fecha del reclamo hasta que termine el trabajo
+    while not detener.wait(intervalo):
+        try:
+            os.utime(ruta)
+        except FileNotFoundError:
+            return
+
+
+def ejecutar_trabajo(trabajo):
+    """Backtesting de todas las estrategias (o de `estrategias`) de un trabajo: lista de filas de resumen."""
+    config = cargar_json(trabajo['config'])
+    if not config:
+        raise ValueError(f"No se pudo leer la configuración {trabajo['config']}.")
+    config = {**config, **trabajo.get('config_extra', {})}
+    historial = cargar_json(trabajo['historial'])
+    if historial is None:
+        raise ValueError(f"No se pudo leer el historial {trabajo['historial']}.")
+
+    definiciones = None
+    if trabajo.get('estrategias'):
+        grupos = config.get('group_definitions', {})
+        desconocidas = [nombre for nombre in trabajo['estrategias'] if nombre not in grupos]
+        if desconocidas:
+            raise ValueError(f"Estrategias desconocidas: {', '.join(desconocidas)}")
+        definiciones = {nombre: grupos[nombre] for nombre in trabajo['estrategias']}
+
+    resumen, _ = comparar_estrategias(config, historial_a_dataframe(historial), definiciones, incluir_detalle=False)
+    modelo = parametros_modelo(config)['modelo']
+    return [{**fila, 'modelo': modelo} for fila in json.loads(resumen.to_json(orient='records'))]
+
+
+def _finalizar(cola, trabajo, max_intentos, error=None):
+    en_proceso = _ruta(cola, 'en_proceso', trabajo['id'])
+    if error is None:
+        trabajo.pop('error', None)  # De un intento anterior
+        estado = 'terminados'
+    else:
+        trabajo['error'] = error
+        estado = 'pendientes' if trabajo['intentos'] < max_intentos else 'fallidos'
+    # El reclamo se actualiza y se mueve de una vez a su estado final: nunca hay una copia
+    # en pendientes/ mientras siga en en_proceso/, que otro trabajador podría reclamar
+    _escribir_atomico(en_proceso, trabajo, cola)
+    os.replace(en_proceso, _ruta(cola, estado, trabajo['id']))
+    return estado
+
+
+def trabajar(cola, nombre=None, max_intentos=MAX_INTENTOS, abandono_segundos=ABANDONO_SEGUNDOS):
+    """
+    Consume la cola hasta vaciarla: reclama, ejecuta y deja cada trabajo en
+    terminados/, de vuelta en pendientes/ (si falló y le quedan intentos) o en
+    fallidos/. Mientras otros trabajadores tengan trabajos en proceso espera,
+    por si alguno cae y su trabajo vuelve a pendientes/. Devuelve cuántos
+    trabajos ejecutó.
+    """
+    nombre = nombre or f"{socket.gethostname()}-{os.getpid()}"
+    intervalo = abandono_segundos / 4
+    preparar_cola(cola)
+    ejecutados = 0
+    ultima_revision = None
+    while True:
+        if ultima_revision is None or time.monotonic() - ultima_revision >= intervalo:
+            recuperar_abandonados(cola, abandono_segundos, max_intentos)
+            ultima_revision = time.monotonic()
+        trabajo = reclamar(cola, nombre)
+        if trabajo is None:
+            if not os.listdir(os.path.join(cola, 'en_proceso')):
+                return ejecutados
+            time.sleep(min(ESPERA_SEGUNDOS, intervalo))
+            continue
+
+        detener = threading.Event()
+        latido = threading.Thread(
+            target=_latir, args=(_ruta(cola, 'en_proceso', trabajo['id']), intervalo, detener), daemon=True
+        )
+        latido.start()
+        inicio = time.perf_counter()
+        try:
+            trabajo['resumen'] = ejecutar_trabajo(trabajo)
+            error = None
+        except Exception as excepcion:  # noqa: BLE001 - cualquier fallo cuenta como intento
+            error = ''.join(traceback.format_exception_only(type(excepcion), excepcion)).strip()
+        finally:
+            detener.set()
+            latido.join()
+        trabajo['segundos'] = round(time.perf_counter() - inicio, 3)
+        estado = _finalizar(cola, trabajo, max_intentos, error)
+        ejecutados += 1
+        print(f"[{nombre}] {trabajo['id']}: {estado} (intento {trabajo['intentos']})")
+
+
+def ejecutar_cola(cola, procesos=None, max_intentos=MAX_INTENTOS, abandono_segundos=ABANDONO_SEGUNDOS):
+    """
+    Lanza `procesos` trabajadores locales (por defecto, uno por núcleo) sobre
+    la misma cola y espera a que la vacíen. Con procesos <= 1 trabaja en este
+    proceso. Devuelve cuántos trabajos se ejecutaron.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    if procesos <= 1:
+        return trabajar(cola, max_intentos=max_intentos, abandono_segundos=abandono_segundos)
+
+    preparar_cola(cola)
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = [
+            pool.submit(trabajar, cola, f"{socket.gethostname()}-{os.getpid()}-{indice}", max_intentos, abandono_segundos)
+            for indice in range(procesos)
+        ]
+        return sum(futuro.result() for futuro in futuros)
+
+
+def consolidar(cola):
+    """Reporte (DataFrame) con una fila por trabajo y estrategia terminados, y una por trabajo fallido."""
+    import pandas as pd
+
+    filas = []
+    for estado in ('terminados', 'fallidos'):
+        directorio = os.path.join(cola, estado)
+        if not os.path.isdir(directorio):
+            continue
+        for archivo in sorted(os.listdir(directorio)):
+            if not archivo.endswith('.json'):
+                continue
+            trabajo = _leer(os.path.join(directorio, archivo))
+            comunes = {
+                'orden': trabajo.get('orden'), 'trabajo': trabajo['id'], 'historial': trabajo['historial'], 'estado': estado[:-1],
+                'intentos': trabajo['intentos'], 'trabajador': trabajo.get('trabajador'),
+                'segundos': trabajo.get('segundos'),
+            }
+            if estado == 'fallidos':
+                filas.append({**comunes, 'error': trabajo.get('error')})
+            for resumen in trabajo.get('resumen', []) if estado == 'terminados' else []:
+                filas.append({**comunes, **resumen})
+
+    reporte = pd.DataFrame(filas, columns=['orden', *COLUMNAS_REPORTE])
+    reporte = reporte.sort_values(by=['orden', 'trabajo'], kind='stable', na_position='last')
+    return reporte.drop(columns='orden').reset_index(drop=True)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Backtesting por lotes de varios historiales con una cola de trabajos.")
+    parser.add_argument('manifiesto', nargs='?', help="JSON con los trabajos a encolar (opcional si la cola ya existe).")
+    parser.add_argument('--cola', default='outputs/cola')
+    parser.add_argument('--procesos', type=int, default=None, help="Trabajadores locales (por defecto, uno por núcleo).")
+    parser.add_argument('--max-intentos', type=int, default=MAX_INTENTOS)
+    parser.add_argument('--abandono-segundos', type=int, default=ABANDONO_SEGUNDOS,
+                        help="Reclamos sin latido por más de esto vuelven a pendientes (trabajador caído).")
+    parser.add_argument('--solo-trabajar', action='store_true', help="Solo consumir la cola, sin escribir el reporte.")
+    parser.add_argument('--salida', default='outputs/reporte_lotes.csv')
+    args = parser.parse_args(argumentos)
+
+    if args.manifiesto:
+        try:
+            encolados = encolar(args.cola, leer_manifiesto(args.manifiesto))
+        except ValueError as error:
+            print(f"Error: {error}")
+            return 1
+        print(f"--- {len(encolados)} trabajos encolados en {args.cola} ---")
+
+    ejecutados = ejecutar_cola(args.cola, args.procesos, args.max_intentos, args.abandono_segundos)
+    print(f"--- {ejecutados} ejecuciones ---")
+    if args.solo_trabajar:
+        return 0
+
+    reporte = consolidar(args.cola)
+    os.makedirs(os.path.dirname(args.salida) or '.', exist_ok=True)
+    reporte.to_csv(args.salida, index=False, encoding='utf-8')
+    print(reporte.drop(columns=['historial', 'error']).to_string(index=False))
+    print(f"Reporte consolidado guardado en: {args.salida}")
+    en_curso = os.listdir(os.path.join(args.cola, 'en_proceso'))
+    if en_curso:
+        print(f"Aviso: {len(en_curso)} trabajos siguen en proceso en otros trabajadores.")
+    return 1 if (reporte['estado'] == 'fallido').any() else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,163 @@
+"""
+Predicción de un día sin pandas, NumPy ni Streamlit.
+
+Pensado para cron y scripts que solo necesitan "qué grupo jugar en cada franja
+mañana": lee únicamente los días de la ventana, desde el almacén columnar si
+está sincronizado con el JSON (búsqueda binaria sobre `fecha.i32` y lectura de
+unas pocas filas por columna) o, si no, desde el JSON. Con el modelo 'markov'
+(`EstadoMarkov`, sin ventana) se lee todo el historial. Solo importa módulos de
+la biblioteca estándar y los estados incrementales de intelligence_analyzer,
+así que el arranque completo queda muy por debajo de los 100 ms.
+
+Uso:
+    python -m src.prediccion_rapida                      # mañana, primera estrategia
+    python -m src.prediccion_rapida --fecha 2025-07-21 --estrategia "Grupos de 3 (A, B, C, D, E)" --json
+"""
+import argparse
+import json
+import os
+import sys
+from array import array
+from datetime import date, timedelta
+
+from .grupos import compilar_grupos
+from .intelligence_analyzer import crear_estado_incremental
+
+# Mismo formato que AlmacenHistorial (src/almacen_historial.py)
+SIN_DATO = -1
+VERSION_FORMATO = 1
+
+
+def _leer_columna(ruta, tipo, inicio, fin):
+    valores = array(tipo)
+    with open(ruta, 'rb') as f:
+        f.seek(inicio * valores.itemsize)
+        valores.frombytes(f.read((fin - inicio) * valores.itemsize))
+    if sys.byteorder != 'little':
+        valores.byteswap()
+    return valores
+
+
+def _primera_fila_desde(ruta_fechas, filas, ordinal):
+    """Búsqueda binaria en el archivo de fechas sin cargarlo entero."""
+    bajo, alto = 0, filas
+    with open(ruta_fechas, 'rb') as f:
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            f.seek(medio * 4)
+            valor = int.from_bytes(f.read(4), 'little', signed=True)
+            if valor < ordinal:
+                bajo = medio + 1
+            else:
+                alto = medio
+    return bajo
+
+
+def _almacen_sincronizado(ruta_json, directorio):
+    """meta.json del almacén si refleja el JSON actual (mismo tamaño y fecha de modificación), o None."""
+    try:
+        with open(os.path.join(directorio, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != VERSION_FORMATO:
+        return None
+    if not os.path.exists(ruta_json):
+        return meta
+    origen = meta.get('origen') or {}
+    estado = os.stat(ruta_json)
+    if (origen.get('tamano'), origen.get('mtime_ns')) != (estado.st_size, estado.st_mtime_ns):
+        return None
+    return meta
+
+
+def dias_en_rango(ruta_json, desde, hasta, directorio=None):
+    """Lista ordenada de (fecha, {franja: número}) con `desde` <= fecha <= `hasta`."""
+    if directorio is None:
+        directorio = os.path.splitext(ruta_json)[0] + '.columnar'
+    meta = _almacen_sincronizado(ruta_json, directorio)
+
+    if meta is None:
+        with open(ruta_json, 'r', encoding='utf-8') as f:
+            historial_sorteos = json.load(f)
+        dias = []
+        for fecha_str, franjas in historial_sorteos.items():
+            try:
+                fecha = date.fromisoformat(fecha_str)
+                if desde <= fecha <= hasta:
+                    dias.append((fecha, dict(franjas)))
+            except (ValueError, TypeError):
+                continue  # Igual que `historial_a_dataframe`: se omiten los días mal formados
+        return sorted(dias, key=lambda dia: dia[0])
+
+    filas = meta['filas']
+    ruta_fechas = os.path.join(directorio, 'fecha.i32')
+    inicio = _primera_fila_desde(ruta_fechas, filas, desde.toordinal())
+    fin = _primera_fila_desde(ruta_fechas, filas, hasta.toordinal() + 1)
+    if inicio >= fin:
+        return []
+    ordinales = _leer_columna(ruta_fechas, 'i', inicio, fin)
+    columnas = [
+        (franja, _leer_columna(os.path.join(directorio, f'franja_{k}.i16'), 'h', inicio, fin))
+        for k, franja in enumerate(meta['franjas'])
+    ]
+    return [
+        (date.fromordinal(ordinal), {franja: valores[i] for franja, valores in columnas if valores[i] != SIN_DATO})
+        for i, ordinal in enumerate(ordinales)
+    ]
+
+
+def predecir_fecha(config, grupos_activos, fecha_prediccion, ruta_json='data/historical_draws.json', directorio=None):
+    """{franja: grupo} para `fecha_prediccion`, igual que `generar_predicciones_del_dia`."""
+    franjas = config.get("franjas", ["Morning", "Matinee", "Afternoon", "Evening", "LateNight"])
+    # Ventana deslizante o estado de Markov (ValueError si el modelo solo se calcula por lotes)
+    ventana = crear_estado_incremental(config, franjas, compilar_grupos(grupos_activos, config))
+    desde = fecha_prediccion - timedelta(days=ventana.dias_ventana) if ventana.dias_ventana else date.min
+    for fecha, valores in dias_en_rango(ruta_json, desde, fecha_prediccion - timedelta(days=1), directorio):
+        ventana.agregar_dia(fecha, valores)
+    return ventana.predecir(fecha_prediccion)
+
+
+def main(argumentos=None):
+    from .utils import cargar_json
+
+    parser = argparse.ArgumentParser(description="Jugada recomendada para una fecha (arranque rápido).")
+    parser.add_argument('--config', default='data/strategy_configuration.json')
+    parser.add_argument('--historial', default='data/historical_draws.json')
+    parser.add_argument('--estrategia', help="Definición de grupos a usar (por defecto, la primera).")
+    parser.add_argument('--fecha', type=date.fromisoformat, default=date.today() + timedelta(days=1),
+                        help="Fecha a predecir (AAAA-MM-DD, por defecto mañana).")
+    parser.add_argument('--json', action='store_true', help="Imprime el resultado como JSON.")
+    args = parser.parse_args(argumentos)
+
+    config = cargar_json(args.config)
+    if not config:
+        return 2
+    definiciones = config.get('group_definitions', {})
+    nombre = args.estrategia or next(iter(definiciones), None)
+    if nombre not in definiciones:
+        print(f"Estrategia desconocida: {nombre}. Disponibles: {', '.join(definiciones)}")
+        return 2
+
+    grupos_activos = compilar_grupos(definiciones[nombre], config, nombre)
+    try:
+        predicciones = predecir_fecha(config, grupos_activos, args.fecha, args.historial)
+    except ValueError as error:
+        print(error)
+        return 2
+    if args.json:
+        print(json.dumps({
+            'fecha': args.fecha.isoformat(),
+            'estrategia': nombre,
+            'predicciones': {franja: {'grupo': grupo, 'numeros': list(grupos_activos.get(grupo, ()))}
+                             for franja, grupo in predicciones.items()},
+        }, ensure_ascii=False))
+    else:
+        print(f"Jugada recomendada para el {args.fecha} ({nombre}):")
+        for franja, grupo in predicciones.items():
+            print(f"  {franja:<10} {grupo:<4} {list(grupos_activos.get(grupo, ()))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
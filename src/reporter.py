@@ -1,5 +1,5 @@
 # src/reporter.py
-import pandas as pd
+import csv
 import os
 
 def guardar_reporte_csv(resultados, ruta_salida):
@@ -11,6 +11,8 @@ def guardar_reporte_csv(resultados, ruta_salida):
         print("No hay resultados para guardar.")
         return
 
+    import pandas as pd
+
     # Asegurarse de que el directorio de salida exista
     directorio_salida = os.path.dirname(ruta_salida)
     if not os.path.exists(directorio_salida):
@@ -26,4 +28,111 @@ def guardar_reporte_csv(resultados, ruta_salida):
     df = df[columnas_ordenadas]
     
     df.to_csv(ruta_salida, index=False, encoding='utf-8')
-    print(f"Reporte de backtesting guardado exitosamente en: {ruta_salida}")
\ No newline at end of file
+    print(f"Reporte de backtesting guardado exitosamente en: {ruta_salida}")
+
+COLUMNAS_RESULTADO = [
+    "fecha", "franja", "grupo_predicho", "numeros_jugados",
+    "numero_real", "resultado", "ganancia_franja"
+]
+FORMATOS_SALIDA = ("csv", "parquet")
+ETIQUETAS_RESULTADO = {True: "✅ ACIERTO", False: "❌ FALLO"}
+
+
+def etiquetar_fila(fila, grupos_activos):
+    """Agrega a un dict de resultado compacto los números jugados y la etiqueta del resultado."""
+    fila["numeros_jugados"] = tuple(grupos_activos.get(fila["grupo_predicho"], ()))
+    fila["resultado"] = ETIQUETAS_RESULTADO[bool(fila["acierto"])]
+    return fila
+
+
+def etiquetar_resultados(resultados_df, grupos_activos):
+    """
+    Versión legible de un DataFrame de resultados compacto (src/resultados_compactos.py)
+    para mostrarla o exportarla: columnas de `COLUMNAS_RESULTADO`, con los
+    números jugados y la etiqueta "✅ ACIERTO"/"❌ FALLO".
+    """
+    import pandas as pd
+    from .resultados_compactos import numeros_jugados
+
+    if resultados_df.empty:
+        return pd.DataFrame(columns=COLUMNAS_RESULTADO)
+    return pd.DataFrame({
+        "fecha": resultados_df["fecha"],
+        "franja": resultados_df["franja"].astype(str),
+        "grupo_predicho": resultados_df["grupo_predicho"].astype(str),
+        "numeros_jugados": numeros_jugados(resultados_df, grupos_activos),
+        "numero_real": resultados_df["numero_real"],
+        "resultado": resultados_df["acierto"].map(ETIQUETAS_RESULTADO),
+        "ganancia_franja": resultados_df["ganancia_franja"],
+    }, index=resultados_df.index)
+
+
+def _bloques(filas, tamano_bloque):
+    bloque = []
+    for fila in filas:
+        bloque.append(fila)
+        if len(bloque) >= tamano_bloque:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+def _fila_plana(fila, columnas):
+    """Valores de `fila` en el orden de `columnas`, con la fecha en ISO y los números jugados como texto."""
+    valores = []
+    for columna in columnas:
+        valor = fila.get(columna)
+        if columna == "fecha" and hasattr(valor, "isoformat"):
+            valor = valor.isoformat()[:10]
+        elif columna == "resultado" and valor is None and "acierto" in fila:
+            valor = ETIQUETAS_RESULTADO[bool(fila["acierto"])]
+        elif columna == "numeros_jugados":
+            valor = ", ".join(str(numero) for numero in (valor or ()))
+        elif isinstance(valor, float):
+            valor = None if valor != valor else (int(valor) if valor.is_integer() else valor)
+        valores.append(valor)
+    return valores
+
+
+def escribir_resultados_por_bloques(filas, ruta_salida, formato="csv", tamano_bloque=10000, columnas=None):
+    """
+    Escribe los resultados que produce el iterable `filas` (dicts por franja)
+    en `ruta_salida`, volcando bloques de `tamano_bloque` filas a medida que
+    llegan: la memoria usada no depende del largo del historial.
+
+    `formato` es "csv" o "parquet" (este último requiere pyarrow).
+    Devuelve la cantidad de filas escritas.
+    """
+    if formato not in FORMATOS_SALIDA:
+        raise ValueError(f"Formato de salida desconocido: {formato!r} (usa {' o '.join(FORMATOS_SALIDA)}).")
+    columnas = list(columnas or COLUMNAS_RESULTADO)
+
+    directorio_salida = os.path.dirname(ruta_salida)
+    if directorio_salida:
+        os.makedirs(directorio_salida, exist_ok=True)
+
+    total = 0
+    if formato == "csv":
+        with open(ruta_salida, "w", newline="", encoding="utf-8") as f:
+            escritor = csv.writer(f)
+            escritor.writerow(columnas)
+            for bloque in _bloques(filas, tamano_bloque):
+                escritor.writerows(_fila_plana(fila, columnas) for fila in bloque)
+                total += len(bloque)
+        return total
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as error:
+        raise ImportError("El formato parquet requiere pyarrow (pip install pyarrow).") from error
+
+    enteros = {"numero_real": pa.int64(), "ganancia_franja": pa.int64()}
+    esquema = pa.schema([(columna, enteros.get(columna, pa.string())) for columna in columnas])
+    with pq.ParquetWriter(ruta_salida, esquema) as escritor:
+        for bloque in _bloques(filas, tamano_bloque):
+            registros = [dict(zip(columnas, _fila_plana(fila, columnas))) for fila in bloque]
+            escritor.write_table(pa.Table.from_pylist(registros, schema=esquema))
+            total += len(bloque)
+    return total
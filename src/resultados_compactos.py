@@ -0,0 +1,135 @@
+"""
+Formato compacto de los resultados del backtesting.
+
+Una fila por fecha evaluada y franja, con tipos pequeños:
+
+    fecha            datetime64
+    franja           categórica (franjas de la configuración)
+    grupo_predicho   categórica (grupos de la definición, en su orden)
+    numero_real      Int16 (nulo si falta el sorteo; Int32/Int64 si hay números mayores)
+    acierto          bool
+    ganancia_franja  el entero con signo más pequeño que cubre premio y costos
+                     (float64 si alguno es fraccionario)
+
+Los números jugados no se guardan: salen de la tabla de grupos con
+`numeros_jugados`. Las etiquetas legibles ("✅ ACIERTO", listas de números)
+se generan solo al mostrar o exportar (`src/reporter.py`, `app.py`). El
+DataFrame se guarda y se lee en Parquet/Arrow conservando estos tipos.
+"""
+import numpy as np
+import pandas as pd
+
+from .grupos import compilar_grupos
+
+COLUMNAS = ['fecha', 'franja', 'grupo_predicho', 'numero_real', 'acierto', 'ganancia_franja']
+
+
+def tipo_ganancia(grupos_activos, premio_por_acierto):
+    """
+    Entero con signo más pequeño que representa cualquier ganancia por franja,
+    o float64 si algún costo o el premio no son enteros.
+    """
+    montos = (*grupos_activos.costos, premio_por_acierto)
+    if not all(float(monto).is_integer() for monto in montos):
+        return np.dtype(np.float64)
+    # Las ganancias van de -costo (fallo) a premio - costo (acierto)
+    magnitud = int(max(max(grupos_activos.costos, default=0), premio_por_acierto))
+    return np.result_type(np.min_scalar_type(-(magnitud + 1)), np.int8)
+
+
+def a_monto(valor):
+    """Escalar de numpy a número de Python: int si su tipo es entero, float si no."""
+    valor = valor.item() if isinstance(valor, np.generic) else valor
+    return valor if isinstance(valor, int) else float(valor)
+
+
+def _tipo_numero(numero_real):
+    # Int16 cubre cualquier lotería habitual; números mayores usan un entero más ancho en lugar de desbordarse
+    maximo = int(numero_real.max()) if numero_real.size else 0
+    for tipo in (np.int16, np.int32):
+        if maximo <= np.iinfo(tipo).max:
+            return tipo
+    return np.int64
+
+
+def construir_resultados(fechas, franjas, grupos_activos, codigos_franja, codigos_grupo,
+                         numero_real, acierto, ganancia, premio_por_acierto=5):
+    """
+    DataFrame compacto a partir de arrays paralelos: `codigos_franja` indexa
+    `franjas`, `codigos_grupo` indexa los grupos de `grupos_activos` y
+    `numero_real` usa un valor negativo para los sorteos faltantes.
+    """
+    numero_real = np.asarray(numero_real, dtype=np.int64)
+    faltantes = numero_real < 0
+    return pd.DataFrame({
+        'fecha': pd.to_datetime(fechas),
+        'franja': pd.Categorical.from_codes(np.asarray(codigos_franja, dtype=np.int16), categories=list(franjas)),
+        'grupo_predicho': pd.Categorical.from_codes(np.asarray(codigos_grupo, dtype=np.int16),
+                                                    categories=list(grupos_activos.nombres)),
+        'numero_real': pd.arrays.IntegerArray(
+            np.where(faltantes, 0, numero_real).astype(_tipo_numero(numero_real)), faltantes
+        ),
+        'acierto': np.asarray(acierto, dtype=bool),
+        'ganancia_franja': np.asarray(ganancia).astype(tipo_ganancia(grupos_activos, premio_por_acierto)),
+    })
+
+
+def desde_filas(filas, franjas, grupos_activos, premio_por_acierto=5):
+    """DataFrame compacto a partir de los dicts de resultado del recorrido día a día."""
+    if not filas:
+        return pd.DataFrame()
+    posicion_franja = {franja: indice for indice, franja in enumerate(franjas)}
+    numero_real = []
+    for fila in filas:
+        numero = fila['numero_real']
+        try:
+            # NaN y valores no enteros (3.5) quedan como sorteo faltante, igual que en `codificar_historial`
+            numero_real.append(int(numero) if numero == numero and float(numero).is_integer() else -1)
+        except (TypeError, ValueError, OverflowError):
+            numero_real.append(-1)
+    return construir_resultados(
+        [fila['fecha'] for fila in filas], franjas, grupos_activos,
+        [posicion_franja[fila['franja']] for fila in filas],
+        [grupos_activos.posicion(fila['grupo_predicho']) for fila in filas],
+        numero_real,
+        [fila['acierto'] for fila in filas],
+        [fila['ganancia_franja'] for fila in filas],
+        premio_por_acierto,
+    )
+
+
+def numeros_jugados(resultados_df, grupos_activos):
+    """Números jugados de cada fila, derivados de la tabla de grupos (no se guardan por fila)."""
+    grupos_activos = compilar_grupos(grupos_activos)
+    numeros = np.empty(len(grupos_activos.numeros), dtype=object)
+    numeros[:] = list(grupos_activos.numeros)
+    return numeros[resultados_df['grupo_predicho'].cat.codes.to_numpy()]
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as error:
+        raise ImportError("Guardar resultados en Parquet/Arrow requiere pyarrow (pip install pyarrow).") from error
+    return pa, pq
+
+
+def a_arrow(resultados_df):
+    """Tabla de Arrow con los mismos tipos (las categóricas pasan a diccionarios)."""
+    pa, _ = _pyarrow()
+    return pa.Table.from_pandas(resultados_df, preserve_index=False)
+
+
+def desde_arrow(tabla):
+    return tabla.to_pandas()
+
+
+def guardar_parquet(resultados_df, ruta):
+    _, pq = _pyarrow()
+    pq.write_table(a_arrow(resultados_df), ruta)
+
+
+def leer_parquet(ruta):
+    _, pq = _pyarrow()
+    return desde_arrow(pq.read_table(ruta))
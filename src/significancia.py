@@ -0,0 +1,193 @@
+"""
+Prueba de significancia por Monte Carlo frente a estrategias aleatorias.
+
+Compara el resultado de la estrategia (frecuencia/recencia) con el de muchas
+secuencias de jugadas al azar sobre el mismo historial: en cada fecha evaluada
+y franja se elige un grupo uniformemente entre los de la misma definición, con
+los mismos costos (`costo_por_numero` x tamaño del grupo) y el mismo
+`premio_por_acierto`. Se informa el percentil de la estrategia dentro de esa
+distribución y un p-valor unilateral (probabilidad de que el azar iguale o
+supere a la estrategia) para el balance neto y la tasa de acierto.
+
+Las simulaciones se hacen por lotes como operaciones de arrays y se reparten
+en un pool de procesos. Cada lote recibe su propia semilla derivada con
+`numpy.random.SeedSequence`, así que el resultado depende solo de la semilla y
+no del número de procesos.
+
+Uso:
+    python -m src.significancia --simulaciones 100000 --procesos 4 --semilla 0
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .almacen_historial import cargar_historial
+from .backtesting import DIAS_MINIMOS_HISTORIAL
+from .backtesting_vectorizado import SIN_DATO, codificar_historial, evaluar_codificado
+from .grupos import compilar_definiciones
+from .modelos_puntuacion import parametros_modelo
+from .resultados_compactos import a_monto
+from .utils import cargar_json
+
+SIMULACIONES_POR_DEFECTO = 100000
+# Elementos (simulaciones x jugadas) por lote: acota la memoria de cada proceso
+ELEMENTOS_POR_LOTE = 8_000_000
+
+COLUMNAS_TABLA = [
+    'estrategia', 'simulaciones', 'balance_neto', 'balance_medio_aleatorio', 'balance_percentil',
+    'balance_p_valor', 'tasa_acierto', 'tasa_media_aleatoria', 'tasa_percentil', 'tasa_p_valor',
+]
+
+# Estado de cada proceso trabajador (se rellena en _inicializar_trabajador)
+_TRABAJADOR = {}
+
+
+def _inicializar_trabajador(grupos_reales, costos, premio_por_acierto):
+    _TRABAJADOR.update(grupos_reales=grupos_reales, costos=costos, premio_por_acierto=premio_por_acierto)
+
+
+def simular_lote(semilla, simulaciones, grupos_reales, costos, premio_por_acierto):
+    """
+    Juega `simulaciones` secuencias aleatorias contra `grupos_reales` (índice
+    del grupo sorteado por jugada, SIN_DATO si no hay). Devuelve los arrays
+    (balance_neto, aciertos) de cada simulación.
+    """
+    azar = np.random.default_rng(semilla)
+    n_grupos = len(costos)
+    tipo = np.uint8 if n_grupos < 255 else np.uint16
+    # SIN_DATO se traduce a un valor que ninguna jugada puede tomar
+    reales = np.where(grupos_reales == SIN_DATO, n_grupos, grupos_reales).astype(tipo)
+
+    jugadas = azar.integers(0, n_grupos, size=(simulaciones, len(reales)), dtype=tipo)
+    aciertos = np.count_nonzero(jugadas == reales, axis=1)
+    # Costo base por jugada más la diferencia de los grupos con otro costo (ninguno si son del mismo tamaño)
+    tipo_costo = np.result_type(np.asarray(costos).dtype, np.int64)  # float64 con costos fraccionarios
+    costo_total = np.full(simulaciones, costos[0] * len(reales), dtype=tipo_costo)
+    for indice, costo in enumerate(costos):
+        if costo != costos[0]:
+            costo_total += np.count_nonzero(jugadas == indice, axis=1) * (costo - costos[0])
+    return aciertos * premio_por_acierto - costo_total, aciertos
+
+
+def _simular_en_trabajador(semilla, simulaciones):
+    return simular_lote(semilla, simulaciones, _TRABAJADOR['grupos_reales'],
+                        _TRABAJADOR['costos'], _TRABAJADOR['premio_por_acierto'])
+
+
+def _percentil_y_p_valor(valor, simulados):
+    """Percentil de `valor` (los empates cuentan la mitad) y p-valor unilateral P(azar >= valor)."""
+    menores = np.count_nonzero(simulados < valor)
+    iguales = np.count_nonzero(simulados == valor)
+    percentil = (menores + iguales / 2) / len(simulados) * 100
+    p_valor = (np.count_nonzero(simulados >= valor) + 1) / (len(simulados) + 1)
+    return float(percentil), float(p_valor)
+
+
+def distribucion_aleatoria(grupos_reales, costos, premio_por_acierto, simulaciones=SIMULACIONES_POR_DEFECTO,
+                           semilla=0, procesos=None):
+    """(balances, aciertos) de `simulaciones` estrategias aleatorias, calculadas por lotes en paralelo."""
+    grupos_reales = np.ascontiguousarray(grupos_reales, dtype=np.int64).ravel()
+    costos = tuple(np.asarray(costos).tolist())  # int o float de Python, sin truncar
+    tamano_lote = max(1, min(simulaciones, ELEMENTOS_POR_LOTE // max(len(grupos_reales), 1)))
+    tamanos = [min(tamano_lote, simulaciones - inicio) for inicio in range(0, simulaciones, tamano_lote)]
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+
+    procesos = min(procesos or os.cpu_count() or 1, len(tamanos))
+    if procesos <= 1:
+        lotes = [simular_lote(s, n, grupos_reales, costos, premio_por_acierto) for s, n in zip(semillas, tamanos)]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=procesos,
+            initializer=_inicializar_trabajador,
+            initargs=(grupos_reales, costos, premio_por_acierto),
+        ) as pool:
+            lotes = list(pool.map(_simular_en_trabajador, semillas, tamanos))
+
+    return np.concatenate([b for b, _ in lotes]), np.concatenate([a for _, a in lotes])
+
+
+def evaluar_significancia(config, historial_completo_df, estrategias=None, simulaciones=SIMULACIONES_POR_DEFECTO,
+                          semilla=0, procesos=None):
+    """
+    Tabla (DataFrame) con una fila por estrategia: su balance neto y tasa de
+    acierto, la media de las estrategias aleatorias, el percentil y el p-valor.
+    """
+    import pandas as pd
+
+    franjas = [franja for franja in config.get("franjas", []) if franja in historial_completo_df.columns]
+    premio_por_acierto = config.get('premio_por_acierto', 5)
+    _, ordinales, matriz = codificar_historial(historial_completo_df, franjas)
+    definiciones = compilar_definiciones(config)
+    estrategias = estrategias or list(definiciones)
+    desconocidas = [nombre for nombre in estrategias if nombre not in definiciones]
+    if desconocidas:
+        raise ValueError(f"Estrategias desconocidas: {', '.join(desconocidas)}")
+
+    filas = []
+    if len(ordinales) < DIAS_MINIMOS_HISTORIAL + 1:
+        return pd.DataFrame(filas, columns=COLUMNAS_TABLA)
+
+    for nombre in estrategias:
+        definicion = definiciones[nombre]
+        grupos_por_dia, _, acierto, ganancia = evaluar_codificado(
+            ordinales, matriz, definicion, premio_por_acierto, **parametros_modelo(config)
+        )
+        jugadas = acierto.size
+        balance = a_monto(ganancia.sum())
+        tasa = acierto.sum() / jugadas * 100
+
+        balances, aciertos = distribucion_aleatoria(
+            grupos_por_dia[DIAS_MINIMOS_HISTORIAL:], definicion.costos, premio_por_acierto,
+            simulaciones, semilla, procesos,
+        )
+        tasas = aciertos / jugadas * 100
+        balance_percentil, balance_p_valor = _percentil_y_p_valor(balance, balances)
+        tasa_percentil, tasa_p_valor = _percentil_y_p_valor(tasa, tasas)
+        filas.append({
+            'estrategia': nombre,
+            'simulaciones': simulaciones,
+            'balance_neto': balance,
+            'balance_medio_aleatorio': float(balances.mean()),
+            'balance_percentil': balance_percentil,
+            'balance_p_valor': balance_p_valor,
+            'tasa_acierto': float(tasa),
+            'tasa_media_aleatoria': float(tasas.mean()),
+            'tasa_percentil': tasa_percentil,
+            'tasa_p_valor': tasa_p_valor,
+        })
+    return pd.DataFrame(filas, columns=COLUMNAS_TABLA)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Significancia de la estrategia frente a jugadas aleatorias.")
+    parser.add_argument('--config', default='data/strategy_configuration.json')
+    parser.add_argument('--historial', default='data/historical_draws.json')
+    parser.add_argument('--estrategias', type=lambda t: [v for v in t.split('|') if v],
+                        help="Nombres de group_definitions separados por '|' (por defecto, todas).")
+    parser.add_argument('--simulaciones', type=int, default=SIMULACIONES_POR_DEFECTO)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--procesos', type=int, default=None)
+    parser.add_argument('--salida', default='outputs/significancia.csv')
+    args = parser.parse_args(argumentos)
+
+    config = cargar_json(args.config)
+    if not config or not os.path.exists(args.historial):
+        print("Error al cargar archivos de configuración o datos. Abortando.")
+        return 1
+
+    print(f"--- {args.simulaciones} simulaciones aleatorias por estrategia (semilla {args.semilla}) ---")
+    tabla = evaluar_significancia(
+        config, cargar_historial(args.historial).a_dataframe(), args.estrategias,
+        args.simulaciones, args.semilla, args.procesos,
+    )
+    os.makedirs(os.path.dirname(args.salida) or '.', exist_ok=True)
+    tabla.to_csv(args.salida, index=False, encoding='utf-8')
+    print(tabla.to_string(index=False))
+    print(f"Resultados guardados en: {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,61 @@
+"""
+Generador de historiales y configuraciones sintéticas.
+
+Produce datos con el mismo formato que `data/historical_draws.json` y
+`data/strategy_configuration.json`, de cualquier tamaño, para benchmarks y
+pruebas de carga. Con la misma semilla el resultado es siempre el mismo.
+"""
+import random
+from datetime import date, timedelta
+
+FRANJAS_BASE = ["Morning", "Matinee", "Afternoon", "Evening", "LateNight"]
+
+
+def nombres_de_franjas(cantidad):
+    if cantidad <= len(FRANJAS_BASE):
+        return FRANJAS_BASE[:cantidad]
+    return FRANJAS_BASE + [f"Franja{i}" for i in range(len(FRANJAS_BASE) + 1, cantidad + 1)]
+
+
+def generar_historial(anios=2, franjas=5, numero_maximo=15, semilla=0, fecha_inicio=date(2000, 1, 1)):
+    """Dict {"YYYY-MM-DD": {franja: número}} con `anios` años de sorteos diarios uniformes en 1..numero_maximo."""
+    azar = random.Random(semilla)
+    nombres = nombres_de_franjas(franjas)
+    historial = {}
+    for desplazamiento in range(int(anios * 365)):
+        fecha = fecha_inicio + timedelta(days=desplazamiento)
+        historial[fecha.isoformat()] = {franja: azar.randint(1, numero_maximo) for franja in nombres}
+    return historial
+
+
+def generar_configuracion(franjas=5, numero_maximo=15, definiciones=2, costo_por_numero=1, premio_por_acierto=5):
+    """
+    Configuración con `definiciones` estrategias: la k-ésima reparte 1..numero_maximo
+    en grupos consecutivos de tamaño k + 2 (el último grupo puede ser más corto).
+    """
+    group_definitions = {}
+    for k in range(definiciones):
+        tamano = min(k + 2, numero_maximo)
+        numeros = list(range(1, numero_maximo + 1))
+        grupos = {}
+        for indice, inicio in enumerate(range(0, numero_maximo, tamano)):
+            grupos[_nombre_de_grupo(indice)] = numeros[inicio:inicio + tamano]
+        group_definitions[f"Grupos de {tamano}"] = grupos
+
+    return {
+        "group_definitions": group_definitions,
+        "costo_por_numero": costo_por_numero,
+        "premio_por_acierto": premio_por_acierto,
+        "rango_numeros": [1, numero_maximo],
+        "franjas": nombres_de_franjas(franjas),
+    }
+
+
+def _nombre_de_grupo(indice):
+    letras = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    nombre = ""
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, len(letras))
+        nombre = letras[resto] + nombre
+    return nombre
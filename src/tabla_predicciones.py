@@ -0,0 +1,130 @@
+"""
+Tabla memoizada de predicciones por fecha.
+
+Guarda {franja: grupo} bajo la clave (fecha, estrategia, modelo y parámetros
+de puntuación, versión del historial), con un máximo de entradas y desalojo de
+las usadas hace más tiempo (LRU). `precalcular` llena de una pasada todo el
+rango del historial más los próximos días con una sola `VentanaDeslizante`
+que avanza día a día, así que cada fecha cuesta lo mismo que un paso del
+backtesting (los demás modelos de puntuación, en un solo lote). Al sincronizar un historial con otra versión (llegaron sorteos
+nuevos) se descartan todas las entradas anteriores.
+
+Pensada para las vistas "Jugada Recomendada" y "Módulo en Vivo" de la app:
+interactuar con los widgets vuelve a leer la tabla sin recalcular nada.
+"""
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+from .backtesting_vectorizado import predecir_fechas
+from .generator import generar_predicciones_del_dia
+from .grupos import compilar_definiciones
+from .intelligence_analyzer import MODELO_POR_DEFECTO, VentanaDeslizante, nombre_modelo, parametros_puntuacion
+from .modelos_puntuacion import parametros_modelo
+
+CAPACIDAD_POR_DEFECTO = 20000
+DIAS_ADELANTADOS = 7
+
+
+class TablaPredicciones:
+    """Predicciones memoizadas por (fecha, estrategia, parámetros, versión del historial)."""
+
+    def __init__(self, config, definiciones=None, capacidad=CAPACIDAD_POR_DEFECTO):
+        self.franjas = config.get("franjas", ["Morning", "Matinee", "Afternoon", "Evening", "LateNight"])
+        self.config = config
+        self.parametros = parametros_puntuacion(config)
+        self._clave_parametros = tuple(sorted(parametros_modelo(config).items()))
+        self.definiciones = definiciones if definiciones is not None else compilar_definiciones(config)
+        self.capacidad = capacidad
+        self.historial_df = None
+        self.version = None
+        self.aciertos = 0
+        self.fallos = 0
+        self._entradas = OrderedDict()
+        self._candado = threading.Lock()
+
+    def _clave(self, fecha, estrategia):
+        return (fecha, estrategia, self._clave_parametros, self.version)
+
+    def _guardar(self, clave, prediccion):
+        self._entradas[clave] = prediccion
+        self._entradas.move_to_end(clave)
+        while len(self._entradas) > self.capacidad:
+            self._entradas.popitem(last=False)
+
+    def sincronizar(self, historial_df, version):
+        """
+        Usa `historial_df` (identificado por `version`, p. ej. su huella). Si la
+        versión cambió, vacía la tabla y devuelve True.
+        """
+        with self._candado:
+            if version == self.version:
+                return False
+            self.historial_df = historial_df
+            self.version = version
+            self._entradas.clear()
+            return True
+
+    def prediccion(self, fecha, estrategia):
+        """{franja: grupo} para `fecha`; solo se calcula si no está en la tabla."""
+        with self._candado:
+            clave = self._clave(fecha, estrategia)
+            prediccion = self._entradas.get(clave)
+            if prediccion is not None:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return dict(prediccion)
+
+            self.fallos += 1
+            prediccion = generar_predicciones_del_dia(self.historial_df, fecha, self.config, self.definiciones[estrategia])
+            self._guardar(clave, prediccion)
+            return dict(prediccion)
+
+    def precalcular(self, estrategia, desde=None, hasta=None, dias_adelante=DIAS_ADELANTADOS):
+        """
+        Llena la tabla para cada día entre `desde` y `hasta` (por defecto, del
+        primer día del historial al último más `dias_adelante`). Devuelve la
+        cantidad de fechas calculadas.
+        """
+        with self._candado:
+            historial = self.historial_df.sort_values(by='fecha')
+            if historial.empty:
+                return 0
+            desde = desde or historial['fecha'].iloc[0]
+            hasta = hasta or historial['fecha'].iloc[-1] + timedelta(days=dias_adelante)
+            if nombre_modelo(self.config) != MODELO_POR_DEFECTO:
+                return self._precalcular_por_lotes(estrategia, historial, desde, hasta)
+
+            ventana = VentanaDeslizante(self.franjas, self.definiciones[estrategia], **self.parametros)
+            columnas = [franja for franja in self.franjas if franja in historial.columns]
+            inicio_ventana = desde - timedelta(days=ventana.dias_ventana)
+            filas = iter(historial.loc[historial['fecha'] >= inicio_ventana, ['fecha'] + columnas].to_dict('records'))
+            siguiente = next(filas, None)
+
+            calculadas = 0
+            fecha = desde
+            while fecha <= hasta:
+                while siguiente is not None and siguiente['fecha'] < fecha:
+                    ventana.agregar_dia(siguiente.pop('fecha'), siguiente)
+                    siguiente = next(filas, None)
+                clave = self._clave(fecha, estrategia)
+                if clave not in self._entradas:
+                    self._guardar(clave, ventana.predecir(fecha))
+                    calculadas += 1
+                fecha += timedelta(days=1)
+            return calculadas
+
+    def _precalcular_por_lotes(self, estrategia, historial, desde, hasta):
+        """Modelos sin ventana incremental: todas las fechas del rango en un solo lote."""
+        fechas = [desde + timedelta(days=k) for k in range((hasta - desde).days + 1)]
+        fechas = [fecha for fecha in fechas if self._clave(fecha, estrategia) not in self._entradas]
+        if not fechas:
+            return 0
+        predicciones = predecir_fechas(self.config, historial, self.definiciones[estrategia], fechas)
+        for fecha in fechas:
+            self._guardar(self._clave(fecha, estrategia), predicciones[fecha])
+        return len(fechas)
+
+    def estadisticas(self):
+        return {'entradas': len(self._entradas), 'capacidad': self.capacidad,
+                'aciertos': self.aciertos, 'fallos': self.fallos, 'version': self.version}
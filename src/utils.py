@@ -11,4 +11,26 @@ def cargar_json(ruta_archivo):
         return None
     except json.JSONDecodeError:
         print(f"Error: El archivo en {ruta_archivo} no es un JSON válido.")
-        return None
\ No newline at end of file
+        return None
+
+def historial_a_dataframe(historial_sorteos):
+    """
+    Convierte el dict {"YYYY-MM-DD": {franja: número}} en un DataFrame con una
+    columna `fecha` (datetime.date) y una columna por franja, ordenado por fecha.
+    """
+    import pandas as pd
+    from datetime import datetime
+
+    historial_list = []
+    for fecha_str, franjas in (historial_sorteos or {}).items():
+        try:
+            fila = {'fecha': datetime.strptime(fecha_str, "%Y-%m-%d").date()}
+            fila.update(franjas)
+            historial_list.append(fila)
+        except (ValueError, TypeError):
+            continue
+
+    df = pd.DataFrame(historial_list)
+    if df.empty:
+        return pd.DataFrame(columns=['fecha'])
+    return df.sort_values(by='fecha', ascending=True).reset_index(drop=True)
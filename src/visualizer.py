@@ -1,28 +1,229 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+"""
+Gráficos de los resultados del backtesting.
+
+`renderizar_graficos` escribe directamente a archivos (backend Agg, sin
+ventana) el balance acumulado y los heatmaps de tasa de acierto por franja y
+por grupo de un DataFrame de resultados. Las series largas se resumen por
+semana o por mes, así que el tamaño del gráfico y el tiempo de dibujo no
+crecen con los años de historial. `renderizar_lote` dibuja los gráficos de
+muchas estrategias en paralelo (un proceso por estrategia), pensado para el
+reporte nocturno:
+
+    python -m src.visualizer --salida outputs/graficos --procesos 4
+"""
+# pandas, matplotlib y seaborn se importan al usar cada función: importar este
+# módulo no debe encarecer el arranque de quien no dibuja gráficos.
+import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+FORMATO_IMAGEN = "png"
+DPI = 100
+# Con más celdas que esto, el heatmap no escribe el valor en cada una
+MAXIMO_CELDAS_ANOTADAS = 200
+MAXIMO_ETIQUETAS_EJE = 12
+
+
+def _pyplot():
+    """pyplot con el backend no interactivo Agg (no necesita pantalla)."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _guardar_o_mostrar(plt, figura, ruta):
+    if ruta is None:
+        plt.show()
+        return None
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    figura.savefig(ruta, dpi=DPI)
+    plt.close(figura)
+    return ruta
+
 
 def exportar_csv(resultados, ruta="outputs/summary_report.csv"):
+    import pandas as pd
+
     df = pd.DataFrame(resultados)
     df.to_csv(ruta, index=False)
     print(f"📁 Resultados guardados en {ruta}")
 
-def grafico_ganancia_diaria(resultados):
+def grafico_ganancia_diaria(resultados, ruta=None):
+    import pandas as pd
+    import seaborn as sns
+    if ruta is not None:
+        plt = _pyplot()
+    else:
+        import matplotlib.pyplot as plt
+
     df = pd.DataFrame(resultados)
-    plt.figure(figsize=(12, 6))
+    figura = plt.figure(figsize=(12, 6))
     sns.lineplot(x="fecha", y="ganancia", data=df, marker="o")
     plt.xticks(rotation=45)
     plt.title("📈 Ganancia Diaria")
     plt.tight_layout()
-    plt.show()
+    return _guardar_o_mostrar(plt, figura, ruta)
+
+def heatmap_aciertos(resultados, ruta=None):
+    import pandas as pd
+    import seaborn as sns
+    if ruta is not None:
+        plt = _pyplot()
+    else:
+        import matplotlib.pyplot as plt
 
-def heatmap_aciertos(resultados):
     df = pd.DataFrame(resultados)
     df["aciertos"] = df["aciertos"].apply(len)
-    plt.figure(figsize=(10, 1))
-    sns.heatmap([df["aciertos"].tolist()], cmap="Blues", annot=True, cbar=False)
+    figura = plt.figure(figsize=(min(max(10, len(df) * 0.1), 30), 1))
+    sns.heatmap([df["aciertos"].tolist()], cmap="Blues", annot=len(df) <= MAXIMO_CELDAS_ANOTADAS, cbar=False)
     plt.title("🔍 Heatmap de Aciertos")
     plt.yticks([])
     plt.xticks(rotation=90)
     plt.tight_layout()
-    plt.show()
+    return _guardar_o_mostrar(plt, figura, ruta)
+
+
+def frecuencia_automatica(resultados_df):
+    """'D' hasta 3 meses de resultados, 'W' hasta 2 años y 'M' para períodos más largos."""
+    if resultados_df.empty:
+        return "D"
+    dias = (resultados_df["fecha"].iloc[-1] - resultados_df["fecha"].iloc[0]).days
+    return "D" if dias <= 92 else ("W" if dias <= 731 else "M")
+
+
+def balance_por_periodo(resultados_df, frecuencia="W"):
+    """Serie del balance acumulado al cierre de cada día, semana o mes."""
+    from .indice_metricas import IndiceMetricas
+
+    return IndiceMetricas(resultados_df).serie(frecuencia)["balance_acumulado"]
+
+
+def tasa_por_periodo(resultados_df, por="franja", frecuencia="W"):
+    """DataFrame (franjas o grupos x períodos) con la tasa de acierto en %; vacío donde no se jugó."""
+    import pandas as pd
+    from .indice_metricas import FRECUENCIAS
+
+    if frecuencia not in FRECUENCIAS:
+        raise ValueError(f"Frecuencia desconocida: {frecuencia!r} (usa 'D', 'W' o 'M').")
+    periodo = pd.Grouper(key="fecha", freq=FRECUENCIAS[frecuencia], label="left", closed="left")
+    tasa = resultados_df.groupby([periodo, por], observed=True)["acierto"].mean() * 100
+    return tasa.unstack("fecha")
+
+
+def _ejes_de_fechas(eje, fechas, frecuencia):
+    paso = max(1, -(-len(fechas) // MAXIMO_ETIQUETAS_EJE))
+    formato = "%Y-%m" if frecuencia == "M" else "%Y-%m-%d"
+    eje.set_xticks(range(0, len(fechas), paso))
+    eje.set_xticklabels([fecha.strftime(formato) for fecha in fechas[::paso]], rotation=45, ha="right")
+
+
+def grafico_balance_acumulado(resultados_df, ruta, frecuencia=None, titulo="Balance acumulado"):
+    """Línea del balance acumulado, resumida por `frecuencia` (automática si es None). Devuelve `ruta`."""
+    frecuencia = frecuencia or frecuencia_automatica(resultados_df)
+    balance = balance_por_periodo(resultados_df, frecuencia)
+    plt = _pyplot()
+
+    figura, eje = plt.subplots(figsize=(12, 5))
+    eje.plot(balance.index, balance.to_numpy(), linewidth=1.5)
+    eje.axhline(0, color="gray", linewidth=0.8)
+    eje.set_title(titulo)
+    eje.set_ylabel("Balance ($)")
+    figura.autofmt_xdate()
+    figura.tight_layout()
+    return _guardar_o_mostrar(plt, figura, ruta)
+
+
+def heatmap_tasa_aciertos(resultados_df, ruta, por="franja", frecuencia=None, titulo=None):
+    """Heatmap de la tasa de acierto por franja o grupo (filas) y período (columnas). Devuelve `ruta`."""
+    frecuencia = frecuencia or frecuencia_automatica(resultados_df)
+    tasa = tasa_por_periodo(resultados_df, por, frecuencia)
+    plt = _pyplot()
+
+    ancho = min(max(6.0, 2 + tasa.shape[1] * 0.25), 24.0)
+    figura, eje = plt.subplots(figsize=(ancho, 1.5 + 0.4 * tasa.shape[0]))
+    imagen = eje.imshow(tasa.to_numpy(dtype=float), aspect="auto", cmap="Blues", vmin=0, vmax=100,
+                        interpolation="nearest")
+    if tasa.size <= MAXIMO_CELDAS_ANOTADAS:
+        for fila, columna in zip(*tasa.notna().to_numpy().nonzero()):
+            eje.text(columna, fila, f"{tasa.iat[fila, columna]:.0f}", ha="center", va="center", fontsize=7)
+    eje.set_yticks(range(tasa.shape[0]))
+    eje.set_yticklabels([str(clave) for clave in tasa.index])
+    _ejes_de_fechas(eje, list(tasa.columns), frecuencia)
+    figura.colorbar(imagen, ax=eje, label="Tasa de acierto (%)")
+    eje.set_title(titulo or f"Tasa de acierto por {por}")
+    figura.tight_layout()
+    return _guardar_o_mostrar(plt, figura, ruta)
+
+
+def _nombre_archivo(texto):
+    return re.sub(r"[^0-9A-Za-z]+", "_", texto).strip("_").lower() or "estrategia"
+
+
+def renderizar_graficos(resultados_df, directorio, nombre="", frecuencia=None):
+    """
+    Escribe en `directorio` el balance acumulado y los heatmaps por franja y
+    por grupo de un DataFrame de resultados. Devuelve las rutas escritas.
+    """
+    frecuencia = frecuencia or frecuencia_automatica(resultados_df)
+    prefijo = os.path.join(directorio, _nombre_archivo(nombre) + "_" if nombre else "")
+    sufijo = f"_{frecuencia.lower()}.{FORMATO_IMAGEN}"
+    return [
+        grafico_balance_acumulado(resultados_df, f"{prefijo}balance{sufijo}", frecuencia,
+                                  f"Balance acumulado {nombre}".strip()),
+        heatmap_tasa_aciertos(resultados_df, f"{prefijo}aciertos_franja{sufijo}", "franja", frecuencia),
+        heatmap_tasa_aciertos(resultados_df, f"{prefijo}aciertos_grupo{sufijo}", "grupo_predicho", frecuencia,
+                              "Tasa de acierto por grupo"),
+    ]
+
+
+def _renderizar_estrategia(argumentos):
+    nombre, resultados_df, directorio, frecuencia = argumentos
+    return nombre, renderizar_graficos(resultados_df, directorio, nombre, frecuencia)
+
+
+def renderizar_lote(resultados_por_estrategia, directorio, frecuencia=None, procesos=None):
+    """
+    Gráficos de varias estrategias ({nombre: DataFrame de resultados}) en
+    paralelo. Devuelve {nombre: [rutas]}.
+    """
+    tareas = [(nombre, df, directorio, frecuencia) for nombre, df in resultados_por_estrategia.items() if not df.empty]
+    procesos = min(procesos or os.cpu_count() or 1, len(tareas))
+    if procesos <= 1:
+        return dict(map(_renderizar_estrategia, tareas))
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        return dict(pool.map(_renderizar_estrategia, tareas))
+
+
+def main(argumentos=None):
+    from .almacen_historial import cargar_historial
+    from .comparacion import comparar_estrategias
+    from .utils import cargar_json
+
+    parser = argparse.ArgumentParser(description="Gráficos del backtesting de todas las estrategias, en archivos.")
+    parser.add_argument('--config', default='data/strategy_configuration.json')
+    parser.add_argument('--historial', default='data/historical_draws.json')
+    parser.add_argument('--salida', default='outputs/graficos')
+    parser.add_argument('--frecuencia', choices=('D', 'W', 'M'), help="Resumen por día, semana o mes (por defecto, según el largo).")
+    parser.add_argument('--procesos', type=int, default=None)
+    args = parser.parse_args(argumentos)
+
+    config = cargar_json(args.config)
+    if not config or not os.path.exists(args.historial):
+        print("Error al cargar archivos de configuración o datos. Abortando.")
+        return 1
+
+    _, detalles = comparar_estrategias(config, cargar_historial(args.historial).a_dataframe())
+    try:
+        rutas = renderizar_lote(detalles, args.salida, args.frecuencia, args.procesos)
+    except ImportError as error:
+        print(f"Error: los gráficos requieren matplotlib ({error}).")
+        return 2
+    for nombre, archivos in rutas.items():
+        print(f"{nombre}: {', '.join(archivos)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
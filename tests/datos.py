@@ -0,0 +1,26 @@
+"""Datos compartidos por los tests: configuración del repo e historiales de prueba."""
+from datetime import date, timedelta
+import random
+
+import pandas as pd
+
+from src.utils import cargar_json, historial_a_dataframe
+
+CONFIG = cargar_json("data/strategy_configuration.json")
+
+
+def historial_desde_json(ruta="data/historical_draws.json"):
+    return historial_a_dataframe(cargar_json(ruta))
+
+
+def historial_sintetico(dias=200, semilla=7):
+    """Historial con huecos de fechas y algún valor fuera de los grupos."""
+    azar = random.Random(semilla)
+    filas = []
+    fecha = date(2024, 1, 1)
+    for _ in range(dias):
+        fecha += timedelta(days=azar.choice([1, 1, 1, 2, 5]))
+        fila = {"fecha": fecha}
+        fila.update({franja: azar.randint(1, 16) for franja in CONFIG["franjas"]})
+        filas.append(fila)
+    return pd.DataFrame(filas)
@@ -0,0 +1,115 @@
+import json
+import os
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from src.almacen_historial import agregar_sorteos, cargar_historial
+from src.utils import cargar_json, historial_a_dataframe
+
+HISTORIAL = cargar_json("data/historical_draws.json")
+FECHAS = sorted(HISTORIAL)
+
+
+def escribir(ruta, fechas, cambios=None):
+    contenido = {fecha: HISTORIAL[fecha] for fecha in fechas}
+    contenido.update(cambios or {})
+    ruta.write_text(json.dumps(contenido), encoding="utf-8")
+    return contenido
+
+
+def test_importa_y_coincide_con_el_json(tmp_path):
+    ruta = tmp_path / "sorteos.json"
+    contenido = escribir(ruta, FECHAS)
+
+    almacen = cargar_historial(str(ruta))
+
+    assert len(almacen) == len(FECHAS)
+    pd.testing.assert_frame_equal(almacen.a_dataframe(), historial_a_dataframe(contenido))
+
+
+def test_crecimiento_al_final_se_anade_sin_reescribir(tmp_path):
+    ruta = tmp_path / "sorteos.json"
+    escribir(ruta, FECHAS[:700])
+    almacen = cargar_historial(str(ruta))
+    columna = os.path.join(almacen.directorio, "fecha.i32")
+    inodo = os.stat(columna).st_ino
+
+    contenido = escribir(ruta, FECHAS)
+    almacen = cargar_historial(str(ruta))
+
+    assert os.stat(columna).st_ino == inodo
+    pd.testing.assert_frame_equal(almacen.a_dataframe(), historial_a_dataframe(contenido))
+
+
+def test_edicion_del_pasado_reconstruye(tmp_path):
+    ruta = tmp_path / "sorteos.json"
+    escribir(ruta, FECHAS)
+    cargar_historial(str(ruta))
+
+    editado = {**HISTORIAL[FECHAS[3]], "Morning": 15 if HISTORIAL[FECHAS[3]]["Morning"] != 15 else 1}
+    contenido = escribir(ruta, FECHAS, {FECHAS[3]: editado})
+    almacen = cargar_historial(str(ruta))
+
+    pd.testing.assert_frame_equal(almacen.a_dataframe(), historial_a_dataframe(contenido))
+
+
+def test_reconstruccion_publica_una_version_nueva_sin_tocar_la_abierta(tmp_path):
+    ruta = tmp_path / "sorteos.json"
+    escribir(ruta, FECHAS[:50])
+    abierto = cargar_historial(str(ruta))
+    antes = abierto.a_dataframe()
+
+    # Reconstrucciones (edición del pasado) mientras `abierto` sigue mapeado
+    for numero in (1, 2):
+        escribir(ruta, FECHAS[:50], {FECHAS[0]: {**HISTORIAL[FECHAS[0]], "Morning": numero}})
+        nuevo = cargar_historial(str(ruta))
+        assert nuevo.a_dataframe().loc[0, "Morning"] == numero
+
+    pd.testing.assert_frame_equal(abierto.a_dataframe(), antes)
+    assert os.path.islink(tmp_path / "sorteos.columnar")
+    versiones = [nombre for nombre in os.listdir(tmp_path) if nombre.startswith("sorteos.columnar.")]
+    assert versiones == [os.path.basename(os.path.realpath(tmp_path / "sorteos.columnar"))]
+
+
+def test_valores_no_enteros_quedan_sin_dato(tmp_path):
+    ruta = tmp_path / "sorteos.json"
+    contenido = escribir(ruta, FECHAS[:10], {FECHAS[2]: {**HISTORIAL[FECHAS[2]], "Morning": 3.5}})
+    almacen = cargar_historial(str(ruta))
+
+    df = almacen.a_dataframe()
+    assert pd.isna(df.loc[2, "Morning"])
+    assert (almacen.matriz()[2] == -1).sum() == 1
+    assert df.loc[3, "Morning"] == contenido[FECHAS[3]]["Morning"]
+
+
+def test_agregar_sorteos_reconcilia_un_almacen_desactualizado(tmp_path):
+    ruta = tmp_path / "sorteos.json"
+    escribir(ruta, FECHAS[:20])
+    viejo = cargar_historial(str(ruta))
+    # El JSON se edita después de cargar el almacén
+    contenido = escribir(ruta, FECHAS[:20], {FECHAS[0]: {**HISTORIAL[FECHAS[0]], "Morning": 99}})
+
+    nuevo_dia = (date.fromisoformat(FECHAS[19]) + timedelta(days=1)).toordinal()
+    almacen = agregar_sorteos(str(ruta), [(nuevo_dia, {"Morning": 4})], viejo)
+    contenido[date.fromordinal(nuevo_dia).isoformat()] = {"Morning": 4}
+
+    pd.testing.assert_frame_equal(almacen.a_dataframe(), historial_a_dataframe(contenido))
+    pd.testing.assert_frame_equal(cargar_historial(str(ruta)).a_dataframe(), historial_a_dataframe(contenido))
+    # Reintentar el mismo guardado no falla ni lo duplica
+    assert len(agregar_sorteos(str(ruta), [(nuevo_dia, {"Morning": 4})], almacen)) == 21
+
+
+def test_numeros_fuera_de_rango_se_rechazan_sin_desbordarse(tmp_path):
+    ruta = tmp_path / "sorteos.json"
+    escribir(ruta, FECHAS[:10], {FECHAS[4]: {**HISTORIAL[FECHAS[4]], "Morning": 40000}})
+    with pytest.raises(ValueError, match="40000"):
+        cargar_historial(str(ruta))
+
+    escribir(ruta, FECHAS[:10])
+    almacen = cargar_historial(str(ruta))
+    nuevo_dia = (date.fromisoformat(FECHAS[9]) + timedelta(days=1)).toordinal()
+    with pytest.raises(ValueError, match="fuera del rango"):
+        agregar_sorteos(str(ruta), [(nuevo_dia, {"Morning": 70000})], almacen)
+    assert len(cargar_historial(str(ruta))) == 10
@@ -0,0 +1,76 @@
+import pandas as pd
+import pytest
+
+from src.backtesting import ejecutar_backtesting, ejecutar_backtesting_incremental
+from src.backtesting_vectorizado import ejecutar_backtesting_vectorizado
+
+from tests.datos import CONFIG, historial_desde_json, historial_sintetico
+
+
+@pytest.mark.parametrize("estrategia", list(CONFIG["group_definitions"]))
+@pytest.mark.parametrize("historial_df", [historial_desde_json(), historial_sintetico()], ids=["real", "sintetico"])
+def test_vectorizado_coincide_con_evaluar_dia_completo(estrategia, historial_df):
+    grupos_activos = CONFIG["group_definitions"][estrategia]
+
+    esperado = ejecutar_backtesting(CONFIG, historial_df, grupos_activos)
+    obtenido = ejecutar_backtesting_vectorizado(CONFIG, historial_df, grupos_activos)
+
+    assert len(esperado) > 0
+    pd.testing.assert_frame_equal(obtenido, esperado, check_dtype=False)
+
+
+@pytest.mark.parametrize("parametros", [
+    {"dias_ventana": 10, "peso_frecuencia": 0.5, "peso_recencia": 0.5},
+    {"dias_ventana": 60, "peso_frecuencia": 0.9, "peso_recencia": 0.1},
+])
+def test_vectorizado_coincide_con_parametros_de_puntuacion(parametros):
+    config = {**CONFIG, "parametros_puntuacion": parametros}
+    historial_df = historial_sintetico()
+    grupos_activos = CONFIG["group_definitions"]["Grupos de 3 (A, B, C, D, E)"]
+
+    esperado = ejecutar_backtesting(config, historial_df, grupos_activos)
+    obtenido = ejecutar_backtesting_vectorizado(config, historial_df, grupos_activos)
+
+    pd.testing.assert_frame_equal(obtenido, esperado, check_dtype=False)
+
+
+def test_historial_corto_devuelve_vacio():
+    historial_df = historial_sintetico(dias=30)
+    grupos_activos = next(iter(CONFIG["group_definitions"].values()))
+
+    assert ejecutar_backtesting(CONFIG, historial_df, grupos_activos).empty
+    assert ejecutar_backtesting_vectorizado(CONFIG, historial_df, grupos_activos).empty
+
+
+def test_incremental_solo_evalua_las_fechas_nuevas():
+    historial_df = historial_desde_json()
+    grupos_activos = CONFIG["group_definitions"]["Grupos de 5 (A, B, C)"]
+    esperado = ejecutar_backtesting(CONFIG, historial_df, grupos_activos)
+
+    _, punto_control = ejecutar_backtesting_incremental(CONFIG, historial_df.iloc[:700], grupos_activos)
+    resultados, punto_control = ejecutar_backtesting_incremental(CONFIG, historial_df, grupos_activos, punto_control)
+
+    pd.testing.assert_frame_equal(resultados, esperado, check_dtype=False)
+    assert punto_control["filas"] == len(historial_df)
+
+
+def test_incremental_recalcula_si_se_edita_el_pasado():
+    historial_df = historial_desde_json()
+    grupos_activos = CONFIG["group_definitions"]["Grupos de 5 (A, B, C)"]
+    _, punto_control = ejecutar_backtesting_incremental(CONFIG, historial_df.iloc[:700], grupos_activos)
+
+    editado = historial_df.copy()
+    editado.loc[100, "Evening"] = editado.loc[100, "Evening"] % 15 + 1
+    resultados, _ = ejecutar_backtesting_incremental(CONFIG, editado, grupos_activos, punto_control)
+
+    pd.testing.assert_frame_equal(resultados, ejecutar_backtesting(CONFIG, editado, grupos_activos), check_dtype=False)
+
+
+def test_valores_no_enteros_no_pertenecen_a_ningun_grupo():
+    historial_df = historial_sintetico(90).astype({franja: float for franja in CONFIG["franjas"]})
+    historial_df.loc[40:60, "Morning"] = historial_df.loc[40:60, "Morning"] + 0.5
+    grupos_activos = CONFIG["group_definitions"]["Grupos de 5 (A, B, C)"]
+
+    esperado = ejecutar_backtesting(CONFIG, historial_df, grupos_activos)
+    obtenido = ejecutar_backtesting_vectorizado(CONFIG, historial_df, grupos_activos)
+    pd.testing.assert_frame_equal(obtenido, esperado, check_dtype=False)
@@ -0,0 +1,53 @@
+from src.barrido import ejecutar_barrido, generar_combinaciones
+from src.backtesting import ejecutar_backtesting
+
+from tests.datos import CONFIG, historial_desde_json
+
+ESPACIO = {"dias_ventana": [20, 30], "peso_frecuencia": [0.7], "peso_recencia": [0.3, 0.5]}
+
+
+def test_barrido_coincide_con_backtesting_y_se_reanuda(tmp_path):
+    historial_df = historial_desde_json()
+    combinaciones = generar_combinaciones(list(CONFIG["group_definitions"]), ESPACIO)
+    checkpoint = tmp_path / "barrido.jsonl"
+
+    tabla = ejecutar_barrido(CONFIG, historial_df, combinaciones, procesos=2, ruta_checkpoint=str(checkpoint))
+
+    assert len(tabla) == len(combinaciones)
+    assert list(tabla["balance_neto"]) == sorted(tabla["balance_neto"], reverse=True)
+
+    fila = tabla[(tabla["dias_ventana"] == 30) & (tabla["peso_recencia"] == 0.3)].iloc[0]
+    detalle = ejecutar_backtesting(CONFIG, historial_df, CONFIG["group_definitions"][fila["estrategia"]])
+    assert fila["balance_neto"] == detalle["ganancia_franja"].sum()
+
+    # Al reanudar no se recalcula nada: el checkpoint no crece
+    lineas = checkpoint.read_text(encoding="utf-8").splitlines()
+    reanudada = ejecutar_barrido(CONFIG, historial_df, combinaciones, procesos=2, ruta_checkpoint=str(checkpoint))
+    assert checkpoint.read_text(encoding="utf-8").splitlines() == lineas
+    assert reanudada.equals(tabla)
+
+
+def test_modo_aleatorio_es_reproducible():
+    estrategias = list(CONFIG["group_definitions"])
+    assert generar_combinaciones(estrategias, modo="aleatorio", muestras=5, semilla=3) == \
+        generar_combinaciones(estrategias, modo="aleatorio", muestras=5, semilla=3)
+
+
+def test_checkpoint_no_se_reutiliza_si_cambia_el_premio_o_los_grupos(tmp_path):
+    historial_df = historial_desde_json()
+    estrategia = "Grupos de 5 (A, B, C)"
+    combinaciones = generar_combinaciones([estrategia], {"dias_ventana": [30], "peso_frecuencia": [0.7],
+                                                         "peso_recencia": [0.3]})
+    checkpoint = str(tmp_path / "barrido.jsonl")
+    base = ejecutar_barrido(CONFIG, historial_df, combinaciones, procesos=1, ruta_checkpoint=checkpoint)
+
+    con_premio = {**CONFIG, "premio_por_acierto": 50}
+    tabla = ejecutar_barrido(con_premio, historial_df, combinaciones, procesos=1, ruta_checkpoint=checkpoint)
+    fresca = ejecutar_barrido(con_premio, historial_df, combinaciones, procesos=1)
+    assert list(tabla["balance_neto"]) == list(fresca["balance_neto"]) != list(base["balance_neto"])
+
+    grupos = {"A": [1, 2, 3, 4, 5, 6], "B": [7, 8, 9, 10], "C": [11, 12, 13, 14, 15]}
+    otros_grupos = {**CONFIG, "group_definitions": {estrategia: grupos}}
+    tabla = ejecutar_barrido(otros_grupos, historial_df, combinaciones, procesos=1, ruta_checkpoint=checkpoint)
+    assert list(tabla["balance_neto"]) == \
+        list(ejecutar_barrido(otros_grupos, historial_df, combinaciones, procesos=1)["balance_neto"])
@@ -0,0 +1,15 @@
+from benchmarks.ejecutar_benchmarks import comparar
+
+
+def medicion(nombre, segundos):
+    return {"nombre": nombre, "anios": 1, "segundos": segundos}
+
+
+def test_comparar_detecta_regresiones_por_encima_del_umbral():
+    base = {"resultados": [medicion("backtesting", 0.100), medicion("carga", 0.0010)]}
+    actual = {"resultados": [medicion("backtesting", 0.150), medicion("carga", 0.0020)]}
+
+    regresiones = comparar(actual, base, umbral=0.25)
+
+    # "carga" empeora un 100 % pero por debajo del ruido mínimo
+    assert [r["nombre"] for r in regresiones] == ["backtesting"]
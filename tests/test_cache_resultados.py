@@ -0,0 +1,85 @@
+import os
+
+import pandas as pd
+
+from src.backtesting import ejecutar_backtesting
+from src.cache_resultados import CacheResultados, backtesting_con_cache, clave_backtesting, huella_dataframe
+
+from tests.datos import CONFIG, historial_desde_json
+
+GRUPOS = CONFIG["group_definitions"]["Grupos de 3 (A, B, C, D, E)"]
+
+
+def test_segunda_llamada_no_recalcula(tmp_path):
+    cache = CacheResultados(str(tmp_path))
+    historial_df = historial_desde_json()
+    llamadas = []
+
+    def motor(config, historial, grupos):
+        llamadas.append(1)
+        return pd.DataFrame({"ganancia_franja": [1, 2, 3]})
+
+    primero = backtesting_con_cache(CONFIG, historial_df, GRUPOS, cache=cache, motor=motor)
+    segundo = backtesting_con_cache(CONFIG, historial_df, GRUPOS, cache=CacheResultados(str(tmp_path)), motor=motor)
+
+    assert len(llamadas) == 1
+    pd.testing.assert_frame_equal(primero, segundo)
+
+
+def test_la_clave_cambia_con_configuracion_e_historial():
+    historial_df = historial_desde_json()
+    huella = huella_dataframe(historial_df)
+    base = clave_backtesting(CONFIG, GRUPOS, huella)
+
+    editado = historial_df.copy()
+    editado.loc[0, "Morning"] = editado.loc[0, "Morning"] % 15 + 1
+
+    assert base == clave_backtesting(dict(CONFIG), dict(GRUPOS), huella)
+    assert base != clave_backtesting({**CONFIG, "premio_por_acierto": 6}, GRUPOS, huella)
+    assert base != clave_backtesting({**CONFIG, "parametros_puntuacion": {"dias_ventana": 20}}, GRUPOS, huella)
+    assert base != clave_backtesting(CONFIG, CONFIG["group_definitions"]["Grupos de 5 (A, B, C)"], huella)
+    assert base != clave_backtesting(CONFIG, GRUPOS, huella_dataframe(editado))
+
+
+def test_desaloja_las_entradas_menos_usadas(tmp_path):
+    cache = CacheResultados(str(tmp_path), tamano_maximo_mb=0.001)
+    for clave in ("a", "b", "c"):
+        cache.guardar(clave, b"x" * 400)
+        os.utime(tmp_path / f"{clave}.pkl", ns=(0, {"a": 1, "b": 2, "c": 3}[clave] * 10**9))
+    cache.desalojar()
+
+    assert cache.obtener("a") is None
+    assert cache.obtener("c") == b"x" * 400
+
+
+def test_historial_que_crece_al_final_no_recalcula_desde_cero(tmp_path):
+    cache = CacheResultados(str(tmp_path))
+    historial_df = historial_desde_json()
+    llamadas = []
+
+    def motor(config, historial, grupos):
+        llamadas.append(len(historial))
+        return ejecutar_backtesting(config, historial, grupos)
+
+    backtesting_con_cache(CONFIG, historial_df.iloc[:700], GRUPOS, cache=cache, motor=motor)
+    resultado = backtesting_con_cache(CONFIG, historial_df, GRUPOS, cache=cache, motor=motor)
+
+    assert llamadas == [700]
+    pd.testing.assert_frame_equal(resultado, ejecutar_backtesting(CONFIG, historial_df, GRUPOS), check_dtype=False)
+
+
+def test_huella_del_almacen_por_bloques_coincide_con_la_del_dataframe(tmp_path):
+    import json
+
+    from src.almacen_historial import cargar_historial
+    from src.backtesting import preparar_historial
+    from src.cache_resultados import huella_almacen
+
+    historial = json.loads(open("data/historical_draws.json", encoding="utf-8").read())
+    fecha = sorted(historial)[-3]
+    historial[fecha] = {franja: numero for franja, numero in historial[fecha].items() if franja != "Evening"}
+    (tmp_path / "h.json").write_text(json.dumps(historial), encoding="utf-8")
+    almacen = cargar_historial(str(tmp_path / "h.json"))
+
+    esperado = huella_dataframe(preparar_historial(almacen.a_dataframe()))
+    assert huella_almacen(almacen, tamano_bloque=100) == esperado
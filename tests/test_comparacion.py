@@ -0,0 +1,41 @@
+import pandas as pd
+
+from src.backtesting import ejecutar_backtesting
+from src.comparacion import comparar_estrategias
+from src.sintetico import generar_configuracion, generar_historial
+from src.utils import historial_a_dataframe
+from tests.datos import CONFIG, historial_sintetico
+
+
+def test_una_pasada_coincide_con_un_backtesting_por_estrategia():
+    historial_df = historial_sintetico(dias=150)
+
+    resumen, detalles = comparar_estrategias(CONFIG, historial_df)
+
+    assert list(resumen["estrategia"]) == list(CONFIG["group_definitions"])
+    for nombre, grupos in CONFIG["group_definitions"].items():
+        esperado = ejecutar_backtesting(CONFIG, historial_df, grupos)
+        pd.testing.assert_frame_equal(detalles[nombre], esperado)
+        fila = resumen.set_index("estrategia").loc[nombre]
+        assert fila["balance_neto"] == esperado["ganancia_franja"].sum()
+        assert fila["aciertos"] == esperado["acierto"].sum()
+
+
+def test_estrategias_con_rangos_distintos_y_parametros_propios():
+    config = generar_configuracion(franjas=3, numero_maximo=12, definiciones=4)
+    config["parametros_puntuacion"] = {"dias_ventana": 12, "peso_frecuencia": 0.5, "peso_recencia": 0.5}
+    # Una estrategia que no cubre todos los números
+    config["group_definitions"]["Parcial"] = {"X": [1, 2], "Y": [11]}
+    historial_df = historial_a_dataframe(generar_historial(anios=0.5, franjas=3, numero_maximo=12, semilla=3))
+
+    resumen, detalles = comparar_estrategias(config, historial_df, config["group_definitions"], incluir_detalle=False)
+
+    assert detalles == {}
+    for nombre, grupos in config["group_definitions"].items():
+        esperado = ejecutar_backtesting(config, historial_df, grupos)
+        assert resumen.set_index("estrategia").loc[nombre, "balance_neto"] == esperado["ganancia_franja"].sum()
+
+
+def test_historial_corto_devuelve_resumen_vacio():
+    resumen, detalles = comparar_estrategias(CONFIG, historial_sintetico(dias=20))
+    assert resumen.empty and detalles == {}
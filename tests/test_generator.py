@@ -1,6 +1,18 @@
-from src.generator import generate_predictions
+from datetime import timedelta
 
-def test_generate_predictions():
-    preds = generate_predictions("strategy_config.json")
-    assert isinstance(preds, list)
-    assert all(isinstance(n, int) for n in preds)
+from src.generator import generar_predicciones_del_dia
+from src.sintetico import generar_configuracion, generar_historial
+from src.utils import historial_a_dataframe
+
+
+def test_generar_predicciones_del_dia():
+    config = generar_configuracion(franjas=5, numero_maximo=15, definiciones=2)
+    historial_df = historial_a_dataframe(generar_historial(anios=1, semilla=3))
+    grupos_activos = next(iter(config["group_definitions"].values()))
+    fecha = historial_df["fecha"].iloc[-1] + timedelta(days=1)
+
+    preds = generar_predicciones_del_dia(historial_df, fecha, config, grupos_activos)
+
+    assert isinstance(preds, dict)
+    assert list(preds) == config["franjas"]
+    assert all(grupo in grupos_activos for grupo in preds.values())
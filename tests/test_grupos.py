@@ -0,0 +1,37 @@
+import pytest
+
+from src.grupos import SIN_GRUPO, compilar_definiciones, compilar_grupos
+from src.intelligence_analyzer import get_group_for_number
+from src.utils import cargar_json
+
+
+def test_compila_todas_las_definiciones_del_config():
+    config = cargar_json("data/strategy_configuration.json")
+    definiciones = compilar_definiciones(config)
+
+    for nombre, grupos in config["group_definitions"].items():
+        definicion = definiciones[nombre]
+        assert definicion.como_dict() == grupos
+        for numero in range(0, 20):
+            assert get_group_for_number(numero, definicion) == get_group_for_number(numero, grupos)
+
+
+def test_busquedas_y_costos():
+    definicion = compilar_grupos({"A": [1, 2, 3], "B": [4, 5]}, {"costo_por_numero": 2})
+
+    assert definicion.grupo_de_numero(5) == 1
+    assert definicion.grupo_de_numero(5.0) == 1
+    assert definicion.grupo_de_numero(99) == SIN_GRUPO
+    assert definicion.grupo_de_numero(float("nan")) == SIN_GRUPO
+    assert definicion.contiene(definicion.posicion("A"), 2)
+    assert definicion.costos == (6, 4)
+
+
+@pytest.mark.parametrize("grupos, mensaje", [
+    ({"A": [1, 2], "B": [2, 3]}, "aparece en los grupos"),
+    ({"A": [1, 16]}, "fuera del rango"),
+    ({"A": []}, "vacío"),
+])
+def test_validacion_al_compilar(grupos, mensaje):
+    with pytest.raises(ValueError, match=mensaje):
+        compilar_grupos(grupos, {"rango_numeros": [1, 15]})
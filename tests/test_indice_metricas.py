@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+import pandas as pd
+
+from src.backtesting import ejecutar_backtesting
+from src.indice_metricas import IndiceMetricas
+from tests.datos import CONFIG, historial_sintetico
+
+
+def resultados():
+    return ejecutar_backtesting(CONFIG, historial_sintetico(dias=200), next(iter(CONFIG["group_definitions"].values())))
+
+
+def filtrar(df, desde, hasta):
+    return df[(df["fecha"].dt.date >= desde) & (df["fecha"].dt.date <= hasta)]
+
+
+def test_metricas_de_rango_coinciden_con_filtrar_el_dataframe():
+    df = resultados()
+    indice = IndiceMetricas(df)
+    primera, ultima = df["fecha"].iloc[0].date(), df["fecha"].iloc[-1].date()
+
+    for desde, hasta in [(primera, ultima), (primera + timedelta(days=3), primera + timedelta(days=40)),
+                         (ultima, ultima), (ultima + timedelta(days=1), ultima + timedelta(days=9))]:
+        filtrado = filtrar(df, desde, hasta)
+        metricas = indice.metricas(desde, hasta)
+        assert metricas["jugadas"] == len(filtrado)
+        assert metricas["aciertos"] == filtrado["acierto"].sum()
+        assert metricas["balance_neto"] == filtrado["ganancia_franja"].sum()
+
+        por_grupo = indice.metricas_por(desde, hasta, "grupo_predicho").set_index("grupo_predicho")["balance_neto"]
+        esperado = filtrado.groupby("grupo_predicho")["ganancia_franja"].sum()
+        assert por_grupo[por_grupo.index.isin(esperado.index)].to_dict() == esperado.to_dict()
+        assert indice.metricas(desde, hasta, "franja", "Morning")["jugadas"] == (filtrado["franja"] == "Morning").sum()
+
+
+def test_series_semanal_y_mensual():
+    df = resultados()
+    indice = IndiceMetricas(df)
+
+    mensual = indice.serie("M")
+    esperado = df.groupby(df["fecha"].dt.to_period("M"))["ganancia_franja"].sum()
+    assert mensual["ganancia"].tolist() == esperado.tolist()
+    assert mensual["balance_acumulado"].iloc[-1] == df["ganancia_franja"].sum()
+    assert indice.serie("W")["jugadas"].sum() == len(df)
+    assert indice.serie("D", por="franja").iloc[-1].sum() == df["ganancia_franja"].sum()
+
+
+def test_paginacion_del_detalle():
+    df = resultados()
+    indice = IndiceMetricas(df)
+    desde, hasta = df["fecha"].iloc[20].date(), df["fecha"].iloc[200].date()
+    filtrado = filtrar(df, desde, hasta)
+
+    paginas = []
+    pagina, total = indice.pagina(df, desde, hasta, 1, tamano=40)
+    for numero in range(1, total + 1):
+        pagina, _ = indice.pagina(df, desde, hasta, numero, tamano=40)
+        assert len(pagina) <= 40
+        paginas.append(pagina)
+    juntas = pd.concat(paginas, ignore_index=True)
+    assert len(juntas) == len(filtrado)
+    assert juntas["fecha"].is_monotonic_decreasing
+    assert juntas["ganancia_franja"].sum() == filtrado["ganancia_franja"].sum()
@@ -0,0 +1,39 @@
+from src import instrumentacion
+from src.backtesting import ejecutar_backtesting
+
+from tests.datos import CONFIG, historial_sintetico
+
+
+def ejecutar_con_instrumentacion(activa):
+    estado_previo = instrumentacion.esta_activa()
+    instrumentacion.activar(activa)
+    instrumentacion.reiniciar()
+    try:
+        ejecutar_backtesting(CONFIG, historial_sintetico(dias=60), CONFIG["group_definitions"]["Grupos de 5 (A, B, C)"])
+        return instrumentacion.resumen()
+    finally:
+        instrumentacion.activar(estado_previo)
+        instrumentacion.reiniciar()
+
+
+def test_desactivada_no_registra_nada():
+    assert ejecutar_con_instrumentacion(False) == {}
+
+
+def test_activada_registra_llamadas_y_filas():
+    resumen = ejecutar_con_instrumentacion(True)
+
+    assert resumen["backtesting.recorrer"]["filas"] == 60
+    assert resumen["evaluador.evaluar_dia"]["llamadas"] == 30
+    assert resumen["analizador.mapear_grupos"]["llamadas"] == 60
+    assert resumen["evaluador.evaluar_dia"]["p99_ms"] >= resumen["evaluador.evaluar_dia"]["p50_ms"]
+
+
+def test_texto_prometheus_agrupa_por_familia():
+    instrumentacion.reiniciar()
+    instrumentacion.registrar("etapa", 0.5, filas=10)
+    texto = instrumentacion.texto_prometheus()
+    instrumentacion.reiniciar()
+
+    assert 'cwp_etapa_filas_total{etapa="etapa"} 10' in texto
+    assert texto.count("# TYPE cwp_etapa_segundos summary") == 1
@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+import pytest
+
+from src.intelligence_analyzer import VentanaDeslizante
+from tests.datos import CONFIG, historial_desde_json
+
+HISTORIAL = historial_desde_json()
+
+
+def _prediccion_original(historial_completo_df, fecha_prediccion, franja_a_predecir, grupos_activos):
+    """analyze_franja_and_predict tal como estaba antes de la ventana incremental."""
+    ventana_fin = fecha_prediccion - timedelta(days=1)
+    ventana_inicio = ventana_fin - timedelta(days=29)
+    historial_franja = historial_completo_df[
+        (historial_completo_df['fecha'] >= ventana_inicio) &
+        (historial_completo_df['fecha'] <= ventana_fin)
+    ].copy()
+    if historial_franja.empty:
+        return list(grupos_activos.keys())[0]
+
+    historial_franja['grupo_acertado'] = historial_franja[franja_a_predecir].apply(
+        lambda x: next((grupo for grupo, numeros in grupos_activos.items() if x in numeros), None)
+    )
+    nombres_de_grupos = list(grupos_activos.keys())
+    frecuencia = historial_franja['grupo_acertado'].value_counts().reindex(nombres_de_grupos, fill_value=0)
+    puntuacion = {}
+    for grupo in nombres_de_grupos:
+        ultimas_apariciones = historial_franja[historial_franja['grupo_acertado'] == grupo]
+        recencia = 30 - (ventana_fin - ultimas_apariciones['fecha'].max()).days if not ultimas_apariciones.empty else 0
+        puntuacion[grupo] = frecuencia.get(grupo, 0) * 0.70 + recencia * 0.30
+    return max(puntuacion, key=puntuacion.get)
+
+
+@pytest.mark.parametrize("estrategia", list(CONFIG["group_definitions"]))
+def test_ventana_deslizante_reproduce_la_regla_original(estrategia):
+    grupos_activos = CONFIG["group_definitions"][estrategia]
+    ventana = VentanaDeslizante(CONFIG["franjas"], grupos_activos)
+    filas = HISTORIAL[["fecha"] + CONFIG["franjas"]].to_dict("records")
+
+    for indice, fila in enumerate(filas):
+        fecha = fila.pop("fecha")
+        # Una de cada 7 fechas (incluye las primeras, con la ventana vacía o incompleta)
+        if indice % 7 == 0:
+            prediccion = ventana.predecir(fecha)
+            for franja in CONFIG["franjas"]:
+                assert prediccion[franja] == _prediccion_original(HISTORIAL, fecha, franja, grupos_activos), (fecha, franja)
+        ventana.agregar_dia(fecha, fila)
@@ -0,0 +1,214 @@
+import asyncio
+import json
+import os
+from datetime import timedelta
+
+import pytest
+
+from src.almacen_historial import cargar_historial, filas_desde_json
+from src.generator import generar_predicciones_del_dia
+from src.grupos import compilar_grupos
+from src.live_module import ClienteEnVivo, EstadoEnVivo, ServicioEnVivo, SorteoRechazado, ruta_diario
+from tests.datos import CONFIG
+
+GRUPOS = compilar_grupos(CONFIG["group_definitions"]["Grupos de 5 (A, B, C)"], CONFIG)
+
+
+def crear_historial(tmp_path, dias=45):
+    from src.sintetico import generar_historial
+
+    historial = generar_historial(anios=dias / 365, franjas=len(CONFIG["franjas"]), semilla=5)
+    ruta = tmp_path / "historial.json"
+    ruta.write_text(json.dumps(historial), encoding="utf-8")
+    return str(ruta)
+
+
+def prediccion_esperada(ruta_json, fecha):
+    historial_df = cargar_historial(ruta_json).a_dataframe()
+    return generar_predicciones_del_dia(historial_df[historial_df["fecha"] < fecha], fecha, CONFIG, GRUPOS)
+
+
+def grupos_de(prediccion):
+    return {franja: datos["grupo"] for franja, datos in prediccion["predicciones"].items()}
+
+
+def test_estado_evalua_franjas_y_cierra_el_dia(tmp_path):
+    ruta = crear_historial(tmp_path)
+    estado = EstadoEnVivo(CONFIG, GRUPOS, ruta)
+    fecha = estado.fecha_abierta
+    assert grupos_de(estado.prediccion()) == prediccion_esperada(ruta, fecha)
+
+    numeros = dict(zip(CONFIG["franjas"], [1, 7, 12, 3, 15]))
+    for franja, numero in list(numeros.items())[:2]:
+        estado.registrar(fecha.isoformat(), franja, numero)
+    assert estado.dia()["franjas_pendientes"] == CONFIG["franjas"][2:]
+    assert estado.registrar(fecha, CONFIG["franjas"][0], 1)["numero_real"] == 1  # Reenvío idéntico
+    with pytest.raises(SorteoRechazado):
+        estado.registrar(fecha, CONFIG["franjas"][0], 2)
+    with pytest.raises(ValueError):
+        estado.registrar(fecha, CONFIG["franjas"][2], 99)
+    estado.rango_numeros = None  # Sin rango configurado, el límite es el del almacén
+    with pytest.raises(ValueError, match="admite el historial"):
+        estado.registrar(fecha, CONFIG["franjas"][2], 40000)
+    estado.rango_numeros = CONFIG["rango_numeros"]
+
+    for franja, numero in list(numeros.items())[2:]:
+        estado.registrar(fecha, franja, numero)
+
+    # El día quedó guardado en el JSON y en el almacén, y la ventana avanzó
+    assert json.loads(open(ruta, encoding="utf-8").read())[fecha.isoformat()] == numeros
+    assert cargar_historial(ruta).a_dataframe()["fecha"].iloc[-1] == fecha
+    assert estado.fecha_abierta == fecha + timedelta(days=1)
+    assert grupos_de(estado.prediccion()) == prediccion_esperada(ruta, fecha + timedelta(days=1))
+    with pytest.raises(SorteoRechazado):
+        estado.registrar(fecha, CONFIG["franjas"][0], 1)
+
+
+def test_reinicio_recupera_el_dia_abierto_del_diario(tmp_path):
+    ruta = crear_historial(tmp_path)
+    estado = EstadoEnVivo(CONFIG, GRUPOS, ruta)
+    fecha = estado.fecha_abierta
+    estado.registrar(fecha, "Morning", 4)
+    estado.registrar(fecha, "Evening", 9)
+
+    # Reconstruir el almacén (p. ej. tras editar el JSON) no borra el diario
+    assert os.path.exists(ruta_diario(ruta))
+    almacen = cargar_historial(ruta)
+    almacen.construir(filas_desde_json(json.loads(open(ruta, encoding="utf-8").read())), almacen.franjas)
+
+    reiniciado = EstadoEnVivo(CONFIG, GRUPOS, ruta)
+
+    assert reiniciado.fecha_abierta == fecha
+    assert reiniciado.dia() == estado.dia()
+
+
+def test_reenvio_reintenta_un_cierre_fallido(tmp_path, monkeypatch):
+    import src.live_module as live_module
+
+    ruta = crear_historial(tmp_path)
+    estado = EstadoEnVivo(CONFIG, GRUPOS, ruta)
+    fecha = estado.fecha_abierta
+    numeros = dict(zip(CONFIG["franjas"], [1, 7, 12, 3, 15]))
+    for franja, numero in list(numeros.items())[:-1]:
+        estado.registrar(fecha, franja, numero)
+
+    guardar = live_module.agregar_sorteos
+
+    def sin_disco(*argumentos):
+        raise OSError(28, "No queda espacio en el dispositivo")
+
+    monkeypatch.setattr(live_module, "agregar_sorteos", sin_disco)
+    with pytest.raises(OSError):
+        estado.registrar(fecha, "LateNight", 15)
+    assert estado.fecha_abierta == fecha and estado.dia()["franjas_pendientes"] == []
+
+    monkeypatch.setattr(live_module, "agregar_sorteos", guardar)
+    assert estado.registrar(fecha, "LateNight", 15)["numero_real"] == 15
+    assert estado.fecha_abierta == fecha + timedelta(days=1)
+    assert json.loads(open(ruta, encoding="utf-8").read())[fecha.isoformat()] == numeros
+
+
+def test_falla_al_recuperar_no_pierde_el_diario(tmp_path, monkeypatch):
+    ruta = crear_historial(tmp_path)
+    estado = EstadoEnVivo(CONFIG, GRUPOS, ruta)
+    fecha = estado.fecha_abierta
+    estado.registrar(fecha, "Morning", 4)
+    estado.registrar(fecha, "Evening", 9)
+    anotado = open(ruta_diario(ruta), encoding="utf-8").read()
+
+    def falla(*argumentos):
+        raise RuntimeError("caída durante la recuperación")
+
+    with monkeypatch.context() as parche:
+        parche.setattr(EstadoEnVivo, "_aplicar", falla)
+        with pytest.raises(RuntimeError):
+            EstadoEnVivo(CONFIG, GRUPOS, ruta)
+    assert open(ruta_diario(ruta), encoding="utf-8").read() == anotado
+
+    reiniciado = EstadoEnVivo(CONFIG, GRUPOS, ruta)
+    assert reiniciado.dia() == estado.dia()
+    assert open(ruta_diario(ruta), encoding="utf-8").read() == anotado
+
+
+def test_servicio_con_envios_concurrentes(tmp_path):
+    ruta = crear_historial(tmp_path)
+    estado = EstadoEnVivo(CONFIG, GRUPOS, ruta)
+    fecha = estado.fecha_abierta
+    numeros = dict(zip(CONFIG["franjas"], [2, 6, 11, 14, 5]))
+
+    async def escenario():
+        servicio = await ServicioEnVivo(estado, puerto=0).iniciar()
+        try:
+            async def enviar(franja, numero):
+                async with ClienteEnVivo(servicio.host, servicio.puerto) as cliente:
+                    return await cliente.enviar_sorteo(fecha, franja, numero)
+
+            # Cada franja se envía dos veces desde clientes distintos a la vez
+            respuestas = await asyncio.gather(*[enviar(f, n) for f, n in numeros.items() for _ in range(2)])
+            async with ClienteEnVivo(servicio.host, servicio.puerto) as cliente:
+                rechazado = await cliente.enviar_sorteo(fecha, "Morning", 3)
+                invalido = await cliente.solicitar("POST", "/sorteo", {"fecha": "ayer"})
+                desconocida = await cliente.solicitar("GET", "/nada")
+                prediccion = await cliente.prediccion()
+            return respuestas, rechazado, invalido, desconocida, prediccion
+        finally:
+            await servicio.detener()
+
+    respuestas, rechazado, invalido, desconocida, prediccion = asyncio.run(escenario())
+
+    # Un reenvío que llega después del cierre del día se rechaza; nunca se registra dos veces
+    codigos = [codigo for codigo, _ in respuestas]
+    assert set(codigos) <= {200, 409} and codigos.count(200) >= len(numeros)
+    assert rechazado[0] == 409 and invalido[0] == 400 and desconocida[0] == 404
+    assert json.loads(open(ruta, encoding="utf-8").read())[fecha.isoformat()] == numeros
+    assert prediccion[1]["fecha"] == (fecha + timedelta(days=1)).isoformat()
+    assert grupos_de(prediccion[1]) == prediccion_esperada(ruta, fecha + timedelta(days=1))
+
+
+def test_servicio_responde_errores_de_largo_y_de_disco(tmp_path, monkeypatch):
+    estado = EstadoEnVivo(CONFIG, GRUPOS, crear_historial(tmp_path))
+
+    async def escenario():
+        servicio = await ServicioEnVivo(estado, puerto=0).iniciar()
+        try:
+            respuestas = []
+            for largo in ("abc", "-5"):
+                lector, escritor = await asyncio.open_connection(servicio.host, servicio.puerto)
+                escritor.write(f"POST /sorteo HTTP/1.1\r\nContent-Length: {largo}\r\n\r\n".encode("latin-1"))
+                await escritor.drain()
+                respuestas.append(await lector.read())
+                escritor.close()
+
+            def sin_disco(*argumentos):
+                raise OSError(28, "No queda espacio en el dispositivo")
+
+            monkeypatch.setattr(estado, "registrar", sin_disco)
+            async with ClienteEnVivo(servicio.host, servicio.puerto) as cliente:
+                sin_espacio = await cliente.enviar_sorteo(estado.fecha_abierta, "Morning", 3)
+            return respuestas, sin_espacio
+        finally:
+            await servicio.detener()
+
+    respuestas, sin_espacio = asyncio.run(escenario())
+
+    assert all(respuesta.startswith(b"HTTP/1.1 400 ") for respuesta in respuestas)
+    assert sin_espacio[0] == 500 and "espacio" in sin_espacio[1]["error"]
+
+
+def test_estado_en_vivo_con_modelo_markov(tmp_path):
+    ruta = crear_historial(tmp_path)
+    config = {**CONFIG, "modelo_puntuacion": "markov"}
+    estado = EstadoEnVivo(config, GRUPOS, ruta)
+    fecha = estado.fecha_abierta
+
+    def esperado(dia):
+        historial_df = cargar_historial(ruta).a_dataframe()
+        return generar_predicciones_del_dia(historial_df[historial_df["fecha"] < dia], dia, config, GRUPOS)
+
+    assert grupos_de(estado.prediccion()) == esperado(fecha)
+    for franja, numero in zip(CONFIG["franjas"], [3, 8, 13, 2, 9]):
+        estado.registrar(fecha, franja, numero)
+    assert grupos_de(estado.prediccion()) == esperado(fecha + timedelta(days=1))
+
+    with pytest.raises(ValueError, match="por lotes"):
+        EstadoEnVivo({**CONFIG, "modelo_puntuacion": "decaimiento_exponencial"}, GRUPOS, ruta)
@@ -0,0 +1,118 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import main
+from src.almacen_historial import AlmacenHistorial, cargar_historial
+from src.backtesting import ejecutar_backtesting
+from src.backtesting_vectorizado import ejecutar_backtesting_vectorizado
+from src.cache_resultados import CacheResultados, backtesting_con_cache
+from tests.datos import CONFIG, historial_sintetico
+
+
+def escribir_historial(ruta, historial_df):
+    historial = {
+        fila["fecha"].isoformat(): {franja: int(fila[franja]) for franja in CONFIG["franjas"]}
+        for fila in historial_df.to_dict("records")
+    }
+    ruta.write_text(json.dumps(historial), encoding="utf-8")
+
+
+def test_cli_escribe_por_bloques_el_mismo_resultado_que_el_backtesting(tmp_path):
+    historial_df = historial_sintetico(dias=120)
+    escribir_historial(tmp_path / "historial.json", historial_df)
+    estrategia = next(iter(CONFIG["group_definitions"]))
+    salida = tmp_path / "reporte.csv"
+
+    codigo = main.main([
+        "--historial", str(tmp_path / "historial.json"), "--estrategia", estrategia,
+        "--salida", str(salida), "--tamano-bloque", "7", "--sin-cache",
+    ])
+
+    assert codigo == 0
+    reporte = pd.read_csv(salida)
+    esperado = ejecutar_backtesting(CONFIG, historial_df, CONFIG["group_definitions"][estrategia])
+    assert (reporte["estrategia"] == estrategia).all()
+    assert len(reporte) == len(esperado)
+    assert reporte["ganancia_franja"].tolist() == esperado["ganancia_franja"].tolist()
+    assert reporte["grupo_predicho"].tolist() == esperado["grupo_predicho"].tolist()
+
+
+def test_cli_rango_de_fechas_conserva_la_ventana_previa(tmp_path):
+    historial_df = historial_sintetico(dias=120)
+    escribir_historial(tmp_path / "historial.json", historial_df)
+    estrategia = next(iter(CONFIG["group_definitions"]))
+    fechas = sorted(historial_df["fecha"])
+    desde, hasta = fechas[60], fechas[80]
+    salida = tmp_path / "reporte.csv"
+
+    codigo = main.main([
+        "--historial", str(tmp_path / "historial.json"), "--estrategia", estrategia,
+        "--desde", desde.isoformat(), "--hasta", hasta.isoformat(), "--salida", str(salida),
+    ])
+
+    assert codigo == 0
+    reporte = pd.read_csv(salida, parse_dates=["fecha"])
+    esperado = ejecutar_backtesting(CONFIG, historial_df, CONFIG["group_definitions"][estrategia])
+    esperado = esperado[(esperado["fecha"] >= pd.Timestamp(desde)) & (esperado["fecha"] <= pd.Timestamp(hasta))]
+    assert reporte["grupo_predicho"].tolist() == esperado["grupo_predicho"].tolist()
+    assert reporte["fecha"].min() == pd.Timestamp(desde)
+
+
+def test_cli_rechaza_estrategias_desconocidas(tmp_path):
+    assert main.main(["--estrategia", "No existe", "--salida", str(tmp_path / "r.csv")]) == 2
+
+
+def test_cli_sin_rango_usa_la_cache_compartida(tmp_path, monkeypatch):
+    historial_df = historial_sintetico(dias=120)
+    escribir_historial(tmp_path / "historial.json", historial_df)
+    comunes = ["--historial", str(tmp_path / "historial.json"), "--cache", str(tmp_path / "cache")]
+    assert main.main(comunes + ["--salida", str(tmp_path / "sin_cache.csv"), "--sin-cache"]) == 0
+
+    def no_materializar(*argumentos, **opciones):
+        raise AssertionError("no debería materializar ni recalcular")
+
+    # Sin entrada en la caché se recorre día a día, sin materializar el historial ni escribir la caché
+    with monkeypatch.context() as parche:
+        parche.setattr(AlmacenHistorial, "a_dataframe", no_materializar)
+        assert main.main(comunes + ["--salida", str(tmp_path / "fallo.csv")]) == 0
+    assert not (tmp_path / "cache").exists()
+
+    # La app llena la caché con el mismo historial; la CLI la lee sin recalcular
+    cache = CacheResultados(str(tmp_path / "cache"))
+    almacen = cargar_historial(str(tmp_path / "historial.json"))
+    for grupos in CONFIG["group_definitions"].values():
+        backtesting_con_cache(CONFIG, almacen.a_dataframe(), grupos, cache)
+    guardados = sorted(os.listdir(tmp_path / "cache"))
+    monkeypatch.setattr(main, "iterar_resultados", no_materializar)
+    assert main.main(comunes + ["--salida", str(tmp_path / "de_cache.csv")]) == 0
+    assert sorted(os.listdir(tmp_path / "cache")) == guardados
+
+    sin_cache = (tmp_path / "sin_cache.csv").read_text(encoding="utf-8")
+    assert (tmp_path / "fallo.csv").read_text(encoding="utf-8") == sin_cache
+    assert (tmp_path / "de_cache.csv").read_text(encoding="utf-8") == sin_cache
+
+
+@pytest.mark.parametrize("modelo", ["markov", "decaimiento_exponencial"])
+def test_cli_otros_modelos_sin_cache_coinciden_con_el_lote(tmp_path, modelo):
+    historial_df = historial_sintetico(dias=120)
+    escribir_historial(tmp_path / "historial.json", historial_df)
+    estrategia = "Grupos de 3 (A, B, C, D, E)"
+    fechas = sorted(historial_df["fecha"])
+    salida = tmp_path / "reporte.csv"
+
+    codigo = main.main([
+        "--historial", str(tmp_path / "historial.json"), "--estrategia", estrategia, "--modelo", modelo,
+        "--desde", fechas[50].isoformat(), "--salida", str(salida), "--tamano-bloque", "9",
+    ])
+
+    assert codigo == 0
+    reporte = pd.read_csv(salida, parse_dates=["fecha"])
+    esperado = ejecutar_backtesting_vectorizado({**CONFIG, "modelo_puntuacion": modelo}, historial_df,
+                                                CONFIG["group_definitions"][estrategia])
+    esperado = esperado[esperado["fecha"] >= pd.Timestamp(fechas[50])]
+    assert reporte["grupo_predicho"].tolist() == esperado["grupo_predicho"].astype(str).tolist()
+    assert reporte["ganancia_franja"].tolist() == esperado["ganancia_franja"].tolist()
+    assert reporte["numero_real"].tolist() == esperado["numero_real"].astype(float).tolist()
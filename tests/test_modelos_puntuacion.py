@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtesting import ejecutar_backtesting
+from src.backtesting_vectorizado import codificar_historial, ejecutar_backtesting_vectorizado, indices_de_grupo
+from src.comparacion import comparar_estrategias
+from src.generator import generar_predicciones_del_dia
+from src.grupos import compilar_definiciones
+from src.intelligence_analyzer import EstadoMarkov
+from src import modelos_puntuacion
+from tests.datos import CONFIG, historial_desde_json, historial_sintetico
+
+DEFINICIONES = compilar_definiciones(CONFIG)
+
+
+@pytest.fixture(scope="module")
+def codificado():
+    historial = historial_sintetico(120)
+    historial.loc[20, "Evening"] = float("nan")
+    historial.loc[21:25, "Morning"] = float("nan")
+    _, ordinales, matriz = codificar_historial(historial, CONFIG["franjas"])
+    definicion = DEFINICIONES["Grupos de 3 (A, B, C, D, E)"]
+    return ordinales, indices_de_grupo(definicion, matriz), len(definicion)
+
+
+def test_regla_original_fija_los_resultados_del_historial_real():
+    # Los mismos totales que daba la regla fija de analyze_franja_and_predict
+    resumen, _ = comparar_estrategias({**CONFIG, "modelo_puntuacion": "frecuencia_recencia"}, historial_desde_json(),
+                                      incluir_detalle=False)
+    assert resumen[["estrategia", "balance_neto", "aciertos"]].values.tolist() == [
+        ["Grupos de 5 (A, B, C)", -11705, 1159],
+        ["Grupos de 3 (A, B, C, D, E)", -7090, 682],
+    ]
+
+
+def test_decaimiento_exponencial_coincide_con_la_suma_directa(codificado):
+    ordinales, grupos_por_dia, n_grupos = codificado
+    puntuacion = modelos_puntuacion.puntuar_lote(ordinales, grupos_por_dia, n_grupos, "decaimiento_exponencial",
+                                                 vida_media=4)
+    for t in range(0, len(ordinales), 7):
+        esperado = np.zeros((grupos_por_dia.shape[1], n_grupos))
+        for s in range(t):
+            for franja, grupo in enumerate(grupos_por_dia[s]):
+                if grupo >= 0:
+                    esperado[franja, grupo] += 0.5 ** ((ordinales[t] - 1 - ordinales[s]) / 4)
+        np.testing.assert_allclose(puntuacion[t], esperado, atol=1e-12)
+
+
+def test_markov_cuenta_transiciones_desde_el_ultimo_grupo(codificado):
+    ordinales, grupos_por_dia, n_grupos = codificado
+    puntuacion = modelos_puntuacion.puntuar_lote(ordinales, grupos_por_dia, n_grupos, "markov")
+    for t in range(0, len(ordinales), 3):
+        for franja in range(grupos_por_dia.shape[1]):
+            anteriores = [g for g in grupos_por_dia[:t, franja] if g >= 0]
+            esperado = np.zeros(n_grupos)
+            for origen, destino in zip(anteriores, anteriores[1:]):
+                if origen == anteriores[-1]:
+                    esperado[destino] += 1
+            np.testing.assert_array_equal(puntuacion[t, franja], esperado)
+
+
+@pytest.mark.parametrize("modelo", ["decaimiento_exponencial", "markov"])
+def test_motores_y_generador_usan_el_modelo_configurado(modelo):
+    config = {**CONFIG, "modelo_puntuacion": modelo}
+    historial = historial_sintetico(90)
+    grupos = DEFINICIONES["Grupos de 5 (A, B, C)"]
+
+    resultados = ejecutar_backtesting(config, historial, grupos)
+    pd.testing.assert_frame_equal(resultados, ejecutar_backtesting_vectorizado(config, historial, grupos))
+    assert not resultados.equals(ejecutar_backtesting(CONFIG, historial, grupos))
+
+    fecha = historial["fecha"].iloc[60]
+    del_dia = resultados[resultados["fecha"] == pd.Timestamp(fecha)]
+    esperado = dict(zip(del_dia["franja"].astype(str), del_dia["grupo_predicho"].astype(str)))
+    assert generar_predicciones_del_dia(historial[historial["fecha"] < fecha], fecha, config, grupos) == esperado
+
+
+def test_modelo_registrado_y_modelo_desconocido():
+    modelos_puntuacion.registrar_modelo(
+        "siempre_ultimo", lambda ordinales, grupos_por_dia, n_grupos: np.broadcast_to(
+            np.arange(n_grupos), grupos_por_dia.shape + (n_grupos,)
+        )
+    )
+    try:
+        config = {**CONFIG, "modelo_puntuacion": "siempre_ultimo"}
+        resultados = ejecutar_backtesting_vectorizado(config, historial_sintetico(60), DEFINICIONES["Grupos de 5 (A, B, C)"])
+        assert set(resultados["grupo_predicho"].astype(str)) == {"C"}
+    finally:
+        del modelos_puntuacion.MODELOS["siempre_ultimo"]
+
+    with pytest.raises(ValueError, match="desconocido"):
+        modelos_puntuacion.parametros_modelo({**CONFIG, "modelo_puntuacion": "no_existe"})
+    for vida_media in (0, -3, float("nan")):
+        with pytest.raises(ValueError, match="vida_media"):
+            modelos_puntuacion.parametros_modelo({**CONFIG, "modelo_puntuacion": "decaimiento_exponencial",
+                                                  "parametros_puntuacion": {"vida_media": vida_media}})
+
+
+def test_estado_markov_incremental_coincide_con_el_lote():
+    historial = historial_sintetico(150)
+    historial.loc[30:34, "Evening"] = float("nan")
+    grupos = DEFINICIONES["Grupos de 3 (A, B, C, D, E)"]
+    resultados = ejecutar_backtesting_vectorizado({**CONFIG, "modelo_puntuacion": "markov"}, historial, grupos)
+    esperado = resultados.groupby("fecha", observed=True)["grupo_predicho"].apply(lambda g: list(g.astype(str)))
+
+    estado = EstadoMarkov(CONFIG["franjas"], grupos)
+    for fila in historial.to_dict("records"):
+        fecha = fila.pop("fecha")
+        if pd.Timestamp(fecha) in esperado.index:
+            assert list(estado.predecir(fecha).values()) == esperado[pd.Timestamp(fecha)]
+        estado.agregar_dia(fecha, fila)
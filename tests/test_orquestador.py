@@ -0,0 +1,178 @@
+import json
+import os
+import time
+
+import pytest
+
+from src import orquestador
+from src.comparacion import comparar_estrategias
+from tests.datos import CONFIG, historial_desde_json, historial_sintetico
+
+ESTRATEGIA = "Grupos de 3 (A, B, C, D, E)"
+
+
+def _escribir_manifiesto(tmp_path):
+    sintetico = historial_sintetico(150)
+    historial = {fila.pop("fecha").isoformat(): fila for fila in sintetico.to_dict("records")}
+    (tmp_path / "sintetico.json").write_text(json.dumps(historial), encoding="utf-8")
+    datos = os.path.abspath("data")
+    trabajos = [
+        {"nombre": "real", "historial": f"{datos}/historical_draws.json", "config": f"{datos}/strategy_configuration.json"},
+        {"nombre": "sintetico markov", "historial": "sintetico.json", "config": f"{datos}/strategy_configuration.json",
+         "estrategias": [ESTRATEGIA], "config_extra": {"modelo_puntuacion": "markov"}},
+        {"nombre": "roto", "historial": "no_existe.json", "config": f"{datos}/strategy_configuration.json"},
+    ]
+    ruta = tmp_path / "manifiesto.json"
+    ruta.write_text(json.dumps({"trabajos": trabajos}), encoding="utf-8")
+    return ruta, sintetico
+
+
+def _claves(ids):
+    # <clave>_<huella de 12 caracteres>
+    return [id_trabajo.rsplit("_", 1)[0] for id_trabajo in ids]
+
+
+def test_cola_ejecuta_reintenta_y_consolida(tmp_path):
+    ruta_manifiesto, sintetico = _escribir_manifiesto(tmp_path)
+    cola = str(tmp_path / "cola")
+
+    ids = orquestador.encolar(cola, orquestador.leer_manifiesto(str(ruta_manifiesto)))
+    assert _claves(ids) == ["real", "sintetico_markov", "roto"]
+    reales, markovs, rotos = ids
+    assert orquestador.encolar(cola, orquestador.leer_manifiesto(str(ruta_manifiesto))) == []
+    # 3 trabajos; el roto se intenta max_intentos veces
+    assert orquestador.ejecutar_cola(cola, procesos=2, max_intentos=2) == 4
+
+    reporte = orquestador.consolidar(cola)
+    real = reporte[reporte["trabajo"] == reales]
+    esperado, _ = comparar_estrategias(CONFIG, historial_desde_json(), incluir_detalle=False)
+    assert real[["estrategia", "balance_neto", "aciertos"]].values.tolist() == \
+        esperado[["estrategia", "balance_neto", "aciertos"]].values.tolist()
+
+    markov = reporte[reporte["trabajo"] == markovs]
+    esperado, _ = comparar_estrategias({**CONFIG, "modelo_puntuacion": "markov"}, sintetico,
+                                       {ESTRATEGIA: CONFIG["group_definitions"][ESTRATEGIA]}, incluir_detalle=False)
+    assert markov[["estrategia", "balance_neto", "modelo"]].values.tolist() == \
+        [[ESTRATEGIA, esperado["balance_neto"].iloc[0], "markov"]]
+
+    roto = reporte[reporte["trabajo"] == rotos].iloc[0]
+    assert (roto["estado"], roto["intentos"]) == ("fallido", 2)
+    assert "no_existe.json" in roto["error"]
+    assert os.listdir(os.path.join(cola, "pendientes")) == os.listdir(os.path.join(cola, "en_proceso")) == []
+
+
+def test_historial_modificado_se_vuelve_a_encolar(tmp_path):
+    datos = os.path.abspath("data")
+    historial = historial_sintetico(80)
+    sorteos = {fila.pop("fecha").isoformat(): fila for fila in historial.to_dict("records")}
+    ruta = tmp_path / "h.json"
+    ruta.write_text(json.dumps(sorteos), encoding="utf-8")
+    trabajos = [{"historial": str(ruta), "config": f"{datos}/strategy_configuration.json", "estrategias": [ESTRATEGIA]}]
+    cola = str(tmp_path / "cola")
+
+    [anterior] = orquestador.encolar(cola, trabajos)
+    assert orquestador.ejecutar_cola(cola, procesos=1) == 1
+
+    # Llegan sorteos nuevos: mismo nombre, otro contenido
+    ruta.write_text(json.dumps(dict(list(sorteos.items())[:60])), encoding="utf-8")
+    [nuevo] = orquestador.encolar(cola, trabajos)
+    assert nuevo != anterior and _claves([nuevo]) == _claves([anterior])
+    assert os.listdir(os.path.join(cola, "reemplazados")) == [f"{anterior}.json"]
+    assert orquestador.ejecutar_cola(cola, procesos=1) == 1
+    assert orquestador.consolidar(cola)["trabajo"].tolist() == [nuevo]
+    assert orquestador.encolar(cola, trabajos) == []
+
+
+def test_reordenar_el_manifiesto_no_duplica_resultados(tmp_path, monkeypatch):
+    cola = str(tmp_path / "cola")
+    trabajos = [{"nombre": nombre, "historial": f"{nombre}.json", "config": "c.json"} for nombre in ("a", "b")]
+    orquestador.encolar(cola, trabajos)
+    monkeypatch.setattr(orquestador, "ejecutar_trabajo", lambda trabajo: [{"estrategia": ESTRATEGIA}])
+    assert orquestador.ejecutar_cola(cola, procesos=1) == 2
+
+    # Un trabajo nuevo al principio y los demás en otro orden: solo se encola el nuevo
+    nuevo = {"nombre": "c", "historial": "c.json", "config": "c.json"}
+    assert _claves(orquestador.encolar(cola, [nuevo, *trabajos[::-1]])) == ["c"]
+    assert orquestador.ejecutar_cola(cola, procesos=1) == 1
+    assert sorted(_claves(orquestador.consolidar(cola)["trabajo"])) == ["a", "b", "c"]
+
+    with pytest.raises(ValueError, match="mismo nombre"):
+        orquestador.encolar(cola, [trabajos[0], {**trabajos[1], "nombre": "a"}])
+
+
+def test_reclamo_atomico_y_recuperacion_de_abandonados(tmp_path):
+    cola = str(tmp_path / "cola")
+    [id_trabajo] = orquestador.encolar(cola, [{"historial": "a.json", "config": "c.json"}])
+    # Encolado hace tiempo: el reclamo no debe heredar esa fecha
+    viejo = time.time() - 120
+    os.utime(os.path.join(cola, "pendientes", f"{id_trabajo}.json"), (viejo, viejo))
+
+    trabajo = orquestador.reclamar(cola, "nodo-1")
+    assert trabajo["id"] == id_trabajo and _claves([id_trabajo]) == ["a"]
+    assert (trabajo["intentos"], trabajo["trabajador"]) == (1, "nodo-1")
+    assert orquestador.reclamar(cola) is None
+
+    assert orquestador.recuperar_abandonados(cola, segundos=60) == 0
+    os.utime(os.path.join(cola, "en_proceso", f"{id_trabajo}.json"), (viejo, viejo))
+    assert orquestador.recuperar_abandonados(cola, segundos=60, max_intentos=2) == 1
+    assert orquestador.reclamar(cola)["intentos"] == 2
+
+    # Sin intentos restantes, el trabajo abandonado queda en fallidos/
+    os.utime(os.path.join(cola, "en_proceso", f"{id_trabajo}.json"), (viejo, viejo))
+    assert orquestador.recuperar_abandonados(cola, segundos=60, max_intentos=2) == 1
+    fila = orquestador.consolidar(cola).iloc[0]
+    assert (fila["estado"], fila["intentos"]) == ("fallido", 2)
+    assert "dejó de responder" in fila["error"]
+
+
+def test_reintento_no_borra_el_reclamo_de_otro_trabajador(tmp_path, monkeypatch):
+    cola = str(tmp_path / "cola")
+    [id_trabajo] = orquestador.encolar(cola, [{"historial": "a.json", "config": "c.json"}])
+    trabajo = orquestador.reclamar(cola, "uno")
+    escribir = orquestador._escribir_atomico
+
+    def y_reclama_otro(ruta, contenido, cola_):
+        # Otro trabajador busca pendientes justo después de cada escritura
+        escribir(ruta, contenido, cola_)
+        orquestador.reclamar(cola, "otro")
+
+    monkeypatch.setattr(orquestador, "_escribir_atomico", y_reclama_otro)
+    assert orquestador._finalizar(cola, trabajo, max_intentos=3, error="fallo") == "pendientes"
+    monkeypatch.undo()
+
+    ubicaciones = [estado for estado in orquestador.ESTADOS
+                   if os.path.exists(os.path.join(cola, estado, f"{id_trabajo}.json"))]
+    assert ubicaciones in (["pendientes"], ["en_proceso"])
+    if ubicaciones == ["pendientes"]:
+        assert orquestador.reclamar(cola, "otro")["intentos"] == 2
+
+
+def test_latido_mantiene_vivo_un_trabajo_largo(tmp_path, monkeypatch):
+    cola = str(tmp_path / "cola")
+    [id_trabajo] = orquestador.encolar(cola, [{"historial": "a.json", "config": "c.json"}])
+    recuperados = []
+
+    def trabajo_largo(trabajo):
+        for _ in range(6):
+            time.sleep(0.2)
+            recuperados.append(orquestador.recuperar_abandonados(cola, segundos=0.5))
+        return []
+
+    monkeypatch.setattr(orquestador, "ejecutar_trabajo", trabajo_largo)
+    assert orquestador.trabajar(cola, max_intentos=1, abandono_segundos=0.5) == 1
+    assert sum(recuperados) == 0
+    assert os.listdir(os.path.join(cola, "terminados")) == [f"{id_trabajo}.json"]
+
+
+def test_trabajador_recupera_abandonados_mientras_trabaja(tmp_path, monkeypatch):
+    cola = str(tmp_path / "cola")
+    ids = orquestador.encolar(cola, [{"historial": "a.json", "config": "c.json"},
+                                     {"historial": "b.json", "config": "c.json"}])
+    # Un trabajador reclama el primero y muere sin latido; el reclamo aún es reciente
+    orquestador.reclamar(cola, "caido")
+    monkeypatch.setattr(orquestador, "ejecutar_trabajo", lambda trabajo: [{"estrategia": ESTRATEGIA}])
+
+    assert orquestador.trabajar(cola, "vivo", max_intentos=3, abandono_segundos=0.5) == 2
+    assert sorted(os.listdir(os.path.join(cola, "terminados"))) == sorted(f"{id_trabajo}.json" for id_trabajo in ids)
+    recuperado = orquestador.consolidar(cola).iloc[0]
+    assert (recuperado["trabajador"], recuperado["intentos"]) == ("vivo", 2)
@@ -0,0 +1,96 @@
+import json
+import subprocess
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+from src.almacen_historial import cargar_historial
+from src.generator import generar_predicciones_del_dia
+from src.prediccion_rapida import predecir_fecha
+from src.utils import historial_a_dataframe
+from tests.datos import CONFIG, historial_sintetico
+
+
+def escribir_historial(ruta, historial_df):
+    historial = {
+        fila["fecha"].isoformat(): {franja: int(fila[franja]) for franja in CONFIG["franjas"]}
+        for fila in historial_df.to_dict("records")
+    }
+    ruta.write_text(json.dumps(historial), encoding="utf-8")
+
+
+def test_misma_prediccion_desde_almacen_y_desde_json(tmp_path):
+    historial_df = historial_sintetico(dias=150)
+    ruta = tmp_path / "historial.json"
+    escribir_historial(ruta, historial_df)
+    cargar_historial(str(ruta))
+    primera = historial_df["fecha"].min()
+
+    for grupos in CONFIG["group_definitions"].values():
+        for desplazamiento in (0, 10, 95, 200, 400):
+            fecha = primera + timedelta(days=desplazamiento)
+            esperado = generar_predicciones_del_dia(historial_df[historial_df["fecha"] < fecha], fecha, CONFIG, grupos)
+            assert predecir_fecha(CONFIG, grupos, fecha, str(ruta)) == esperado
+            assert predecir_fecha(CONFIG, grupos, fecha, str(ruta), directorio=str(tmp_path / "no_existe")) == esperado
+
+
+def test_json_modificado_no_usa_el_almacen_desactualizado(tmp_path):
+    historial_df = historial_sintetico(dias=60)
+    ruta = tmp_path / "historial.json"
+    escribir_historial(ruta, historial_df)
+    cargar_historial(str(ruta))
+    historial_df.loc[historial_df.index[-5:], CONFIG["franjas"]] = 1
+    escribir_historial(ruta, historial_df)
+
+    fecha = historial_df["fecha"].max() + timedelta(days=1)
+    grupos = next(iter(CONFIG["group_definitions"].values()))
+    esperado = generar_predicciones_del_dia(historial_df, fecha, CONFIG, grupos)
+    assert predecir_fecha(CONFIG, grupos, fecha, str(ruta)) == esperado
+
+
+def test_json_con_dias_mal_formados_los_omite(tmp_path):
+    historial_df = historial_sintetico(dias=60)
+    ruta = tmp_path / "historial.json"
+    escribir_historial(ruta, historial_df)
+    historial = json.loads(ruta.read_text(encoding="utf-8"))
+    mal_formado = (historial_df["fecha"].max() - timedelta(days=3)).isoformat()
+    historial[mal_formado] = 7
+    ruta.write_text(json.dumps(historial), encoding="utf-8")
+
+    fecha = historial_df["fecha"].max() + timedelta(days=1)
+    grupos = next(iter(CONFIG["group_definitions"].values()))
+    esperado = generar_predicciones_del_dia(historial_a_dataframe(historial), fecha, CONFIG, grupos)
+    assert predecir_fecha(CONFIG, grupos, fecha, str(ruta), directorio=str(tmp_path / "no_existe")) == esperado
+
+
+def test_no_importa_pandas_numpy_ni_graficos():
+    codigo = (
+        "import sys\n"
+        "from src.prediccion_rapida import main\n"
+        "import src.visualizer, src.reporter\n"
+        "main(['--fecha', '2025-01-01', '--json'])\n"
+        "pesados = [m for m in ('pandas', 'numpy', 'streamlit', 'matplotlib', 'seaborn') if m in sys.modules]\n"
+        "assert not pesados, pesados\n"
+    )
+    resultado = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True)
+    assert resultado.returncode == 0, resultado.stderr
+    assert json.loads(resultado.stdout)["fecha"] == date(2025, 1, 1).isoformat()
+
+
+def test_markov_usa_el_estado_incremental_y_el_decaimiento_se_rechaza(tmp_path):
+    historial_df = historial_sintetico(dias=150)
+    ruta = tmp_path / "historial.json"
+    escribir_historial(ruta, historial_df)
+    cargar_historial(str(ruta))
+    config = {**CONFIG, "modelo_puntuacion": "markov"}
+    grupos = CONFIG["group_definitions"]["Grupos de 3 (A, B, C, D, E)"]
+    primera = historial_df["fecha"].min()
+
+    for desplazamiento in (0, 40, 200, 400):
+        fecha = primera + timedelta(days=desplazamiento)
+        esperado = generar_predicciones_del_dia(historial_df[historial_df["fecha"] < fecha], fecha, config, grupos)
+        assert predecir_fecha(config, grupos, fecha, str(ruta)) == esperado
+
+    with pytest.raises(ValueError, match="por lotes"):
+        predecir_fecha({**CONFIG, "modelo_puntuacion": "decaimiento_exponencial"}, grupos, primera, str(ruta))
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtesting import ejecutar_backtesting
+from src.backtesting_vectorizado import ejecutar_backtesting_vectorizado
+from src.grupos import compilar_definiciones
+from src.reporter import etiquetar_resultados
+from src import resultados_compactos
+from tests.datos import CONFIG, historial_sintetico
+
+DEFINICIONES = compilar_definiciones(CONFIG)
+
+
+@pytest.fixture(scope="module")
+def historial_df():
+    historial = historial_sintetico(150)
+    historial.loc[40, "Evening"] = float("nan")
+    return historial
+
+
+@pytest.mark.parametrize("estrategia", list(DEFINICIONES))
+def test_ambos_motores_dan_el_mismo_formato_compacto(estrategia, historial_df):
+    compacto = ejecutar_backtesting(CONFIG, historial_df, DEFINICIONES[estrategia])
+
+    pd.testing.assert_frame_equal(
+        compacto, ejecutar_backtesting_vectorizado(CONFIG, historial_df, DEFINICIONES[estrategia])
+    )
+    assert list(compacto.columns) == resultados_compactos.COLUMNAS
+    assert isinstance(compacto["franja"].dtype, pd.CategoricalDtype)
+    assert list(compacto["grupo_predicho"].cat.categories) == list(DEFINICIONES[estrategia].nombres)
+    assert compacto["acierto"].dtype == bool
+    assert compacto["numero_real"].dtype == "Int16"
+    assert compacto["numero_real"].isna().sum() == 1
+    assert compacto["ganancia_franja"].dtype.itemsize == 1
+
+
+def test_etiquetas_y_numeros_jugados_se_derivan_de_la_tabla_de_grupos(historial_df):
+    grupos = DEFINICIONES["Grupos de 3 (A, B, C, D, E)"]
+    compacto = ejecutar_backtesting(CONFIG, historial_df, grupos)
+    legible = etiquetar_resultados(compacto, grupos)
+
+    assert list(legible["numeros_jugados"]) == [grupos[g] for g in legible["grupo_predicho"]]
+    assert ((legible["resultado"] == "✅ ACIERTO") == compacto["acierto"]).all()
+    # El formato compacto ocupa una fracción de la versión con etiquetas
+    assert compacto.memory_usage(deep=True).sum() * 5 < legible.memory_usage(deep=True).sum()
+
+
+def test_parquet_conserva_los_tipos(tmp_path, historial_df):
+    pytest.importorskip("pyarrow")
+    compacto = ejecutar_backtesting(CONFIG, historial_df, DEFINICIONES["Grupos de 5 (A, B, C)"])
+    ruta = tmp_path / "resultados.parquet"
+
+    resultados_compactos.guardar_parquet(compacto, ruta)
+
+    pd.testing.assert_frame_equal(resultados_compactos.leer_parquet(ruta), compacto)
+
+
+def test_montos_fraccionarios_no_se_truncan(historial_df):
+    from src.comparacion import comparar_estrategias
+    from src.indice_metricas import IndiceMetricas
+    from src.significancia import simular_lote
+
+    config = {**CONFIG, "costo_por_numero": 2.5, "premio_por_acierto": 1000.3}
+    nombre = "Grupos de 3 (A, B, C, D, E)"
+    grupos = compilar_definiciones(config)[nombre]
+    compacto = ejecutar_backtesting(config, historial_df, grupos)
+    pd.testing.assert_frame_equal(compacto, ejecutar_backtesting_vectorizado(config, historial_df, grupos))
+
+    assert compacto["ganancia_franja"].dtype == "float64"
+    costos = [grupos.costos[grupos.posicion(g)] for g in compacto["grupo_predicho"]]
+    esperado = [1000.3 * a - c for a, c in zip(compacto["acierto"], costos)]
+    assert compacto["ganancia_franja"].tolist() == pytest.approx(esperado)
+    assert compacto["ganancia_franja"].max() == pytest.approx(1000.3 - grupos.costos[0])
+
+    balance = sum(esperado)
+    primera, ultima = compacto["fecha"].iloc[0], compacto["fecha"].iloc[-1]
+    assert IndiceMetricas(compacto).metricas(primera, ultima)["balance_neto"] == pytest.approx(balance)
+    resumen, _ = comparar_estrategias(config, historial_df, {nombre: config["group_definitions"][nombre]},
+                                      incluir_detalle=False)
+    assert resumen["balance_neto"].iloc[0] == pytest.approx(balance)
+
+    balances, aciertos = simular_lote(np.random.SeedSequence(1), 5, np.array([0, 1, 2]), (7.5, 2.5), 1000.3)
+    jugadas = np.random.default_rng(np.random.SeedSequence(1)).integers(0, 2, size=(5, 3), dtype=np.uint8)
+    assert balances.tolist() == pytest.approx([a * 1000.3 - sum((7.5, 2.5)[j] for j in fila)
+                                               for a, fila in zip(aciertos, jugadas)])
+
+
+def test_numeros_grandes_no_se_desbordan():
+    historial = historial_sintetico(40)
+    historial.loc[35, "Morning"] = 40000
+    compacto = ejecutar_backtesting(CONFIG, historial, DEFINICIONES["Grupos de 3 (A, B, C, D, E)"])
+    assert compacto["numero_real"].dtype == "Int32"
+    assert 40000 in compacto["numero_real"].tolist()
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from src.backtesting import ejecutar_backtesting
+from src.significancia import distribucion_aleatoria, evaluar_significancia, simular_lote
+from tests.datos import CONFIG, historial_sintetico
+
+
+def test_lote_coincide_con_jugar_cada_secuencia():
+    reales = np.array([0, 2, -1, 1, 1, 0, 2, 3])
+    costos = (5, 5, 3, 4)
+    balances, aciertos = simular_lote(np.random.SeedSequence(9), 50, reales, costos, 7)
+
+    jugadas = np.random.default_rng(np.random.SeedSequence(9)).integers(0, 4, size=(50, 8), dtype=np.uint8)
+    for k in range(50):
+        esperados = sum(int(j == r) for j, r in zip(jugadas[k], reales))
+        assert aciertos[k] == esperados
+        assert balances[k] == esperados * 7 - sum(costos[j] for j in jugadas[k])
+
+
+def test_reproducible_e_independiente_del_numero_de_procesos(monkeypatch):
+    monkeypatch.setattr("src.significancia.ELEMENTOS_POR_LOTE", 2000)
+    reales = np.random.default_rng(1).integers(-1, 3, 400)
+
+    en_serie = distribucion_aleatoria(reales, (5, 5, 5), 5, simulaciones=60, semilla=4, procesos=1)
+    en_paralelo = distribucion_aleatoria(reales, (5, 5, 5), 5, simulaciones=60, semilla=4, procesos=2)
+    otra_semilla = distribucion_aleatoria(reales, (5, 5, 5), 5, simulaciones=60, semilla=5, procesos=1)
+
+    assert np.array_equal(en_serie[0], en_paralelo[0]) and np.array_equal(en_serie[1], en_paralelo[1])
+    assert not np.array_equal(en_serie[0], otra_semilla[0])
+
+
+def test_tabla_de_significancia():
+    historial_df = historial_sintetico(dias=200)
+    tabla = evaluar_significancia(CONFIG, historial_df, simulaciones=2000, semilla=0, procesos=1)
+
+    assert list(tabla["estrategia"]) == list(CONFIG["group_definitions"])
+    for fila in tabla.to_dict("records"):
+        detalle = ejecutar_backtesting(CONFIG, historial_df, CONFIG["group_definitions"][fila["estrategia"]])
+        assert fila["balance_neto"] == detalle["ganancia_franja"].sum()
+        assert 0 <= fila["balance_percentil"] <= 100 and 0 < fila["balance_p_valor"] <= 1
+        # Con un premio fijo, más aciertos implica más balance: ambas pruebas coinciden
+        assert fila["tasa_percentil"] == pytest.approx(fila["balance_percentil"])
+
+    with pytest.raises(ValueError):
+        evaluar_significancia(CONFIG, historial_df, estrategias=["No existe"], simulaciones=10)
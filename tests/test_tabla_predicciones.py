@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+import pytest
+
+from src.generator import generar_predicciones_del_dia
+from src.tabla_predicciones import TablaPredicciones
+from tests.datos import CONFIG, historial_sintetico
+
+ESTRATEGIA = "Grupos de 3 (A, B, C, D, E)"
+
+
+@pytest.fixture(scope="module")
+def historial_df():
+    return historial_sintetico(120)
+
+
+def test_precalculo_coincide_con_el_generador(historial_df):
+    tabla = TablaPredicciones(CONFIG)
+    tabla.sincronizar(historial_df, "v1")
+    calculadas = tabla.precalcular(ESTRATEGIA, dias_adelante=3)
+
+    primera, ultima = historial_df["fecha"].iloc[0], historial_df["fecha"].iloc[-1]
+    assert calculadas == (ultima - primera).days + 4
+    for desplazamiento in range(0, calculadas, 5):
+        fecha = primera + timedelta(days=desplazamiento)
+        esperado = generar_predicciones_del_dia(historial_df[historial_df["fecha"] < fecha], fecha, CONFIG,
+                                                CONFIG["group_definitions"][ESTRATEGIA])
+        assert tabla.prediccion(fecha, ESTRATEGIA) == esperado
+    assert tabla.fallos == 0
+
+
+def test_desaloja_lo_menos_usado_e_invalida_con_otra_version(historial_df):
+    tabla = TablaPredicciones(CONFIG, capacidad=2)
+    tabla.sincronizar(historial_df, "v1")
+    fechas = [historial_df["fecha"].iloc[-1] + timedelta(days=k) for k in (1, 2, 3)]
+
+    tabla.prediccion(fechas[0], ESTRATEGIA)
+    tabla.prediccion(fechas[1], ESTRATEGIA)
+    tabla.prediccion(fechas[0], ESTRATEGIA)
+    tabla.prediccion(fechas[2], ESTRATEGIA)  # desaloja fechas[1]
+    assert (tabla.aciertos, tabla.fallos) == (1, 3)
+    tabla.prediccion(fechas[0], ESTRATEGIA)
+    tabla.prediccion(fechas[1], ESTRATEGIA)
+    assert (tabla.aciertos, tabla.fallos) == (2, 4)
+
+    assert not tabla.sincronizar(historial_df, "v1")
+    assert tabla.sincronizar(historial_df, "v2")
+    assert tabla.estadisticas()["entradas"] == 0
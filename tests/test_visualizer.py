@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from src.comparacion import comparar_estrategias
+from src import visualizer
+from tests.datos import CONFIG, historial_sintetico
+
+
+@pytest.fixture(scope="module")
+def detalles():
+    _, detalles = comparar_estrategias(CONFIG, historial_sintetico(400))
+    return detalles
+
+
+def test_resumen_por_periodo_conserva_totales(detalles):
+    resultados = next(iter(detalles.values()))
+    tasa = visualizer.tasa_por_periodo(resultados, "franja", "M")
+    balance = visualizer.balance_por_periodo(resultados, "M")
+
+    assert list(tasa.index) == CONFIG["franjas"]
+    assert tasa.shape[1] == len(balance)
+    assert balance.iloc[-1] == resultados["ganancia_franja"].sum()
+    enero = resultados[resultados["fecha"].dt.to_period("M") == tasa.columns[0].to_period("M")]
+    assert tasa.iloc[0, 0] == pytest.approx(enero[enero["franja"] == CONFIG["franjas"][0]]["acierto"].mean() * 100)
+
+
+def test_frecuencia_automatica_segun_el_largo(detalles):
+    resultados = next(iter(detalles.values()))
+    assert visualizer.frecuencia_automatica(resultados.head(50)) == "D"
+    un_anio = resultados[resultados["fecha"] < resultados["fecha"].iloc[0] + pd.Timedelta(days=365)]
+    assert visualizer.frecuencia_automatica(un_anio) == "W"
+    assert visualizer.frecuencia_automatica(resultados) == "M"
+
+
+def test_renderiza_lote_a_archivos(tmp_path, detalles):
+    pytest.importorskip("matplotlib")
+
+    rutas = visualizer.renderizar_lote(detalles, str(tmp_path), "M", procesos=2)
+
+    assert set(rutas) == set(detalles)
+    for archivos in rutas.values():
+        assert len(archivos) == 3
+        assert all((tmp_path / archivo).stat().st_size > 0 for archivo in archivos)